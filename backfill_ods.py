@@ -19,20 +19,23 @@ Deux garde-fous contre les doublons :
   - un jour déjà présent dans le CSV n'est jamais touché — donc ré-exécutable,
     et pas de double comptage avec les jours que le webhook connaît déjà.
 
-Séquence (le CSV local n'est qu'un miroir de la prod, cf. `timer web_sync`) :
-    timer web_sync                                  # pull du CSV de prod
-    python backfill_ods.py --dry-run                # contrôle
-    python backfill_ods.py                          # sauvegarde .bak-<ts>
-    python backfill_ods.py --source archive
-    scp webhook-data/pomofocus_webhook.csv <vps>:/home/debian/timer/webhook-data/
-
-À faire hors session de travail : entre le pull et le push, tout pomodoro terminé
-en prod écrit une ligne qui serait écrasée.
+Séquence : envoi direct au récepteur de prod (`POST /api/import`, mode
+« missing » : c'est lui qui écarte les jours qu'il connaît, en une écriture) —
+rien à télécharger ni à renvoyer, et aucun pomodoro en cours n'est écrasé :
+    python backfill_ods.py --push --dry-run         # contrôle
+    python backfill_ods.py --push
+    python backfill_ods.py --push --source archive
+
+Sans --push, le CSV local (miroir de la prod, cf. `timer web_sync`) est
+complété sur place, avec une sauvegarde .bak-<ts>.
 """
 import argparse
 import csv
+import json
 import os
 import shutil
+import urllib.error
+import urllib.request
 from datetime import datetime
 
 import pandas as pd
@@ -46,6 +49,12 @@ ARCHIVE_PATH = os.path.expanduser(
 )
 CSV_PATH = _config["WEBHOOK_POMOFOCUS_FILEPATH"]
 CSV_COLUMNS = ["date", "project", "task", "minutes", "startTime", "endTime"]
+# POST /api/import du récepteur, à côté de l'/api/csv que lit `timer web_sync` ;
+# None sans WEBHOOK_CSV_URL (--push exige alors --url)
+IMPORT_URL = (
+    _config["WEBHOOK_CSV_URL"].rsplit("/", 1)[0] + "/import"
+    if _config.get("WEBHOOK_CSV_URL") else None
+)
 
 # Dernier jour que les ODS ont le droit de remplir : le CSV reprend le 19/02/2026.
 DEFAULT_UNTIL = "20260218"
@@ -173,6 +182,22 @@ def rows_to_add(candidates, csv_rows, until=DEFAULT_UNTIL):
     ]
 
 
+def push_rows(rows, url=IMPORT_URL, mode="missing"):
+    """Envoie `rows` au récepteur (POST /api/import) ; rend sa réponse JSON
+    ({"rows", "days", "skipped"})."""
+    body = json.dumps({"mode": mode, "rows": rows}).encode("utf-8")
+    req = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}, method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return json.load(resp)
+    except urllib.error.HTTPError as exc:
+        raise SystemExit(f"{url} : {exc.code} {exc.read().decode('utf-8', 'replace').strip()}")
+    except urllib.error.URLError as exc:
+        raise SystemExit(f"{url} : {exc.reason}")
+
+
 READERS = {"suivi": (read_suivi_rows, ODS_PATH), "archive": (read_archive_rows, ARCHIVE_PATH)}
 
 
@@ -185,12 +210,19 @@ def main():
                         help=f"dernier jour importable, AAAAMMJJ (défaut {DEFAULT_UNTIL})")
     parser.add_argument("--dry-run", action="store_true",
                         help="affiche ce qui serait ajouté, sans rien écrire")
+    parser.add_argument("--push", action="store_true",
+                        help="envoie au récepteur (POST /api/import) au lieu d'écrire --csv")
+    parser.add_argument("--url", default=IMPORT_URL,
+                        help=f"URL de l'import du récepteur (défaut {IMPORT_URL})")
     args = parser.parse_args()
+    if args.push and not args.url:
+        parser.error("--push : WEBHOOK_CSV_URL absent de config.yml, passer --url")
 
     read_rows, default_ods = READERS[args.source]
     ods_path = args.ods or default_ods
 
-    csv_rows = read_csv_rows(args.csv)
+    # --push : les jours déjà connus sont écartés par le récepteur lui-même
+    csv_rows = [] if args.push else read_csv_rows(args.csv)
     new_rows = rows_to_add(read_rows(ods_path), csv_rows, until=args.until)
 
     if not new_rows:
@@ -210,6 +242,12 @@ def main():
         print("--dry-run : rien écrit.")
         return
 
+    if args.push:
+        result = push_rows(new_rows, args.url)
+        print(f"envoyé     : {args.url} — {result['rows']} lignes sur {len(result['days'])} jours, "
+              f"{len(result['skipped'])} jours déjà connus ignorés")
+        return
+
     backup = f"{args.csv}.bak-{datetime.now():%Y%m%d-%H%M%S}"
     shutil.copy2(args.csv, backup)
     write_csv_rows(csv_rows + new_rows, args.csv)
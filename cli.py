@@ -13,6 +13,7 @@ from core.services import (
     load_pomo_for_report,
     load_pomo_for_day_bars,
     load_pomo_for_swimlane,
+    load_pomo_for_blocks,
     load_pomo_for_eighty_bars,
     merge_pomo_exports,
 )
@@ -154,6 +155,29 @@ def cmd_swimlane(args):
     plot_swimlane(df, output=args.output, show=args.show)
 
 
+def cmd_blocks(args):
+    blocks = load_pomo_for_blocks(args.date_from, args.date_to, args.project, args.gap)
+    day = None
+    for block in blocks:
+        if block.start.date() != day:
+            day = block.start.date()
+            print(f"\n{day:%Y-%m-%d}")
+        span = (block.end - block.start).total_seconds() / 60
+        mix = ", ".join(
+            f"{name} {minutes * 100 // block.minutes}%"
+            for name, minutes in sorted(block.projects.items(), key=lambda kv: -kv[1])
+        ) if block.minutes else ""
+        print(
+            f"  {block.start:%H:%M}-{block.end:%H:%M}  "
+            f"{block.minutes // 60}:{block.minutes % 60:02d} active / "
+            f"{int(span) // 60}:{int(span) % 60:02d}  "
+            f"({block.sessions} sessions)  {mix}"
+        )
+    if blocks:
+        mean = sum(b.minutes for b in blocks) / len(blocks)
+        print(f"\n{len(blocks)} blocks, {mean:.0f} active minutes on average")
+
+
 def cmd_eighty_hours(args):
     if args.week and args.month:
         raise SystemExit("--week and --month are mutually exclusive")
@@ -229,6 +253,16 @@ def cmd_web_sync(args):
     print(f"Wrote {len(data)} bytes ({n_lines} records) to {dest}")
 
 
+def cmd_export_site(args):
+    # the receiver pulls in Flask: only imported for this command
+    import webhook_receiver
+
+    out = args.out or webhook_receiver.EXPORT_SITE_DIR
+    for tenant in webhook_receiver.all_tenants():
+        written, unchanged = webhook_receiver.export_site(args.out, full=args.full, tenant=tenant)
+        print(f"{os.path.join(out, tenant.secret)}: {written} weeks written, {unchanged} unchanged")
+
+
 def cmd_plot(args):
     raise NotImplementedError
 
@@ -322,6 +356,19 @@ def build_parser():
     )
     p_swimlane.set_defaults(func=cmd_swimlane)
 
+    p_blocks = sub.add_parser(
+        "blocks", help="Work blocks: sessions merged across short breaks"
+    )
+    p_blocks.add_argument("--from", dest="date_from", metavar="YYYYMMDD")
+    p_blocks.add_argument("--to", dest="date_to", metavar="YYYYMMDD")
+    p_blocks.add_argument("-p", "--project", dest="project")
+    p_blocks.add_argument(
+        "--gap", type=int, default=None, metavar="MIN",
+        help="Longest break inside a block, in minutes "
+             "(default: BLOCK_GAP_MINUTES from config.yml, else 15)",
+    )
+    p_blocks.set_defaults(func=cmd_blocks)
+
     p_eighty = sub.add_parser("eighty-hours", help="Daily billable hours CSV for a month")
     p_eighty.add_argument(
         "--month", metavar="YYYY-MM", default=None,
@@ -359,6 +406,15 @@ def build_parser():
     )
     p_web_sync.set_defaults(func=cmd_web_sync)
 
+    p_export_site = sub.add_parser(
+        "export-site", help="Render closed weeks of the webhook dashboard for nginx"
+    )
+    p_export_site.add_argument("--out", help="output directory (default DATA_DIR/site)")
+    p_export_site.add_argument(
+        "--full", action="store_true", help="re-render every week, ignoring the manifest"
+    )
+    p_export_site.set_defaults(func=cmd_export_site)
+
     return parser
 
 
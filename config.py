@@ -1,10 +1,14 @@
+import copy
 import os
+from collections import namedtuple
 
 import yaml
 
 __all__ = [
     "load_projects",
-    "load_config"
+    "load_config",
+    "project_registry",
+    "ProjectRegistry",
 ]
 
 PROJECTS_ROOT_DIR = os.path.dirname(__file__)
@@ -25,14 +29,38 @@ def _load_yaml_config(yaml_path=None):
         raise
 
 
+# {chemin: (mtime_ns, contenu parsé)} — le YAML n'est re-parsé que si le
+# fichier a changé : les appels répétés (une requête webhook, un rapport) ne
+# coûtent qu'un stat, et une édition est prise en compte sans redémarrage.
+_YAML_CACHE = {}
+
+
+def _yaml_mtime(yaml_path):
+    try:
+        return os.stat(yaml_path).st_mtime_ns
+    except FileNotFoundError:
+        print(f"Configuration file not found: {yaml_path}")
+        raise
+
+
+def _load_yaml_cached(yaml_path):
+    mtime = _yaml_mtime(yaml_path)
+    cached = _YAML_CACHE.get(yaml_path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, _load_yaml_config(yaml_path))
+        _YAML_CACHE[yaml_path] = cached
+    # copie : l'appelant peut modifier ce qu'il reçoit sans toucher au cache
+    return copy.deepcopy(cached[1])
+
+
 def load_projects(projects_path=projects_filepath):
-    return _load_yaml_config(projects_path)
+    return _load_yaml_cached(projects_path)
 
 
 def load_config(config_path=config_filepath):
     ppt_root_dir = os.path.dirname(__file__)
     home_dir = os.path.expanduser("~")
-    config = _load_yaml_config(config_path)
+    config = _load_yaml_cached(config_path)
     config["HOME_DIR"] = os.path.join(
         home_dir, config["PPT_DL_DIR"]
     )
@@ -60,6 +88,78 @@ def load_config(config_path=config_filepath):
     return config
 
 
+ProjectEntry = namedtuple("ProjectEntry", [
+    "name", "pom_names", "color", "tjm", "derniere_facture", "export_name", "billable",
+])
+
+
+class ProjectRegistry:
+    """projects-config.yml compilé une fois : une ProjectEntry par projet, et
+    les index dont les appelants ont besoin, tous par nom Pomofocus en
+    minuscules (`pom_project` peut être une liste : [PRO, COLIBRI] donne la
+    couleur de pro aux deux).
+
+    - `by_pom` : {nom pom: ProjectEntry}
+    - `colors` : {nom pom: couleur} des projets qui en définissent une
+    - `billing` : {nom pom: (tjm, derniere_facture)} des projets tarifés (les
+      deux renseignés)
+    - `export_names` : {projet: export_name} (export ODS)
+    - `billable_names` : BILLABLE_PROJECTS de config.yml, en minuscules
+    """
+
+    def __init__(self, projects, billable_projects=()):
+        self.billable_names = {p.lower() for p in billable_projects or ()}
+        self.projects, self.by_pom = {}, {}
+        self.colors, self.billing, self.export_names = {}, {}, {}
+        for name, data in (projects or {}).items():
+            if not isinstance(data, dict):
+                continue
+            pom = data.get("pom_project")
+            pom_names = tuple(
+                n.lower() for n in ([pom] if isinstance(pom, str) else (pom or []))
+            )
+            tjm, since = data.get("tjm"), data.get("derniere_facture")
+            entry = ProjectEntry(
+                name=name,
+                pom_names=pom_names,
+                color=data.get("color"),
+                tjm=None if tjm is None else float(tjm),
+                derniere_facture=str(since) if since else None,
+                export_name=data.get("export_name"),
+                billable=any(n in self.billable_names for n in (name.lower(), *pom_names)),
+            )
+            self.projects[name] = entry
+            if entry.export_name:
+                self.export_names[name] = entry.export_name
+            for pom_name in pom_names:
+                self.by_pom[pom_name] = entry
+                if entry.color:
+                    self.colors[pom_name] = entry.color
+                if entry.tjm is not None and entry.derniere_facture:
+                    self.billing[pom_name] = (entry.tjm, entry.derniere_facture)
+
+    def canonical(self, pom_name):
+        """Nom du projet (clé de projects-config.yml) d'un nom Pomofocus, ou None."""
+        entry = self.by_pom.get((pom_name or "").lower())
+        return entry.name if entry else None
+
+
+_REGISTRIES = {}  # {(projets, config): ((mtime, mtime), ProjectRegistry)}
+
+
+def project_registry(projects_path=projects_filepath, config_path=config_filepath):
+    """ProjectRegistry courant, recompilé seulement quand projects-config.yml ou
+    config.yml change (mtime)."""
+    key = (projects_path, config_path)
+    mtimes = (_yaml_mtime(projects_path), _yaml_mtime(config_path))
+    cached = _REGISTRIES.get(key)
+    if cached is None or cached[0] != mtimes:
+        billable = (_load_yaml_cached(config_path) or {}).get("BILLABLE_PROJECTS", [])
+        cached = (mtimes, ProjectRegistry(_load_yaml_cached(projects_path), billable))
+        _REGISTRIES[key] = cached
+    return cached[1]
+
+
 if __name__ == "__main__":
     from pprint import pprint
 
@@ -0,0 +1,57 @@
+"""Work blocks: sessions separated by short breaks, merged into focus blocks.
+
+Pure Python on purpose (no pandas): the webhook receiver image ships this
+module alone, and core.services feeds it from its DataFrames.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+DEFAULT_GAP_MINUTES = 15
+
+WorkBlock = namedtuple("WorkBlock", "start end minutes projects sessions")
+WorkBlock.__doc__ = """A run of sessions with no break longer than the gap.
+
+    start, end: datetimes of the first session start and the latest session end.
+    minutes: active minutes (sum of the sessions' minutes, breaks excluded).
+    projects: {project: active minutes}.
+    sessions: number of sessions merged.
+"""
+
+
+def work_blocks(sessions, gap_minutes=DEFAULT_GAP_MINUTES):
+    """Group sessions into work blocks in one sweep.
+
+    A session starting at most `gap_minutes` after the end of the current
+    block extends it; a longer break closes the block. Overlapping sessions
+    stay in the same block.
+
+    Args:
+        sessions: Iterable of (start, end, minutes, project) tuples, start and
+            end as datetimes, sorted by start. Not re-sorted: the sweep is
+            O(n) and only holds the block being built.
+        gap_minutes: Longest break, in minutes, that does not split a block.
+
+    Yields:
+        WorkBlock, in chronological order.
+    """
+    gap = timedelta(minutes=gap_minutes)
+    start = end = None
+    minutes, projects, count = 0, {}, 0
+    for s_start, s_end, s_minutes, project in sessions:
+        if start is not None and s_start - end > gap:
+            yield WorkBlock(start, end, minutes, projects, count)
+            start = None
+        if start is None:
+            start, end = s_start, s_end
+            minutes, projects, count = 0, {}, 0
+        end = max(end, s_end)
+        minutes += s_minutes
+        projects[project] = projects.get(project, 0) + s_minutes
+        count += 1
+    if start is not None:
+        yield WorkBlock(start, end, minutes, projects, count)
+
+
+def main_project(block):
+    """Project with the most active minutes in `block` (first one on ties)."""
+    return max(block.projects, key=block.projects.get)
@@ -13,7 +13,7 @@ from odf.opendocument import load as load_ods
 from odf.table import Table, TableCell, TableRow
 from odf.text import P
 
-from config import load_projects
+from config import project_registry
 from core.services import parse_task
 
 plt.style.use("ggplot")
@@ -128,12 +128,7 @@ def report_view_export(df, quantize=False):
           date, project, sub_project, task, duration_d.
         quantize: if True, round duration_d to nearest 1/16 (30 min).
     """
-    projects = load_projects()
-    export_name_map = {
-        name: cfg["export_name"]
-        for name, cfg in projects.items()
-        if isinstance(cfg, dict) and "export_name" in cfg
-    }
+    export_name_map = project_registry().export_names
     header_line = (
         f"\n{'date'};{'project'};{'sub_project'};{'task'};{'duration_d'}"
     )
@@ -199,12 +194,7 @@ def report_view_ods(df, ods_path, only_months=None):
     if only_months is None:
         only_months = [_month_sheet_name(pd.Timestamp.today())]
 
-    projects = load_projects()
-    export_name_map = {
-        name: cfg["export_name"]
-        for name, cfg in projects.items()
-        if isinstance(cfg, dict) and "export_name" in cfg
-    }
+    export_name_map = project_registry().export_names
 
     df = df.copy()
     df["project"] = df["project"].map(lambda p: export_name_map.get(p, p))
@@ -245,19 +235,8 @@ def _project_color_map(project_names):
     pom_project name), otherwise derives a color by hashing the project name
     into a 40-slot palette (tab20 + tab20b).
     """
-    projects_cfg = load_projects()
     palette = [cm.tab20(i / 20) for i in range(20)] + [cm.tab20b(i / 20) for i in range(20)]
-
-    cfg_colors = {}
-    for proj_data in (projects_cfg or {}).values():
-        if not isinstance(proj_data, dict):
-            continue
-        color = proj_data.get("color")
-        if not color:
-            continue
-        pom = proj_data.get("pom_project")
-        for name in ([pom] if isinstance(pom, str) else (pom or [])):
-            cfg_colors[name.lower()] = color
+    cfg_colors = project_registry().colors
 
     result = {}
     for name in project_names:
@@ -3,7 +3,8 @@ import re
 import shutil
 
 import pandas as pd
-from config import load_config
+from config import load_config, project_registry
+from core.blocks import DEFAULT_GAP_MINUTES, work_blocks
 from core.data import read_pomo, load_all_pomo
 
 _config = load_config()
@@ -78,7 +79,7 @@ def load_pomo_for_eighty_bars(date_from, date_to):
     """
     from core.suivi_chantier import report as suivi_report
     _, df = suivi_report(_config["ODS_FILEPATH"])
-    billable = [p.lower() for p in _config.get("BILLABLE_PROJECTS", [])]
+    billable = project_registry().billable_names
     df = df[df["PROJET"].str.lower().isin(billable)].copy()
     df["date"] = pd.to_datetime(df["DATE"])
     if date_from:
@@ -120,6 +121,29 @@ def load_pomo_for_swimlane(date_from, date_to, project):
     return df
 
 
+def load_pomo_for_blocks(date_from, date_to, project, gap_minutes=None):
+    """Load Pomofocus sessions and merge them into work blocks.
+
+    Args:
+        date_from: Start date as 'YYYYMMDD' string, or None for no lower bound.
+        date_to: End date as 'YYYYMMDD' string, or None for no upper bound.
+        project: If set, restrict to this project name.
+        gap_minutes: Longest break kept inside a block. Defaults to the
+            configured BLOCK_GAP_MINUTES.
+
+    Returns:
+        List of core.blocks.WorkBlock, in chronological order.
+    """
+    if gap_minutes is None:
+        gap_minutes = _config.get("BLOCK_GAP_MINUTES", DEFAULT_GAP_MINUTES)
+    df = load_pomo_for_swimlane(date_from, date_to, project).sort_values("start")
+    sessions = (
+        (r.start.to_pydatetime(), r.end.to_pydatetime(), int(r.duration_m), r.project)
+        for r in df.itertuples()
+    )
+    return list(work_blocks(sessions, gap_minutes))
+
+
 def parse_task(task_str):
     """Parse a task string in the format '#ISSUE_ID name : description'.
 
@@ -7,7 +7,7 @@ plt.style.use("ggplot")
 import matplotlib.dates as mdates
 import pandas as pd
 
-from config import load_config
+from config import project_registry
 
 
 
@@ -17,7 +17,7 @@ def billing_export(df, period='month'):
     Filters on BILLABLE_PROJECTS from config.yml.
     Project names are matched case-insensitively.
     """
-    billable = [p.lower() for p in load_config().get("BILLABLE_PROJECTS", [])]
+    billable = project_registry().billable_names
     df = df[df['PROJET'].str.lower().isin(billable)].copy()
     df['DATE'] = pd.to_datetime(df['DATE'])
 
@@ -62,7 +62,7 @@ def billing_export_days(df, year=None, month=None, week=None):
             freq='D'
         )
 
-    billable = [p.lower() for p in load_config().get("BILLABLE_PROJECTS", [])]
+    billable = project_registry().billable_names
     df = df[df['PROJET'].str.lower().isin(billable)].copy()
     df['DATE'] = pd.to_datetime(df['DATE'])
     df['hours'] = df['JOURS'] * 8
@@ -1,4 +1,6 @@
 import csv
+import io
+import json
 import sys
 from pathlib import Path
 
@@ -145,3 +147,41 @@ def test_running_the_backfill_twice_changes_nothing(tmp_path, monkeypatch):
 
     assert len(after_first) == 2  # la ligne existante + celle de l'ODS
     assert read_csv(csv_path) == after_first
+
+
+def test_push_sends_the_candidates_to_the_receiver_import(monkeypatch):
+    sent = {}
+
+    class Response(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def urlopen(req, timeout):
+        sent["url"], sent["body"] = req.full_url, json.loads(req.data)
+        return Response(b'{"rows": 1, "days": ["20251103"], "skipped": []}')
+
+    monkeypatch.setattr(backfill_ods.urllib.request, "urlopen", urlopen)
+    candidates = suivi_rows([("2025-11-03", "calipso_b", "iesa", "revue", 0.125)])
+    monkeypatch.setitem(
+        backfill_ods.READERS, "suivi", (lambda ods_path: candidates, "unused.ods"),
+    )
+    monkeypatch.setattr(sys, "argv", [
+        "backfill_ods.py", "--push", "--url", "https://vps/secret/api/import", "--csv", "absent.csv",
+    ])
+
+    backfill_ods.main()
+
+    assert sent["url"] == "https://vps/secret/api/import"
+    assert sent["body"] == {"mode": "missing", "rows": candidates}
+
+
+def test_push_without_a_receiver_url_fails_clearly(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["backfill_ods.py", "--push", "--url", ""])
+
+    with pytest.raises(SystemExit):
+        backfill_ods.main()
+
+    assert "WEBHOOK_CSV_URL" in capsys.readouterr().err
@@ -0,0 +1,39 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.blocks import main_project, work_blocks
+
+
+def _session(start, end, minutes, project):
+    day = "2026-06-01 "
+    return (datetime.fromisoformat(day + start), datetime.fromisoformat(day + end), minutes, project)
+
+
+def test_work_blocks_split_on_breaks_longer_than_the_gap():
+    sessions = [
+        _session("09:00", "09:25", 25, "calipso"),
+        _session("09:40", "10:05", 25, "calipso"),  # 15 min: same block
+        _session("10:21", "10:46", 25, "calipso"),  # 16 min: new block
+    ]
+    blocks = list(work_blocks(sessions, gap_minutes=15))
+    assert [(b.start.strftime("%H:%M"), b.end.strftime("%H:%M"), b.minutes, b.sessions) for b in blocks] == [
+        ("09:00", "10:05", 50, 2),
+        ("10:21", "10:46", 25, 1),
+    ]
+    assert len(list(work_blocks(sessions, gap_minutes=0))) == 3
+
+
+def test_work_blocks_keep_overlaps_and_count_each_project():
+    sessions = [
+        _session("09:00", "11:00", 120, "calipso"),
+        _session("09:30", "09:55", 25, "speasy"),   # inside the first session
+        _session("11:05", "11:30", 25, "speasy"),
+    ]
+    (block,) = work_blocks(sessions)
+    assert block.end == datetime(2026, 6, 1, 11, 30)
+    assert block.projects == {"calipso": 120, "speasy": 50}
+    assert main_project(block) == "calipso"
+    assert list(work_blocks([])) == []
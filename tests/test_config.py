@@ -0,0 +1,52 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import load_projects, project_registry
+
+
+PROJECTS = """\
+pro:
+  pom_project: [PRO, COLIBRI]
+  color: "#E03030"
+calipso:
+  pom_project: CALIPSO
+  tjm: 540
+  derniere_facture: 20260619
+  export_name: calipso_b
+"""
+
+
+def _write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_project_registry_compiles_the_yaml_and_reloads_on_mtime(tmp_path):
+    projects, config = tmp_path / "projects.yml", tmp_path / "config.yml"
+    _write(projects, PROJECTS, 10**18)
+    _write(config, "BILLABLE_PROJECTS: [calipso]\n", 10**18)
+
+    registry = project_registry(str(projects), str(config))
+
+    assert registry.colors == {"pro": "#E03030", "colibri": "#E03030"}
+    assert registry.billing == {"calipso": (540.0, "20260619")}
+    assert registry.export_names == {"calipso": "calipso_b"}
+    assert registry.canonical("Colibri") == "pro"
+    assert registry.by_pom["calipso"].billable and not registry.by_pom["pro"].billable
+    # fichiers inchangés : même objet, pas de nouveau parsing
+    assert project_registry(str(projects), str(config)) is registry
+
+    _write(projects, PROJECTS.replace("540", "600"), 10**18 + 1)
+    assert project_registry(str(projects), str(config)).billing["calipso"][0] == 600.0
+
+
+def test_load_projects_hands_out_copies_of_the_cached_yaml(tmp_path):
+    projects = tmp_path / "projects.yml"
+    _write(projects, PROJECTS, 10**18)
+
+    load_projects(str(projects))["calipso"]["tjm"] = 0
+
+    assert load_projects(str(projects))["calipso"]["tjm"] == 540
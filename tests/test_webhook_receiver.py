@@ -10,6 +10,21 @@ import pytest
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 import webhook_receiver
+from config import ProjectRegistry
+
+
+@pytest.fixture(autouse=True)
+def _fresh_rate_limits():
+    # les tests enchaînent des dizaines de pages depuis la même IP
+    webhook_receiver._RATE_BUCKETS.clear()
+
+
+@pytest.fixture(autouse=True)
+def _no_background_prerender(monkeypatch):
+    # pas de thread qui rende pendant qu'un test change de CSV ; le pré-rendu
+    # est testé en appelant prerender() directement
+    monkeypatch.setattr(webhook_receiver, "PRERENDER", False)
+    webhook_receiver._PRERENDERED.clear()
 
 
 def read_rows(path):
@@ -902,6 +917,10 @@ def _fake_projects():
     }
 
 
+def _fake_registry():
+    return ProjectRegistry(_fake_projects())
+
+
 def test_project_minutes_since_excludes_the_invoice_day_and_before():
     minutes = webhook_receiver.project_minutes_since(
         BILLING_ROWS, "calipso", "20260619"
@@ -927,7 +946,7 @@ def test_project_minutes_since_quantizes_each_day_project_task():
 
 
 def test_project_amounts_multiplies_days_by_tjm(monkeypatch):
-    monkeypatch.setattr(webhook_receiver, "load_projects", _fake_projects)
+    monkeypatch.setattr(webhook_receiver, "project_registry", _fake_registry)
 
     amounts = webhook_receiver.project_amounts(BILLING_ROWS)
 
@@ -972,7 +991,7 @@ def test_project_subamounts_sorted_by_consumption_and_silent_when_alone():
 
 
 def test_projects_page_details_subprojects_under_each_project(tmp_path, monkeypatch):
-    monkeypatch.setattr(webhook_receiver, "load_projects", _fake_projects)
+    monkeypatch.setattr(webhook_receiver, "project_registry", _fake_registry)
     csv_path = tmp_path / "webhook.csv"
     _write_rows(csv_path, [
         {**row, "startTime": "09:00", "endTime": "10:00"} for row in BILLING_ROWS
@@ -988,7 +1007,7 @@ def test_projects_page_details_subprojects_under_each_project(tmp_path, monkeypa
 
 
 def test_projects_page_lists_amounts_and_skips_untarifed(tmp_path, monkeypatch):
-    monkeypatch.setattr(webhook_receiver, "load_projects", _fake_projects)
+    monkeypatch.setattr(webhook_receiver, "project_registry", _fake_registry)
     csv_path = tmp_path / "webhook.csv"
     _write_rows(csv_path, [
         {**row, "startTime": "09:00", "endTime": "10:00"} for row in BILLING_ROWS
@@ -1004,7 +1023,7 @@ def test_projects_page_lists_amounts_and_skips_untarifed(tmp_path, monkeypatch):
 
 
 def test_live_shows_the_same_billable_total_as_projects(tmp_path, monkeypatch):
-    monkeypatch.setattr(webhook_receiver, "load_projects", _fake_projects)
+    monkeypatch.setattr(webhook_receiver, "project_registry", _fake_registry)
     csv_path = tmp_path / "webhook.csv"
     _write_rows(csv_path, [
         {**row, "startTime": "09:00", "endTime": "10:00"} for row in BILLING_ROWS
@@ -1023,7 +1042,7 @@ def test_live_shows_the_same_billable_total_as_projects(tmp_path, monkeypatch):
 
 
 def test_billable_total_on_live_follows_the_rounding_cookie(tmp_path, monkeypatch):
-    monkeypatch.setattr(webhook_receiver, "load_projects", _fake_projects)
+    monkeypatch.setattr(webhook_receiver, "project_registry", _fake_registry)
     csv_path = tmp_path / "webhook.csv"
     # une seule tâche de 8 min, que l'arrondi 1/4h porte à 15 min
     _write_rows(csv_path, [{
@@ -1039,3 +1058,1134 @@ def test_billable_total_on_live_follows_the_rounding_cookie(tmp_path, monkeypatc
     client.set_cookie("round", "1")
     # 15 min = 0,03125 j × 540 € = 16,875 € → 17 €
     assert client.get("/api/rows").get_json()["billable_total"] == "17 €"
+
+
+# --- instrumentation (Server-Timing, /metrics) -------------------------------
+
+def test_responses_carry_a_server_timing_header(tmp_path):
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    _write_rows(webhook_receiver.CSV_PATH, [ROW])
+
+    # /years et non /months : une page en flux n'envoie ses en-têtes qu'avant
+    # ses rendus
+    response = webhook_receiver.app.test_client().get("/years?m=2")
+
+    timing = response.headers["Server-Timing"]
+    assert "recent_month_totals;dur=" in timing
+    assert "render_week_svg;dur=" in timing
+    assert re.search(r"total;dur=[\d.]+$", timing)
+
+
+def test_metrics_exposes_counters_and_histograms_behind_the_secret(tmp_path, monkeypatch):
+    webhook_receiver.LOG_PATH = str(tmp_path / "webhook_log.jsonl")
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    monkeypatch.setattr(webhook_receiver, "SECRET", "s3cret")
+    client = webhook_receiver.app.test_client()
+    before = dict(webhook_receiver.METRICS["rejected"])
+
+    assert client.get("/metrics").status_code == 404
+    client.post("/s3cret", json={
+        "round": "pomodoro", "type": "finish", "seconds": 1500,
+        "session_start": 1711962000000, "session_end": 1711963500000,
+        "project": "calipso", "task": "t",
+    })
+    response = client.get("/s3cret/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert "receiver_csv_rows 1" in text
+    assert re.search(r"receiver_events_ingested_total [1-9]", text)
+    assert 'receiver_stage_seconds_bucket{stage="csv_upsert",le="+Inf"}' in text
+    assert 'receiver_request_seconds_count{endpoint="hook"}' in text
+    assert webhook_receiver.METRICS["rejected"]["secret"] == before.get("secret", 0) + 1
+
+
+# --- profilage à la demande ---------------------------------------------------
+
+def test_sample_stacks_collapses_the_stacks_of_other_threads():
+    import threading
+
+    release = threading.Event()
+
+    def parked():
+        release.wait()
+
+    thread = threading.Thread(target=parked)
+    thread.start()
+    try:
+        stacks = webhook_receiver.sample_stacks(0.02, interval=0.001, all_threads=True)
+    finally:
+        release.set()
+        thread.join()
+
+    assert any(":parked;" in key for key in stacks)
+    assert all(count > 0 for count in stacks.values())
+
+
+def test_debug_profile_starts_in_background_then_returns_the_dump(monkeypatch):
+    monkeypatch.setattr(webhook_receiver, "SECRET", "s3cret")
+    client = webhook_receiver.app.test_client()
+
+    assert client.get("/debug/profile?seconds=1").status_code == 404
+    started = client.get("/s3cret/debug/profile?seconds=0.05&all=1")
+    assert started.status_code == 202
+    webhook_receiver._PROFILE["thread"].join()
+
+    dump = client.get("/s3cret/debug/profile")
+    assert dump.status_code == 200
+    assert dump.mimetype == "text/plain"
+    for line in dump.get_data(as_text=True).splitlines():
+        assert re.fullmatch(r"\S.* \d+", line)
+
+
+def test_metrics_and_profile_are_reserved_to_the_default_tenant(tmp_path, monkeypatch):
+    webhook_receiver.CSV_PATH = str(tmp_path / "default.csv")
+    tenants = {"alice-s3cret": webhook_receiver.Tenant("alice-s3cret", data_dir=str(tmp_path / "alice"))}
+    monkeypatch.setattr(webhook_receiver, "TENANTS", tenants)
+    monkeypatch.setattr(webhook_receiver, "SECRET", "s3cret")
+    client = webhook_receiver.app.test_client()
+
+    assert client.get("/alice-s3cret/metrics").status_code == 404
+    assert client.get("/alice-s3cret/debug/profile").status_code == 404
+    assert client.get("/s3cret/metrics").status_code == 200
+
+
+# --- compression ----------------------------------------------------------------
+
+def test_pages_are_gzipped_when_the_client_accepts_it(tmp_path):
+    import gzip
+
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    client = webhook_receiver.app.test_client()
+
+    plain = client.get("/weeks")
+    packed = client.get("/weeks", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert packed.headers["X-Accel-Buffering"] == "no"  # nginx ne retient pas le flux
+    assert gzip.decompress(packed.data) == plain.data
+    assert len(packed.data) * 5 < len(plain.data)
+
+
+def test_identical_renders_are_compressed_once(tmp_path, monkeypatch):
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    calls = []
+    real = webhook_receiver.gzip.compress
+    monkeypatch.setattr(webhook_receiver.gzip, "compress",
+                        lambda *a, **k: calls.append(1) or real(*a, **k))
+    webhook_receiver._COMPRESSED.clear()
+    client = webhook_receiver.app.test_client()
+
+    first = client.get("/years?m=4", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/years?m=4", headers={"Accept-Encoding": "gzip"})
+
+    assert first.data == second.data
+    assert len(calls) == 1
+
+
+# --- doublons de trames ------------------------------------------------------------
+
+FINISH = {
+    "round": "pomodoro", "type": "finish", "seconds": 1500,
+    "session_start": 1711962000000, "session_end": 1711963500000,
+    "project": "calipso", "task": "#42 auth: tests",
+}
+
+
+def test_duplicate_deliveries_skip_the_csv_entirely(tmp_path, monkeypatch):
+    webhook_receiver.LOG_PATH = str(tmp_path / "webhook_log.jsonl")
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    upserts = []
+    real = webhook_receiver.upsert_csv_row
+    monkeypatch.setattr(webhook_receiver, "upsert_csv_row",
+                        lambda row: upserts.append(row) or real(row))
+    skipped = webhook_receiver.METRICS["duplicates_skipped"]
+    client = webhook_receiver.app.test_client()
+
+    for _ in range(3):
+        assert client.post("/", json=FINISH).status_code == 200
+    client.post("/", json={**FINISH, "seconds": 1560, "session_end": 1711963560000})
+
+    assert len(upserts) == 2  # la trame + sa version prolongée, pas les 2 doublons
+    assert webhook_receiver.METRICS["duplicates_skipped"] == skipped + 2
+    # le journal brut garde toutes les trames
+    assert len(Path(webhook_receiver.LOG_PATH).read_text().splitlines()) == 4
+    assert "receiver_duplicates_skipped_total" in client.get("/metrics").get_data(as_text=True)
+
+
+def test_editing_a_day_forgets_its_seen_deliveries(tmp_path, monkeypatch):
+    webhook_receiver.LOG_PATH = str(tmp_path / "webhook_log.jsonl")
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    client = webhook_receiver.app.test_client()
+    client.post("/", json=FINISH)
+    row = read_rows(webhook_receiver.CSV_PATH)[0]
+    webhook_receiver.update_csv_row(
+        (row["date"], row["startTime"], row["project"], row["task"]),
+        "calipso", "renommée", row["startTime"], row["endTime"],
+    )
+    upserts = []
+    real = webhook_receiver.upsert_csv_row
+    monkeypatch.setattr(webhook_receiver, "upsert_csv_row",
+                        lambda row: upserts.append(row) or real(row))
+
+    client.post("/", json=FINISH)
+
+    assert len(upserts) == 1
+    assert {r["task"] for r in read_rows(webhook_receiver.CSV_PATH)} == {"renommée", FINISH["task"]}
+
+
+def test_event_fingerprint_depends_on_the_target_csv():
+    assert (webhook_receiver.event_fingerprint(FINISH, "a.csv")
+            != webhook_receiver.event_fingerprint(FINISH, "b.csv"))
+    assert (webhook_receiver.event_fingerprint(FINISH, "a.csv")
+            == webhook_receiver.event_fingerprint(dict(FINISH), "a.csv"))
+
+
+# --- limitation de débit / délestage ------------------------------------------
+
+def test_dashboard_is_rate_limited_per_client_but_ingestion_never(tmp_path, monkeypatch):
+    webhook_receiver.LOG_PATH = str(tmp_path / "webhook_log.jsonl")
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    monkeypatch.setattr(webhook_receiver, "RATE_LIMIT_BURST", 3)
+    monkeypatch.setattr(webhook_receiver, "RATE_LIMIT_PER_SECOND", 0.5)
+    client = webhook_receiver.app.test_client()
+    crawler = {"X-Forwarded-For": "203.0.113.7, 10.0.0.1"}
+
+    statuses = [client.get("/live", headers=crawler).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    limited = client.get("/live", headers=crawler)
+    assert int(limited.headers["Retry-After"]) >= 1
+    # un autre client n'est pas pénalisé, ni le webhook du même client
+    assert client.get("/live", headers={"X-Forwarded-For": "198.51.100.1"}).status_code == 200
+    assert client.post("/", json=FINISH, headers=crawler).status_code == 200
+
+
+def test_rate_limit_key_ignores_client_supplied_forwarded_hops(tmp_path, monkeypatch):
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    monkeypatch.setattr(webhook_receiver, "RATE_LIMIT_BURST", 2)
+    monkeypatch.setattr(webhook_receiver, "RATE_LIMIT_PER_SECOND", 0.5)
+    client = webhook_receiver.app.test_client()
+
+    # un premier maillon différent à chaque requête, le même client pour nginx
+    statuses = [
+        client.get("/live", headers={"X-Forwarded-For": f"10.9.9.{i}, 203.0.113.7",
+                                     "X-Real-IP": "203.0.113.7"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    spoofed = {"X-Forwarded-For": "10.9.9.9, 203.0.113.7"}
+    assert client.get("/live", headers=spoofed).status_code == 429
+
+
+def test_heavy_pages_are_shed_when_they_waited_too_long_in_the_queue(tmp_path):
+    import time
+
+    webhook_receiver.LOG_PATH = str(tmp_path / "webhook_log.jsonl")
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    client = webhook_receiver.app.test_client()
+    stale = {"X-Request-Start": f"t={time.time() - 10:.3f}"}  # format $msec de nginx
+
+    shed = client.get("/months", headers=stale)
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == str(webhook_receiver.SHED_RETRY_AFTER)
+    assert client.post("/", json=FINISH, headers=stale).status_code == 200
+    fresh = {"X-Request-Start": f"t={time.time() * 1000:.0f}"}  # millisecondes
+    assert client.get("/months", headers=fresh).status_code == 200
+
+
+def test_take_tokens_refills_over_time():
+    webhook_receiver.take_tokens("ip", cost=webhook_receiver.RATE_LIMIT_BURST, now=100.0)
+
+    assert webhook_receiver.take_tokens("ip", now=100.0) > 0
+    later = 100.0 + 1 / webhook_receiver.RATE_LIMIT_PER_SECOND
+    assert webhook_receiver.take_tokens("ip", now=later) == 0
+
+
+# --- magasin de lignes / grand livre --------------------------------------------
+
+def test_ledger_updated_day_by_day_matches_a_full_rescan():
+    import random
+
+    rnd = random.Random(31)
+    rows = [
+        {"date": f"202606{rnd.randint(10, 30)}",
+         "project": rnd.choice(["calipso_iesa", "calipso_lees", "calipso", "speasy_hapi"]),
+         "task": rnd.choice("abc"), "minutes": str(rnd.randint(1, 90))}
+        for _ in range(200)
+    ]
+    ledger = webhook_receiver.ProjectLedger()
+    for day in sorted({r["date"] for r in rows}, reverse=True):  # jours dans le désordre
+        ledger.set_day(day, [r for r in rows if r["date"] == day])
+    ledger.set_day("20260615", [])  # un jour vidé disparaît des cumuls
+
+    rows = [r for r in rows if r["date"] != "20260615"]
+    for prefix in ("calipso", "speasy"):
+        for since in ("20260601", "20260614", "20260615", "20260622", "20260630"):
+            for quantize in (False, True):
+                by_task = {}
+                for r in rows:
+                    if r["project"].split("_")[0] == prefix and r["date"] > since:
+                        key = (r["date"], r["project"], r["task"])
+                        by_task[key] = by_task.get(key, 0) + int(r["minutes"])
+                expected = sum(
+                    -(-m // 15) * 15 if quantize else m for m in by_task.values()
+                )
+                assert ledger.minutes_since(prefix, since, quantize) == expected
+
+
+def test_row_store_follows_receiver_writes_without_rereading(tmp_path, monkeypatch):
+    csv_path = tmp_path / "webhook.csv"
+    _write_rows(csv_path, [{**ROW, "date": "20260620"}])
+    store = webhook_receiver.row_store(csv_path)
+    builds = []
+    real = webhook_receiver._build_store
+    monkeypatch.setattr(webhook_receiver, "_build_store",
+                        lambda path: builds.append(path) or real(path))
+
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": "20260621", "minutes": 30, "startTime": "14:00", "endTime": "14:30"},
+        str(csv_path),
+    )
+
+    assert webhook_receiver.row_store(csv_path) is store and builds == []
+    assert store.rows == read_rows(csv_path)
+    assert store.by_day["20260621"][0]["minutes"] == "30"
+    fresh = webhook_receiver.RowStore(read_rows(csv_path))
+    assert (store.ledger.minutes_since("calipso", "20260101")
+            == fresh.ledger.minutes_since("calipso", "20260101"))
+    # une réécriture extérieure (scp, backfill) force la reconstruction
+    _write_rows(csv_path, [{**ROW, "date": "20260622"}, {**ROW, "date": "20260623"}])
+    assert set(webhook_receiver.row_store(csv_path).by_day) == {"20260622", "20260623"}
+    assert len(builds) == 1
+
+
+def test_weekly_rollups_follow_upserts_and_survive_a_restart(tmp_path, monkeypatch):
+    csv_path = tmp_path / "webhook.csv"
+    _write_rows(csv_path, [{**ROW, "date": "20260629", "project": "calipso_iesa"}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    today = date(2026, 7, 1)
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": "20260630", "project": "calipso_iesa", "minutes": 5,
+         "startTime": "14:00", "endTime": "14:05"}, str(csv_path),
+    )
+
+    week = webhook_receiver.recent_week_totals(today=today, n=1)[0]
+    assert (week[3], week[4]) == (30 / 60, {"calipso": 30})
+    assert webhook_receiver.recent_week_totals(today=today, n=1, quantize=True)[0][3] == 45 / 60
+    assert Path(f"{csv_path}.rollups.json").exists()
+
+    # « redémarrage » : les agrégats sont relus, pas recalculés
+    webhook_receiver._STORES.clear()
+    monkeypatch.setattr(webhook_receiver, "day_rollup", lambda rows: pytest.fail("recalcul"))
+    assert webhook_receiver.recent_week_totals(today=today, n=1)[0][4] == {"calipso": 30}
+
+
+def test_warm_restart_replays_only_the_days_changed_since_the_checkpoint(tmp_path, monkeypatch):
+    csv_path = tmp_path / "webhook.csv"
+    rows = [{**ROW, "date": day, "project": "calipso_iesa", "task": f"tache {day}"}
+            for day in ("20260622", "20260623", "20260624", "20260625")]
+    _write_rows(csv_path, rows)
+    webhook_receiver.row_store(csv_path)
+    assert Path(f"{csv_path}.rollups.json").exists()
+
+    # réécriture extérieure pendant l'arrêt : un jour modifié, un supprimé,
+    # un ajouté
+    rows[1] = {**rows[1], "minutes": 50, "endTime": "10:50"}
+    rows[2:3] = [{**ROW, "date": "20260701", "task": "reunion"}]
+    _write_rows(csv_path, rows)
+    webhook_receiver._STORES.clear()
+    replayed = []
+    real = webhook_receiver.RowStore._index_day
+    monkeypatch.setattr(webhook_receiver.RowStore, "_index_day",
+                        lambda self, day, day_rows: replayed.append(day) or real(self, day, day_rows))
+    store = webhook_receiver.row_store(csv_path)
+    monkeypatch.undo()
+
+    assert sorted(replayed) == ["20260623", "20260624", "20260701"]
+    fresh = webhook_receiver.RowStore(read_rows(csv_path))
+    assert store.days == fresh.days and store.cells == fresh.cells
+    assert (store.daily, store.weekly, store.monthly) == (fresh.daily, fresh.weekly, fresh.monthly)
+    assert (store.ledger.minutes_since("calipso", "20260622", quantize=True)
+            == fresh.ledger.minutes_since("calipso", "20260622", quantize=True))
+    assert [r["date"] for r in store.search("tache")] == ["20260625", "20260623", "20260622"]
+    assert [r["date"] for r in store.search("reu")] == ["20260701"]
+
+
+def test_receiver_writes_defer_the_checkpoint_and_boot_replays_what_it_missed(tmp_path, monkeypatch):
+    import json
+
+    csv_path = tmp_path / "webhook.csv"
+    checkpoint = Path(f"{csv_path}.rollups.json")
+    _write_rows(csv_path, [{**ROW, "date": "20260622"}, {**ROW, "date": "20260623"}])
+    store = webhook_receiver.row_store(csv_path)
+    saved = checkpoint.read_bytes()
+    normalized = []
+    real_normalized = webhook_receiver._normalized_row
+    monkeypatch.setattr(webhook_receiver, "_normalized_row",
+                        lambda row: normalized.append(row["date"]) or real_normalized(row))
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": "20260624", "minutes": 30, "startTime": "14:00", "endTime": "14:30"}, str(csv_path),
+    )
+
+    assert checkpoint.read_bytes() == saved  # pas de réécriture à chaque webhook
+    assert store.by_day["20260624"][0]["minutes"] == "30"
+    assert normalized == ["20260624"]  # les lignes des autres jours sont gardées telles quelles
+    replayed = []
+    real = webhook_receiver.RowStore._index_day
+    monkeypatch.setattr(webhook_receiver.RowStore, "_index_day",
+                        lambda self, day, day_rows: replayed.append(day) or real(self, day, day_rows))
+    webhook_receiver._STORES.clear()
+    assert webhook_receiver.row_store(csv_path).daily == store.daily
+    assert replayed == ["20260624"]  # checkpoint en retard : seul le jour écrit depuis
+
+    webhook_receiver.flush_checkpoints()
+    assert json.loads(checkpoint.read_text())["csv_sha1"] == webhook_receiver._file_digest(csv_path)
+
+
+def test_months_page_reaches_back_to_the_first_row_and_shows_all(tmp_path):
+    csv_path = tmp_path / "webhook.csv"
+    old = date.today() - timedelta(weeks=300)
+    _write_rows(csv_path, [{**ROW, "date": old.strftime("%Y%m%d")}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    history = webhook_receiver.history_weeks()
+
+    assert history == 301
+    last = (history - 1) // webhook_receiver.MONTH_WEEKS_SHOWN
+    oldest = client.get(f"/months?p={last}").get_data(as_text=True)
+    assert "précédentes</span>" in oldest  # plus rien avant la première ligne
+    assert client.get(f"/months?p={last + 3}").get_data(as_text=True) == oldest
+
+    everything = client.get("/months?n=all").get_data(as_text=True)
+    assert f"{history} semaines" in everything
+    assert len(re.findall(r">(S\d\d)</text>", everything)) == 2 * history
+
+
+def test_recent_month_totals_reads_the_monthly_rollups(tmp_path):
+    csv_path = tmp_path / "webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": "20260630", "project": "calipso_iesa", "minutes": "5"},
+        {**ROW, "date": "20260701", "project": "calipso_iesa", "minutes": "20"},
+        {**ROW, "date": "20260702", "project": "perso", "minutes": "30"},
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+
+    months = webhook_receiver.recent_month_totals(today=date(2026, 7, 14), n=3)
+
+    assert [(m[0], m[1]) for m in months] == [
+        (date(2026, 7, 1), "Juillet 2026"), (date(2026, 6, 1), "Juin 2026"),
+        (date(2026, 5, 1), "Mai 2026"),
+    ]
+    assert (months[0][2], months[0][3]) == (20 / 60, {"calipso": 20, "perso": 30})
+    assert months[1][2] == 5 / 60 and months[2][3] == {}
+    rounded = webhook_receiver.recent_month_totals(today=date(2026, 7, 14), n=2, quantize=True)
+    assert [m[2] for m in rounded] == [30 / 60, 15 / 60]
+
+
+def test_years_page_measures_each_month_against_the_target(tmp_path):
+    csv_path = tmp_path / "webhook.csv"
+    first = webhook_receiver.month_start(date.today(), 40)
+    _write_rows(csv_path, [{**ROW, "date": first.strftime("%Y%m%d"), "project": "calipso_iesa"}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    target = webhook_receiver.MONTHLY_TARGET_HOURS
+
+    page = client.get("/years?m=12").get_data(as_text=True)
+    assert "<title>12 mois — " in page
+    assert "<title>4 semaines — " in client.get("/months?n=4").get_data(as_text=True)
+    assert f"FACTURABLE — 12 MOIS : 0:00 / {12 * target}h" in page
+    assert '/years?m=12&p=1' in page and 'class="active">Années' in page
+    everything = client.get("/years?m=all").get_data(as_text=True)
+    assert "41 mois" in everything and f"{first.year}</text>" in everything
+    svg = client.get("/billable-months.svg?m=all")
+    assert svg.mimetype == "image/svg+xml" and "0:25</text>" in svg.get_data(as_text=True)
+    assert "ACTIVITÉ — 3 MOIS" in client.get("/activity-months.svg?m=3").get_data(as_text=True)
+
+
+def test_calendar_facts_are_computed_once_per_day(tmp_path, monkeypatch):
+    friday = date(2026, 7, 24)
+    cal = webhook_receiver.calendar_day(friday)
+
+    assert (cal.key, cal.label, cal.short_label, cal.weekend) == (
+        "20260724", "Vendredi 24/07", "ven. 24/07", False)
+    assert (cal.monday, cal.week_label, cal.month_key) == (date(2026, 7, 20), "S30", "202607")
+    assert cal.week_range == "Semaine du 20 au 26 juillet 2026"
+    assert webhook_receiver.calendar_day(date(2026, 7, 25)).weekend
+
+    webhook_receiver.CSV_PATH = str(tmp_path / "webhook.csv")
+    client = webhook_receiver.app.test_client()
+    client.get("/weeks")
+    client.get("/months")
+    client.get("/swimlane")
+    # une fois la table couverte, les rendus ne recalculent plus rien
+    monkeypatch.setattr(webhook_receiver, "_calendar_entry", lambda day: pytest.fail(str(day)))
+    for url in ("/weeks", "/months", "/swimlane"):
+        assert client.get(url).status_code == 200
+
+
+def test_weeks_page_renders_the_first_weeks_and_defers_the_rest(tmp_path):
+    csv_path = tmp_path / "webhook.csv"
+    old = date.today() - timedelta(weeks=30)
+    _write_rows(csv_path, [{**ROW, "date": old.strftime("%Y%m%d"), "project": "bht"}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    eager = webhook_receiver.WEEKS_EAGER
+
+    page = client.get("/weeks").get_data(as_text=True)
+    assert page.count('<section class="week">') == eager
+    lazy = re.findall(r'data-src="(/weeks/fragment\?monday=\d{8})"', page)
+    assert len(lazy) == webhook_receiver.BILLABLE_WEEKS_SHOWN - eager
+    assert "IntersectionObserver" in page
+
+    fragment = client.get(lazy[0])
+    assert fragment.mimetype == "text/html"
+    section = fragment.get_data(as_text=True)
+    assert section.startswith('<section class="week">') and section.count("<svg") == 2
+    assert client.get("/weeks/fragment?monday=nope").status_code == 400
+
+    # ?count=all remonte jusqu'à la première ligne ; la légende la connaît déjà
+    everything = client.get("/weeks?count=all").get_data(as_text=True)
+    assert everything.count('<section class="week') == 31
+    assert ">bht</text>" in everything
+    monday = webhook_receiver.current_week_bounds(old)[0].strftime("%Y%m%d")
+    assert f"/weeks/fragment?monday={monday}" in everything
+    assert ">0:25</text>" in client.get(f"/weeks/fragment?monday={monday}").get_data(as_text=True)
+
+
+def test_weeks_and_months_are_streamed_header_first(tmp_path):
+    import gzip
+
+    webhook_receiver.CSV_PATH = str(tmp_path / "webhook.csv")
+    client = webhook_receiver.app.test_client()
+
+    for url in ("/weeks", "/months?n=12"):
+        response = client.get(url, buffered=False)
+        assert response.is_streamed
+        chunks = iter(response.response)
+        first = next(chunks).decode()
+        assert 'class="menubar"' in first and 'week-charts"><svg' not in first
+        rest = b"".join(chunks).decode()
+        assert rest.count("<svg") >= 2 and rest.rstrip().endswith("</html>")
+        response.close()
+
+        packed = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert packed.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(packed.data).decode() == first + rest
+
+
+def test_search_index_matches_accentless_prefixes_and_follows_edits(tmp_path):
+    csv_path = tmp_path / "webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": "20260620", "project": "calipso_iesa", "task": "#42 Réunion"},
+        {**ROW, "date": "20260621", "project": "speasy", "task": "réunion hebdo"},
+        {**ROW, "date": "20260622", "project": "calipso_lees", "task": "revue"},
+    ])
+    store = webhook_receiver.row_store(csv_path)
+    search = lambda **kw: [(r["date"], r["task"]) for r in store.search(**kw)]  # noqa: E731
+
+    assert search(query="REU") == [("20260621", "réunion hebdo"), ("20260620", "#42 Réunion")]
+    assert search(query="reu calip") == [("20260620", "#42 Réunion")]
+    assert search(query="reu", prefix="speasy") == [("20260621", "réunion hebdo")]
+    assert search(since="20260621", until="20260621") == [("20260621", "réunion hebdo")]
+    assert search(query="inconnu") == []
+
+    webhook_receiver.update_csv_row(
+        ("20260622", "09:00", "calipso_lees", "revue"),
+        "calipso_lees", "réunion client", "09:00", "10:00", csv_path,
+    )
+    assert search(query="client") == [("20260622", "réunion client")]
+    assert search(query="revue") == []
+    assert store.search_index.postings.keys() == set(store.search_index.vocabulary)
+
+
+def test_rows_page_and_api_rows_search(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": "20260620", "project": "calipso", "task": "réunion"},
+        {**ROW, "date": "20260621", "project": "speasy", "task": "réunion"},
+        {**ROW, "date": "20260622", "project": "speasy", "task": "code"},
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    page = client.get("/rows?q=reunion&project=speasy").get_data(as_text=True)
+    assert "1 lignes trouvées" in page and 'name="q" placeholder="projet, tâche…" value="reunion"' in page
+    data = client.get("/api/rows?q=reunion&from=2026-06-20&to=2026-06-21").get_json()
+    assert [row["date"] for row in data["rows"]] == ["20260621", "20260620"]
+    assert client.get("/api/rows?q=reunion&n=1").get_json()["rows"][0]["date"] == "20260621"
+
+
+def test_rows_page_walks_the_history_by_cursor(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": f"202606{day:02}", "startTime": start, "task": f"t{day}-{start}"}
+        for day in range(10, 14) for start in ("09:00", "14:00")
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    tasks = lambda page: re.findall(r'name="task" value="([^"]+)"', page)  # noqa: E731
+
+    first = client.get("/rows?n=3").get_data(as_text=True)
+    assert tasks(first) == ["t13-14:00", "t13-09:00", "t12-14:00"]
+    assert '<span class="disabled">← plus récentes</span>' in first
+    assert 'href="?n=3&amp;before=20260612%2C14%3A00%2Ccalipso%2Ct12-14%3A00"' in first
+
+    second = client.get("/rows?n=3&before=20260612,14:00,calipso,t12-14:00").get_data(as_text=True)
+    assert tasks(second) == ["t12-09:00", "t11-14:00", "t11-09:00"]
+    assert 'href="?n=3&amp;after=20260612%2C09%3A00%2Ccalipso%2Ct12-09%3A00"' in second
+
+    last = client.get("/rows?n=3&before=20260611,09:00,calipso,t11-09:00").get_data(as_text=True)
+    assert tasks(last) == ["t10-14:00", "t10-09:00"]
+    assert '<span class="disabled">plus anciennes →</span>' in last
+
+    back = client.get("/rows?n=3&after=20260612,09:00,calipso,t12-09:00").get_data(as_text=True)
+    assert tasks(back) == tasks(first)
+    assert '<span class="disabled">← plus récentes</span>' in back
+
+
+def test_rows_page_cursor_keeps_rows_sharing_a_start_time(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [{**ROW, "date": "20260630", "task": "older"}] + [
+        {**ROW, "project": f"p{i}", "task": "t"} for i in range(3)
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    projects = lambda page: re.findall(r'name="project" value="([^"]+)"', page)  # noqa: E731
+    older = lambda page: re.search(r'href="\?([^"]*before=[^"]*)"', page).group(1).replace("&amp;", "&")  # noqa: E731
+
+    first = client.get("/rows?n=2").get_data(as_text=True)
+    second = client.get(f"/rows?{older(first)}").get_data(as_text=True)
+
+    assert projects(first) == ["p2", "p1"]
+    assert projects(second) == ["p0", "calipso"]
+    newer = re.search(r'href="\?([^"]*after=[^"]*)"', second).group(1).replace("&amp;", "&")
+    assert projects(client.get(f"/rows?{newer}").get_data(as_text=True)) == ["p2", "p1"]
+
+
+def test_aggregate_matches_a_brute_force_count_for_every_bucket_and_group(tmp_path):
+    rows = [
+        {**ROW, "date": f"2026{month:02}{day:02}", "project": project, "task": task,
+         "minutes": str(minutes), "startTime": f"{8 + i}:00"}
+        for i, (month, day, project, task, minutes) in enumerate([
+            (5, 29, "calipso_iesa", "a", 20), (5, 31, "speasy", "b", 50),
+            (6, 1, "calipso_lees", "a", 10), (6, 1, "calipso_lees", "a", 25),
+            (6, 3, "perso", "c", 40), (6, 3, "nan", "d", 30), (6, 14, "speasy", "b", 7),
+        ])
+    ]
+    csv_path = tmp_path / "webhook.csv"
+    _write_rows(csv_path, rows)
+    store = webhook_receiver.row_store(csv_path)
+    first, last = date(2026, 5, 30), date(2026, 6, 14)
+    prefix_of = lambda project: project.split("_")[0]  # noqa: E731
+
+    def brute(bucket, group, metric, quantize):
+        cells = {}
+        for row in rows:
+            day = date(int(row["date"][:4]), int(row["date"][4:6]), int(row["date"][6:]))
+            prefix = row["project"].split("_")[0]
+            counted = (webhook_receiver._row_is_billable(row) if metric == "billable"
+                       else prefix != "nan")
+            if first <= day <= last and counted:
+                key = (day, row["project"], row["task"])
+                cells[key] = cells.get(key, 0) + int(row["minutes"])
+        series = {}
+        for (day, project, task), minutes in cells.items():
+            if quantize:
+                minutes = -(-minutes // 15) * 15
+            period = {"day": day, "week": day - timedelta(days=day.weekday()),
+                      "month": day.replace(day=1)}[bucket].strftime("%Y%m%d")
+            period = period[:6] if bucket == "month" else period
+            name = {"": "", "prefix": prefix_of(project), "project": project,
+                    "task": f"{project}/{task}"}[group]
+            series.setdefault(period, {})
+            series[period][name] = series[period].get(name, 0) + minutes
+        return series
+
+    for bucket in ("day", "week", "month"):
+        for group in ("", "prefix", "project", "task"):
+            for metric in ("billable", "activity"):
+                for quantize in (False, True):
+                    assert store.aggregate(first, last, bucket, group, metric, quantize) == \
+                        brute(bucket, group, metric, quantize), (bucket, group, metric, quantize)
+
+
+def test_api_aggregate_returns_compact_json_and_rejects_bad_params(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": "20260601", "project": "calipso_iesa", "minutes": "20"},
+        {**ROW, "date": "20260609", "project": "speasy", "minutes": "50"},
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    data = client.get(
+        "/api/aggregate?from=2026-06-01&to=20260630&bucket=week&group=prefix&quantize=1"
+    ).get_json()
+    assert data["minutes"] == {"20260601": {"calipso": 30}, "20260608": {"speasy": 60}}
+    assert data["from"] == "20260601" and data["quantize"] is True
+    assert client.get("/api/aggregate?bucket=year").status_code == 400
+    assert client.get("/api/aggregate?from=20260630&to=20260601").status_code == 400
+
+
+def test_api_aggregate_bounds_the_range_to_the_data(tmp_path, monkeypatch):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [{**ROW, "date": "20260601", "project": "calipso_iesa", "minutes": "20"}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    for bucket in ("week", "month"):
+        assert client.get(f"/api/aggregate?from=99991201&to=99991231&bucket={bucket}").status_code == 400
+    assert client.get("/api/aggregate?from=00010101&to=29991231&bucket=week").status_code == 400
+    # une plage large mais admise ne parcourt que les jours du CSV
+    calendar = len(webhook_receiver._CALENDAR)
+    wide = client.get("/api/aggregate?from=20000101&to=20991231&bucket=week").get_json()
+    assert wide["minutes"] == {"20260601": {"": 20}} and wide["from"] == "20000101"
+    assert len(webhook_receiver._CALENDAR) - calendar < 10
+    assert client.get("/api/aggregate?from=20900101&to=20901231&bucket=month").get_json()["minutes"] == {}
+
+
+def test_heatmap_grid_splits_sessions_across_bins_and_midnight():
+    rows = [
+        # lundi 10:45 → 11:15 : 15 min dans la tranche de 10 h, 15 dans celle de 11 h
+        {**ROW, "date": "20260615", "startTime": "10:45", "endTime": "11:15", "minutes": "30"},
+        {**ROW, "date": "20260622", "startTime": "10:50", "endTime": "11:00", "minutes": "10"},
+        # dimanche 23:30 → lundi 00:20
+        {**ROW, "date": "20260621", "startTime": "23:30", "endTime": "00:20", "minutes": "50"},
+        {**ROW, "date": "20260616", "project": "nan", "startTime": "09:00", "endTime": "10:00"},
+    ]
+
+    grid = webhook_receiver.heatmap_grid(rows)
+    assert grid[0][10] == 25 and grid[0][11] == 15
+    assert grid[6][23] == 30 and grid[0][0] == 20
+    assert sum(map(sum, grid)) == 90
+    quarters = webhook_receiver.heatmap_grid(rows, bins=96)
+    assert quarters[0][43] == 25 and quarters[0][44] == 15
+    # minutes aberrantes (bien plus d'une semaine) : la semaine entière, une fois
+    huge = {**ROW, "date": "20260621", "startTime": "23:30", "endTime": "23:30", "minutes": "20000"}
+    assert sum(map(sum, webhook_receiver.heatmap_grid([huge]))) == webhook_receiver.WEEK_MINUTES
+
+
+def test_heatmap_page_filters_by_range_and_project(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [
+        {**ROW, "date": "20260615", "project": "calipso", "startTime": "09:00", "endTime": "10:00"},
+        {**ROW, "date": "20260616", "project": "speasy", "startTime": "14:00", "endTime": "14:30"},
+        {**ROW, "date": "20250101", "project": "speasy", "startTime": "14:00", "endTime": "18:00"},
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    page = client.get("/heatmap?from=20260601&to=20260630").get_data(as_text=True)
+    assert "Lundi 09:00 : 1:00" in page and "Mardi 14:00 : 0:30" in page
+    assert 'class="active">Heatmap' in page
+    svg = client.get("/heatmap.svg?from=20260601&to=20260630&project=speasy").get_data(as_text=True)
+    assert "Mardi 14:00" in svg and "Lundi 09:00" not in svg
+    assert client.get("/heatmap.svg?from=nope").status_code == 400
+    assert client.get("/heatmap?to=00010105").status_code == 400
+    assert client.get("/heatmap.svg?from=18000101&to=20260630").status_code == 400
+
+
+def test_week_charts_draw_one_path_per_color_for_the_whole_chart():
+    days = [("Lundi 01/06", {"calipso": 60}), ("Mardi 02/06", {"calipso": 30, "speasy": 30})]
+    calipso = webhook_receiver.project_color("calipso")
+
+    svg = webhook_receiver.render_activity_week_svg(days, uid="x")
+    assert svg.count(f'fill="{calipso}"') == 1 and svg.count("clipPath id=") == 1
+    billable = webhook_receiver.render_week_svg([("Lundi", 2.0), ("Mardi", 5.0)])
+    assert len(re.findall(r'<path [^>]*fill="#9d9d93"', billable)) == 1
+    assert len(re.findall(r'<path [^>]*fill="#d9a441"', billable)) == 1
+    assert len(re.findall(r'<path d="[^"]*" stroke="#c3c2b7"', billable)) == 1
+
+
+def test_swimlane_reuses_one_track_and_merges_sessions_by_project():
+    sessions = [(9, 10, 60, "calipso"), (11, 11.5, 30, "calipso"), (14, 15, 60, "speasy")]
+    days = [("lun. 01/06", False, sessions), ("dim. 31/05", True, sessions[:1])]
+
+    svg = webhook_receiver.render_swimlane_svg(days)
+    assert svg.count('<use href="#swl-track"') == 2
+    assert svg.count(f'fill="{webhook_receiver.project_color("calipso")}"') == 1
+    assert ">60m</text>" in svg and "<rect x=" not in svg.split("</defs>", 1)[1]
+    assert webhook_receiver._num(12.345) == "12.3" and webhook_receiver._num(-0.01) == "0"
+
+
+def test_swimlane_hour_buckets_sum_each_project_per_hour():
+    sessions = [(9.5, 10.25, 45, "calipso"), (10.5, 10.75, 15, "calipso"), (10.25, 10.5, 15, "speasy")]
+
+    summary = webhook_receiver.swimlane_hour_buckets(sessions)
+    assert [(start, round(end, 2), minutes, prefix) for start, end, minutes, prefix in summary] == [
+        (9, 9.5, 30, "calipso"), (10, 10.5, 30, "calipso"), (10.5, 10.75, 15, "speasy"),
+    ]
+
+
+def test_swimlane_spans_a_year_at_bounded_height_without_minute_labels(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    today = date.today()
+    _write_rows(csv_path, [
+        {**ROW, "date": (today - timedelta(days=i)).strftime("%Y%m%d"),
+         "startTime": "09:00", "endTime": "10:00", "minutes": "60"}
+        for i in range(0, 365, 3)
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    detailed = client.get("/swimlane?d=30").get_data(as_text=True)
+    assert ">60m</text>" in detailed and 'swimlane?d=365">365 j</a>' in detailed
+    year = client.get("/swimlane?d=365").get_data(as_text=True)
+    height = int(re.search(r'<svg [^>]*height="(\d+)"', year).group(1))
+    assert height <= webhook_receiver.SWIMLANE_MAX_HEIGHT + 70
+    assert ">60m</text>" not in year and "365 jours" in year
+
+    store = webhook_receiver.row_store()
+    assert store.lane(today.strftime("%Y%m%d"), summary=True) == [(9, 10, 60, "calipso")]
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": today.strftime("%Y%m%d"), "startTime": "14:00", "endTime": "14:30", "minutes": 30},
+        str(csv_path),
+    )
+    assert len(webhook_receiver.row_store().lane(today.strftime("%Y%m%d"))) == 2
+
+
+def test_swimlane_blocks_merge_sessions_across_short_breaks(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    day = date.today().strftime("%Y%m%d")
+    _write_rows(csv_path, [
+        {**ROW, "date": day, "startTime": "09:00", "endTime": "09:25", "minutes": "25"},
+        {**ROW, "date": day, "startTime": "09:30", "endTime": "09:55", "minutes": "25",
+         "project": "SPEASY"},
+        {**ROW, "date": day, "startTime": "10:00", "endTime": "10:25", "minutes": "25"},
+        {**ROW, "date": day, "startTime": "14:00", "endTime": "14:25", "minutes": "25"},
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+
+    days = webhook_receiver.swimlane_days(webhook_receiver.row_store(), date.today(), n=1, blocks=True)
+    assert days[0][2] == [(9, 10 + 25 / 60, 75, "calipso"), (14, 14 + 25 / 60, 25, "calipso")]
+
+    html = webhook_receiver.app.test_client().get("/swimlane?d=10&blocks=1").get_data(as_text=True)
+    assert 'swimlane?d=11&blocks=1">+1 jour</a>' in html
+    assert 'swimlane?d=10">sessions</a>' in html and ">75m</text>" in html
+
+
+def test_rolling_stats_follow_day_updates_and_the_calendar():
+    import random
+
+    rng = random.Random(3)
+    stats = webhook_receiver.RollingStats(weeks=4)
+    totals = {}
+
+    def brute(today):
+        window = [totals.get(today - timedelta(days=i), (0, 0, 0)) for i in range(28)]
+        month = [v for d, v in totals.items() if webhook_receiver.month_start(today) <= d <= today]
+        remaining = (webhook_receiver.month_start(today, -1) - today).days - 1
+        billable_month = sum(v[0] for v in month)
+        return {
+            "billable_avg_week": round(sum(v[0] for v in window) / 60 / 4, 2),
+            "activity_avg_week": round(sum(v[2] for v in window) / 60 / 4, 2),
+            "billable_month": round(billable_month / 60, 2),
+            "billable_projection": round(
+                (billable_month + sum(v[0] for v in window) / 28 * remaining) / 60, 2),
+        }
+
+    today = date(2026, 5, 20)
+    for _ in range(200):
+        day = today - timedelta(days=rng.randrange(-3, 60))
+        totals[day] = (rng.randrange(0, 300), 0, rng.randrange(0, 600))
+        stats.set_day(day, totals[day])
+        if rng.random() < 0.3:
+            today += timedelta(days=rng.randrange(1, 4))
+        assert stats.snapshot(today) == brute(today)
+    assert stats.snapshot(today + timedelta(days=90)) == brute(today + timedelta(days=90))
+
+
+def test_api_rows_and_live_report_rolling_stats(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    today = date.today()
+    _write_rows(csv_path, [
+        {**ROW, "date": (today - timedelta(days=i)).strftime("%Y%m%d"),
+         "startTime": "09:00", "endTime": "11:00", "minutes": "120"}
+        for i in range(0, 40, 7)
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    stats = client.get("/api/rows").get_json()["stats"]
+    assert stats["activity_avg_week"] == 2.0  # 4 × 2 h sur 4 semaines
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": today.strftime("%Y%m%d"), "startTime": "14:00", "endTime": "15:00", "minutes": 60},
+        str(csv_path),
+    )
+    assert client.get("/api/rows").get_json()["stats"]["activity_avg_week"] == 2.25
+    assert 'id="activity-avg-week">2:15</strong>' in client.get("/live").get_data(as_text=True)
+
+
+def test_api_import_adds_only_unknown_days_in_one_write(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [ROW])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+    backfill = {"project": "calipso_iesa", "task": "revue", "minutes": 60, "startTime": "", "endTime": ""}
+
+    res = client.post("/api/import", json={"rows": [
+        {**backfill, "date": "20260701"},  # jour connu : ignoré
+        {**backfill, "date": "20260630"},
+        {**backfill, "date": "20260630", "task": "autre"},
+    ]})
+
+    assert res.get_json() == {"mode": "missing", "rows": 2, "days": ["20260630"], "skipped": ["20260701"]}
+    rows = read_rows(csv_path)
+    assert [(r["date"], r["task"]) for r in rows] == [
+        ("20260630", "autre"), ("20260630", "revue"), ("20260701", "vieux nom"),
+    ]
+    assert webhook_receiver.row_store().by_day["20260630"][0]["minutes"] == "60"
+
+
+def test_api_import_replaces_whole_days_and_rejects_bad_rows(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    _write_rows(csv_path, [ROW, {**ROW, "date": "20260702"}, {**ROW, "date": "20260703"}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    client = webhook_receiver.app.test_client()
+
+    res = client.post("/api/import", json={
+        "mode": "replace", "days": ["20260703"],
+        "rows": [{**ROW, "task": "nouveau", "startTime": "10:00", "endTime": "10:25"}],
+    })
+    assert res.get_json()["days"] == ["20260701", "20260703"]
+    assert [(r["date"], r["task"]) for r in read_rows(csv_path)] == [
+        ("20260701", "nouveau"), ("20260702", "vieux nom"),
+    ]
+
+    before = csv_path.read_bytes()
+    for payload in ({"rows": [{**ROW, "date": "2026-07-01"}]},
+                    {"rows": [{**ROW, "minutes": "x"}]},
+                    {"rows": [{**ROW, "minutes": "-25"}]},
+                    {"rows": [{**ROW, "minutes": "20000"}]},
+                    {"rows": [{**ROW, "date": "01010101"}]},
+                    {"rows": [ROW], "mode": "append"},
+                    {"rows": "pas une liste"}):
+        assert client.post("/api/import", json=payload).status_code == 400
+    assert csv_path.read_bytes() == before
+
+
+def test_export_site_renders_closed_weeks_and_only_rewrites_changed_ones(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    monday, _ = webhook_receiver.current_week_bounds()
+    old, last = monday - timedelta(weeks=2), monday - timedelta(weeks=1)
+    _write_rows(csv_path, [
+        {**ROW, "date": day.strftime("%Y%m%d")} for day in (old, last, monday)
+    ])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    out = tmp_path / "site"
+
+    assert webhook_receiver.export_site(str(out)) == (2, 0)
+    key = last.strftime("%Y%m%d")
+    root = out / webhook_receiver.SECRET
+    assert not list(root.glob(f"*/{monday.strftime('%Y%m%d')}*"))  # semaine en cours
+    client = webhook_receiver.app.test_client()
+    prefix = f"/{webhook_receiver.SECRET}" if webhook_receiver.SECRET else ""
+    for path, url, q in webhook_receiver._export_files(key):
+        client.set_cookie("round", q)
+        assert (root / path).read_bytes() == client.get(prefix + url).get_data()
+
+    assert webhook_receiver.export_site(str(out)) == (0, 2)
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": key, "startTime": "14:00", "endTime": "15:00", "minutes": 60}, str(csv_path),
+    )
+    assert webhook_receiver.export_site(str(out)) == (1, 1)
+
+
+def test_editing_a_closed_week_withdraws_its_exported_files(tmp_path, monkeypatch):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    monday, _ = webhook_receiver.current_week_bounds()
+    key = (monday - timedelta(weeks=1)).strftime("%Y%m%d")
+    _write_rows(csv_path, [{**ROW, "date": key}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    monkeypatch.setattr(webhook_receiver, "EXPORT_SITE_DIR", str(tmp_path / "site"))
+    root = tmp_path / "site" / webhook_receiver.SECRET
+    assert webhook_receiver.export_site() == (1, 0)
+
+    edit = lambda task: webhook_receiver.update_csv_row(  # noqa: E731
+        (key, ROW["startTime"], ROW["project"], read_rows(csv_path)[0]["task"]),
+        ROW["project"], task, ROW["startTime"], ROW["endTime"],
+    )
+    edit("renommée")
+    assert not list(root.glob(f"*/{key}*")) and not list(root.glob(f"*/*/{key}*"))
+    # revenue à son contenu exporté, la semaine est tout de même réécrite
+    edit(ROW["task"])
+    assert webhook_receiver.export_site() == (1, 0)
+    assert (root / f"weeks/fragment/{key}.q0.html").exists()
+
+
+def test_live_past_week_charts_use_stable_monday_urls(tmp_path):
+    webhook_receiver.CSV_PATH = str(tmp_path / "pomofocus_webhook.csv")
+    client = webhook_receiver.app.test_client()
+    monday, _ = webhook_receiver.current_week_bounds()
+    key = (monday - timedelta(weeks=2)).strftime("%Y%m%d")
+
+    page = client.get("/live?w=2").get_data(as_text=True)
+    assert f"/billable-week.svg?w=2&monday={key}" in page
+    assert client.get(f"/activity-week.svg?monday={key}").get_data() == \
+        client.get("/activity-week.svg?w=2").get_data()
+
+
+def test_prerender_warms_live_charts_and_pages_until_the_next_write(tmp_path):
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    today = date.today().strftime("%Y%m%d")
+    _write_rows(csv_path, [{**ROW, "date": today}])
+    webhook_receiver.CSV_PATH = str(csv_path)
+    webhook_receiver.CURRENT_TASK = None
+    client = webhook_receiver.app.test_client()
+
+    webhook_receiver.prerender()
+    hits = webhook_receiver.METRICS["prerender_hits"]
+    for url in webhook_receiver.PRERENDER_URLS:
+        assert client.get(url).status_code == 200
+    months = client.get("/months").get_data(as_text=True)
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + len(webhook_receiver.PRERENDER_URLS) + 1
+    assert "<svg" in months
+
+    # une écriture périme le cache : la réponse suivante est recalculée
+    webhook_receiver.upsert_csv_row(
+        {**ROW, "date": today, "startTime": "14:00", "endTime": "15:00", "minutes": 60}, str(csv_path),
+    )
+    stats = client.get("/api/rows?w=0").get_json()["stats"]
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + len(webhook_receiver.PRERENDER_URLS) + 1
+    assert stats["activity_avg_week"] == round(85 / 60 / 4, 2)
+    # …puis gardée pour les polls suivants
+    assert client.get("/api/rows?w=0").get_json()["stats"] == stats
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + len(webhook_receiver.PRERENDER_URLS) + 2
+    assert client.get("/api/rows?w=0&q=x").status_code == 200  # recherche : jamais en cache
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + len(webhook_receiver.PRERENDER_URLS) + 2
+
+
+def test_prerendered_amounts_follow_a_projects_config_edit(tmp_path, monkeypatch):
+    import os
+
+    projects = tmp_path / "projects-config.yml"
+    config = tmp_path / "config.yml"
+    projects.write_text("calipso:\n  pom_project: calipso\n  tjm: 800\n  derniere_facture: 20200101\n")
+    config.write_text("BILLABLE_PROJECTS: [calipso]\n")
+    tenant = webhook_receiver.Tenant("t-s3cret", data_dir=str(tmp_path),
+                                     projects_path=str(projects), config_path=str(config))
+    monkeypatch.setattr(webhook_receiver, "TENANTS", {"t-s3cret": tenant})
+    _write_rows(tenant.csv_path, [{**ROW, "minutes": "480", "endTime": "17:00"}])
+    client = webhook_receiver.app.test_client()
+
+    webhook_receiver.prerender(tenant)
+    hits = webhook_receiver.METRICS["prerender_hits"]
+    assert client.get("/t-s3cret/api/rows?w=0").get_json()["billable_total"] == "800\u202f€"
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + 1
+
+    projects.write_text(projects.read_text().replace("800", "600"))
+    os.utime(projects, ns=(10**18, 10**18))  # mtime distinct même sur un FS grossier
+    assert client.get("/t-s3cret/api/rows?w=0").get_json()["billable_total"] == "600\u202f€"
+    assert webhook_receiver.METRICS["prerender_hits"] == hits + 1
+
+
+def test_background_prerender_keeps_up_with_writes(tmp_path, monkeypatch):
+    import time
+
+    csv_path = tmp_path / "pomofocus_webhook.csv"
+    today = date.today().strftime("%Y%m%d")
+    webhook_receiver.CSV_PATH = str(csv_path)
+    webhook_receiver.CURRENT_TASK = None
+    monkeypatch.setattr(webhook_receiver, "PRERENDER", True)
+    started, renders, errors = [], [], []
+    real = webhook_receiver.prerender
+
+    def prerender(tenant=None):
+        started.append(tenant)
+        try:
+            real(tenant)
+        except Exception as exc:
+            errors.append(exc)
+        renders.append(tenant)
+
+    monkeypatch.setattr(webhook_receiver, "prerender", prerender)
+    for hour in range(8, 14):
+        webhook_receiver.upsert_csv_row(
+            {**ROW, "date": today, "startTime": f"{hour:02}:00", "endTime": f"{hour:02}:25"}, str(csv_path),
+        )
+    state = webhook_receiver._PRERENDER
+    busy = lambda: state["tenants"] or state["wake"].is_set() or len(renders) < max(1, len(started))  # noqa: E731
+    deadline, idle = time.monotonic() + 10, 0
+    while idle < 5 and time.monotonic() < deadline:  # au repos plusieurs fois de suite
+        idle = 0 if busy() else idle + 1
+        time.sleep(0.02)
+
+    assert renders and not errors
+    hits = webhook_receiver.METRICS["prerender_hits"]
+    rows = webhook_receiver.app.test_client().get("/api/rows?w=0").get_json()["rows"]
+    assert len(rows) == 6 and webhook_receiver.METRICS["prerender_hits"] == hits + 1
+
+
+def test_tenants_keep_their_own_csv_current_task_and_billing(tmp_path, monkeypatch):
+    webhook_receiver.CSV_PATH = str(tmp_path / "default.csv")
+    webhook_receiver.LOG_PATH = str(tmp_path / "default.jsonl")
+    webhook_receiver.CURRENT_TASK = None
+    bob_config = tmp_path / "bob-config.yml"
+    bob_config.write_text("BILLABLE_PROJECTS: [perso]\n")
+    tenants = {
+        "alice-s3cret": webhook_receiver.Tenant("alice-s3cret", data_dir=str(tmp_path / "alice")),
+        "bob-s3cret": webhook_receiver.Tenant(
+            "bob-s3cret", data_dir=str(tmp_path / "bob"), config_path=str(bob_config),
+        ),
+    }
+    monkeypatch.setattr(webhook_receiver, "TENANTS", tenants)
+    monkeypatch.setattr(webhook_receiver, "SECRET", "s3cret")  # le locataire par défaut
+    client = webhook_receiver.app.test_client()
+
+    assert client.post("/alice-s3cret", json=FINISH).status_code == 200
+    assert client.post("/bob-s3cret", json={**FINISH, "project": "perso"}).status_code == 200
+    assert client.post("/bob-s3cret", json={**FINISH, "project": "calipso", "session_start": 1711965000000,
+                                            "session_end": 1711966500000}).status_code == 200
+    assert client.post("/bob-s3cret", json={**FINISH, "type": "start", "project": "perso"}).status_code == 200
+    assert client.post("/nobody", json=FINISH).status_code == 404
+
+    assert [r["project"] for r in read_rows(tmp_path / "alice" / "pomofocus_webhook.csv")] == ["calipso"]
+    assert [r["project"] for r in read_rows(tmp_path / "bob" / "pomofocus_webhook.csv")] == ["perso", "calipso"]
+    assert not (tmp_path / "default.csv").exists()
+    assert (tmp_path / "bob" / "webhook_log.jsonl").read_text().count("\n") == 3
+    assert tenants["bob-s3cret"].current_task["project"] == "perso"
+    assert tenants["alice-s3cret"].current_task is None and webhook_receiver.CURRENT_TASK is None
+
+    # facturable selon le config.yml de chaque locataire : perso pour bob, pas calipso
+    day = "20240401"
+    alice = client.get(f"/alice-s3cret/api/aggregate?from={day}&to={day}").get_json()["minutes"]
+    bob = client.get(f"/bob-s3cret/api/aggregate?from={day}&to={day}").get_json()["minutes"]
+    assert alice == {day: {"": 25}} and bob == {day: {"": 25}}
+    assert webhook_receiver.current_tenant() is webhook_receiver.DEFAULT_TENANT  # hors requête
+
+
+def test_billable_projects_follow_config_edits_without_restart(tmp_path, monkeypatch):
+    import os
+
+    config = tmp_path / "config.yml"
+    config.write_text("BILLABLE_PROJECTS: [calipso]\n")
+    tenant = webhook_receiver.Tenant("t-s3cret", data_dir=str(tmp_path), config_path=str(config))
+    monkeypatch.setattr(webhook_receiver, "TENANTS", {"t-s3cret": tenant})
+    _write_rows(tenant.csv_path, [ROW, {**ROW, "project": "perso", "startTime": "10:00"}])
+    client = webhook_receiver.app.test_client()
+    day = ROW["date"]
+    url = f"/t-s3cret/api/aggregate?from={day}&to={day}&bucket=week"
+
+    assert client.get(url).get_json()["minutes"] == {"20260629": {"": 25}}
+    config.write_text("BILLABLE_PROJECTS: [calipso, perso]\n")
+    os.utime(config, ns=(10**18, 10**18))  # mtime distinct même sur un FS grossier
+
+    assert tenant.billable == {"calipso", "perso"}
+    assert client.get(url).get_json()["minutes"] == {"20260629": {"": 50}}
+
+
+def test_row_stores_are_evicted_least_recently_used_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(webhook_receiver, "STORES_MAX", 2)
+    paths = []
+    for name in "abc":
+        paths.append(tmp_path / f"{name}.csv")
+        _write_rows(paths[-1], [ROW])
+    a = webhook_receiver.row_store(paths[0])
+    webhook_receiver.row_store(paths[1])
+    assert webhook_receiver.row_store(paths[0]) is a  # a redevient le plus récent
+    webhook_receiver.row_store(paths[2])              # évince b
+    assert str(paths[1]) not in webhook_receiver._STORES
+    assert webhook_receiver.row_store(paths[0]) is a
@@ -14,18 +14,43 @@ Then configure Pomofocus with:
 Set WEBHOOK_SECRET to use an unguessable path:
     WEBHOOK_SECRET=my-secret python webhook_receiver.py
     https://xxxxx.trycloudflare.com/my-secret
+
+Several users share one instance through TENANTS in config.yml: one secret
+path per user, each with its own CSV, log and billing config.
 """
+import atexit
 import csv
+import functools
+import gzip
 import hashlib
 import html
+import io
 import json
+import math
 import os
-from datetime import datetime, timedelta, timezone
-from urllib.parse import quote
+import re
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from itertools import accumulate, islice
+from urllib.parse import quote, urlencode
+
+from flask import (
+    Flask, Response, g, has_request_context, jsonify, redirect, request, stream_with_context,
+)
 
-from flask import Flask, Response, jsonify, redirect, request
+from config import config_filepath, load_config, project_registry, projects_filepath
+from core.blocks import DEFAULT_GAP_MINUTES, main_project, work_blocks
 
-from config import load_config, load_projects
+try:  # brotli est optionnel : sans lui, gzip seul (stdlib)
+    import brotli
+except ImportError:
+    brotli = None
 
 _config = load_config()
 DATA_DIR = _config["DATA_DIR"]
@@ -37,19 +62,35 @@ CSV_PATH = os.environ.get(
 CSV_COLUMNS = ["date", "project", "task", "minutes", "startTime", "endTime"]
 EXPORT_TYPES = {"finish", "pause"}
 SECRET = os.environ.get("WEBHOOK_SECRET", "").strip("/")
+# export statique des semaines closes, servi par nginx (cf. export_site)
+EXPORT_SITE_DIR = os.path.join(DATA_DIR, "site")
+# au plus STORES_MAX CSV gardés en mémoire (un par locataire actif, cf. row_store)
+STORES_MAX = int(_config.get("STORES_MAX", 8))
+# pré-rendu des pages chaudes après chaque écriture (cf. schedule_prerender) ;
+# WEBHOOK_PRERENDER=0 le coupe
+PRERENDER = os.environ.get("WEBHOOK_PRERENDER", "1") != "0"
 PORT = int(os.environ.get("WEBHOOK_PORT", "5000"))
 APP_VERSION = "0.14.0"  # affiché en pied de page (miroir de pyproject.toml)
 
-BILLABLE_PROJECTS = {p.lower() for p in _config.get("BILLABLE_PROJECTS", [])}
 BILLABLE_MAX_HOURS = 4
 BILLABLE_WEEKS_SHOWN = 12  # /weeks : nombre de semaines les plus récentes affichées
 HOURS_PER_DAY = 8  # un jour facturé = 8 h, comme core.data.duration_d
 
 # /months : une ligne par semaine, N semaines par page (?n=), pagination par ?p=.
 # 200 semaines de recul maximum : les données commencent en sept. 2022, soit 201
-# semaines avant juillet 2026 — la page p=3 (n=60) les atteint.
+# semaines avant juillet 2026 — la page p=3 (n=60) les atteint. Au-delà, la
+# pagination suit l'historique réel (semaines agrégées, cf. RowStore.weekly), et
+# ?n=all montre tout d'un coup.
 MONTH_WEEKS_SHOWN, MONTH_MIN_WEEKS, MONTH_MAX_WEEKS = 60, 2, 200
 
+# /years : une ligne par mois, N mois par page (?m=, ?m=all), pagination par ?p=.
+# La barre facturable se mesure à l'objectif mensuel (IDEAS.md, 2026-07-06).
+YEARS_MONTHS_SHOWN, YEARS_MIN_MONTHS, YEARS_MAX_MONTHS = 36, 2, 240
+MONTHLY_TARGET_HOURS = int(_config.get("MONTHLY_TARGET_HOURS", 80))
+# Décimales des coordonnées SVG : 1 suffit à l'œil (pas de 0,1 px), 0 allège
+# encore les grandes pages (/months?n=all, /swimlane?d=60).
+SVG_PRECISION = int(_config.get("SVG_PRECISION", 1))
+
 _FR_WEEKDAYS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
 _FR_MONTHS = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
               "août", "septembre", "octobre", "novembre", "décembre"]
@@ -68,11 +109,461 @@ _CHEVRON_RIGHT = (
 
 app = Flask(__name__)
 
-# Tâche en cours (trame "start" pas encore suivie de "pause"/"finish").
-# Process gunicorn à un seul worker (-w 1) : pas de souci de cohérence entre workers.
+# Tâche en cours (trame "start" pas encore suivie de "pause"/"finish") du
+# locataire par défaut. Process gunicorn à un seul worker (-w 1) : pas de souci
+# de cohérence entre workers.
 CURRENT_TASK = None
 
 
+# ── Locataires (plusieurs utilisateurs sur une instance) ──────────────────────
+# Chaque chemin secret déclaré sous TENANTS (config.yml) est un locataire : son
+# dossier de données (CSV, journal, export statique), sa config de facturation
+# (projects-config.yml et config.yml propres, facultatifs) et sa tâche en cours.
+# Tout le reste en découle : les RowStore sont indexés par chemin de CSV (LRU
+# borné, cf. row_store), les caches de pré-rendu par secret. Sans TENANTS, seul
+# le locataire par défaut existe — WEBHOOK_SECRET, CSV_PATH, comme avant.
+class Tenant:
+    """Un utilisateur du récepteur, repéré par son chemin secret."""
+
+    def __init__(self, secret, data_dir=None, projects_path=None, config_path=None):
+        self._secret = secret
+        self.data_dir = data_dir
+        self.projects_path = projects_path or projects_filepath
+        self.config_path = config_path
+        self.current_task = None
+
+    @property
+    def secret(self):
+        return self._secret
+
+    @property
+    def csv_path(self):
+        return os.path.join(self.data_dir, "pomofocus_webhook.csv")
+
+    @property
+    def log_path(self):
+        return os.path.join(self.data_dir, "webhook_log.jsonl")
+
+    def registry(self):
+        """ProjectRegistry du locataire (couleurs, tarifs), recompilé à chaque
+        modification de ses fichiers."""
+        return project_registry(self.projects_path, self.config_path or config_filepath)
+
+    @property
+    def billable(self):
+        """Projets facturables (préfixes en minuscules) : BILLABLE_PROJECTS du
+        config.yml du locataire, sinon de celui de l'instance — relus quand le
+        fichier change."""
+        return self.registry().billable_names
+
+
+class _DefaultTenant(Tenant):
+    """Le locataire de WEBHOOK_SECRET : ses réglages restent les globales du
+    module (SECRET, CSV_PATH, LOG_PATH, CURRENT_TASK), lues à chaque accès."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    secret = property(lambda self: SECRET)
+    csv_path = property(lambda self: CSV_PATH)
+    log_path = property(lambda self: LOG_PATH)
+
+    def registry(self):
+        return project_registry()
+
+    @property
+    def current_task(self):
+        return CURRENT_TASK
+
+    @current_task.setter
+    def current_task(self, task):
+        global CURRENT_TASK
+        CURRENT_TASK = task
+
+
+DEFAULT_TENANT = _DefaultTenant()
+TENANTS = {
+    str(secret).strip("/"): Tenant(
+        str(secret).strip("/"),
+        data_dir=settings.get("DATA_DIR") or os.path.join(DATA_DIR, str(secret).strip("/")),
+        projects_path=settings.get("PROJECTS_CONFIG"),
+        config_path=settings.get("CONFIG"),
+    )
+    for secret, settings in (_config.get("TENANTS") or {}).items()
+}
+
+
+def current_tenant():
+    """Locataire de la requête en cours (cf. enter_tenant), sinon celui par défaut."""
+    if has_request_context():
+        return g.get("tenant") or DEFAULT_TENANT
+    return DEFAULT_TENANT
+
+
+def enter_tenant(secret_path):
+    """Retient pour la requête le locataire du chemin secret `secret_path` ;
+    False si aucun ne lui correspond (la route répond alors 404)."""
+    secret = secret_path.strip("/")
+    tenant = TENANTS.get(secret)
+    if tenant is None:
+        if SECRET and secret != SECRET:
+            return False
+        tenant = DEFAULT_TENANT
+    g.tenant = tenant
+    return True
+
+
+def all_tenants():
+    return [DEFAULT_TENANT, *TENANTS.values()]
+
+
+# ── Instrumentation (Server-Timing, /metrics) ─────────────────────────────────
+# Compteurs et histogrammes en mémoire du process, exposés au format texte de
+# Prometheus par /metrics. Pas de prometheus_client : l'image reste Flask seul.
+# Un seul worker (-w 1), donc une seule série par métrique, sans agrégation.
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Histogram:
+    """Histogramme cumulatif à bornes fixes (METRIC_BUCKETS), à la Prometheus."""
+
+    def __init__(self):
+        self.counts = [0] * len(METRIC_BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(METRIC_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += seconds
+
+
+METRICS = {
+    "events_received": 0,   # requêtes reçues par le hook, quel que soit le contenu
+    "events_ingested": 0,   # trames pause/finish écrites dans le CSV
+    "duplicates_skipped": 0,  # trames déjà écrites, ignorées sans I/O CSV
+    "prerender_hits": 0,    # pages servies depuis le pré-rendu (cf. prerender)
+    "rejected": {},         # {raison: nb} — mauvais secret, etc.
+    "csv_rows": 0,          # lignes du CSV au dernier accès disque
+    "last_write_seconds": 0.0,
+    "stages": {},           # {étape: _Histogram} — lecture CSV, agrégations, rendus
+    "requests": {},         # {endpoint: _Histogram}
+}
+
+
+def _observe(table, name, seconds):
+    METRICS[table].setdefault(name, _Histogram()).observe(seconds)
+
+
+def timed(stage):
+    """Décorateur : chronomètre `stage` dans l'histogramme des étapes et, pendant
+    une requête, dans son en-tête Server-Timing (cumul si l'étape se répète)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _observe("stages", stage, elapsed)
+                if has_request_context():
+                    timings = g.setdefault("timings", {})
+                    dur, count = timings.get(stage, (0.0, 0))
+                    timings[stage] = (dur + elapsed, count + 1)
+        return wrapper
+    return decorate
+
+
+def _reject(reason="secret"):
+    """404 « not found » compté dans les rejets de /metrics."""
+    METRICS["rejected"][reason] = METRICS["rejected"].get(reason, 0) + 1
+    return "not found\n", 404
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _add_server_timing(response):
+    """En-tête Server-Timing (étapes chronométrées + total), visible dans l'onglet
+    Réseau du navigateur, et latence de la requête dans /metrics."""
+    start = g.get("request_start")
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    _observe("requests", request.endpoint or "unknown", total)
+    entries = [
+        f'{stage};dur={dur * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (dur, count) in g.get("timings", {}).items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+# ── Compression des réponses ─────────────────────────────────────────────────
+# Le HTML de /weeks et /months et les SVG sont verbeux et très répétitifs (×10 à
+# ×20 en gzip). Le récepteur négocie lui-même br/gzip, nginx ne faisant que
+# relayer. Les octets compressés sont mis en cache par empreinte du contenu :
+# une page ou un SVG rendu à l'identique (cas de /live, repoll toutes les 3 s)
+# n'est compressé qu'une fois.
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_MIMETYPES = {"text/html", "image/svg+xml", "application/json", "text/csv", "text/plain"}
+COMPRESS_CACHE_SIZE = 64
+_COMPRESSED = OrderedDict()  # {(sha1 du corps, encodage): octets compressés}
+
+
+def _negotiate_encoding(accept_encodings):
+    """'br', 'gzip' ou None selon l'en-tête Accept-Encoding (qualités comprises)."""
+    if brotli is not None and accept_encodings["br"] > 0:
+        return "br"
+    if accept_encodings["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+@timed("compress")
+def compress_body(body, encoding):
+    """Corps compressé en `encoding`, depuis le cache quand le contenu est connu."""
+    key = (hashlib.sha1(body).digest(), encoding)
+    if key in _COMPRESSED:
+        _COMPRESSED.move_to_end(key)
+        return _COMPRESSED[key]
+    if encoding == "br":
+        data = brotli.compress(body, quality=5)
+    else:
+        data = gzip.compress(body, compresslevel=6)
+    _COMPRESSED[key] = data
+    while len(_COMPRESSED) > COMPRESS_CACHE_SIZE:
+        _COMPRESSED.popitem(last=False)
+    return data
+
+
+@app.after_request
+def _compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate_encoding(request.accept_encodings)
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress_body(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# Pages envoyées en flux (/weeks, /months) : le navigateur peint l'en-tête et
+# le menu pendant que le reste se calcule. La compression suit le flux — un
+# vidage Z_SYNC_FLUSH dès le premier morceau, puis tous les STREAM_FLUSH_BYTES,
+# pour ne pas sacrifier le taux de compression à des morceaux minuscules.
+STREAM_FLUSH_BYTES = 16 * 1024
+_STREAM_MARK = "\x00"  # repère de découpe d'un gabarit HTML autour du contenu
+
+
+def template_parts(template, **fields):
+    """(début, fin) du gabarit `template` rempli, coupé à l'emplacement du seul
+    champ absent de `fields` — celui que le flux va produire."""
+    field = next(
+        name for name in re.findall(r"(?<!{){(\w+)}(?!})", template) if name not in fields
+    )
+    head, tail = template.format(**fields, **{field: _STREAM_MARK}).split(_STREAM_MARK)
+    return head, tail
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor()
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+        compress, finish = compressor.compress, compressor.flush
+        flush = functools.partial(compressor.flush, zlib.Z_SYNC_FLUSH)
+    pending = None  # octets bruts depuis le dernier vidage ; None : aucun vidage
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        out = compress(data)
+        pending = len(data) if pending is None else pending + len(data)
+        if pending >= STREAM_FLUSH_BYTES or pending == len(data):
+            out += flush()
+            pending = 0
+        if out:
+            yield out
+    yield finish()
+
+
+def stream_page(chunks, mimetype="text/html"):
+    """Réponse en flux des morceaux (str) du générateur `chunks`, compressée
+    selon Accept-Encoding. Server-Timing n'y couvre que ce qui précède le
+    premier octet. X-Accel-Buffering coupe le tampon de proxy_buffering de nginx,
+    qui sinon retiendrait le premier morceau jusqu'à remplir ses buffers."""
+    encoding = _negotiate_encoding(request.accept_encodings)
+    if encoding is not None:
+        chunks = _compress_stream(chunks, encoding)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+    response.headers["X-Accel-Buffering"] = "no"
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# ── Limitation de débit et délestage des pages de consultation ───────────────
+# Un seul worker synchrone : un onglet emballé ou un robot sur /months?n=200
+# retarderait le webhook Pomofocus, la seule requête qu'on ne doit jamais perdre.
+# Les pages en lecture seule passent donc par un seau à jetons par IP client
+# (X-Real-IP posé par nginx, cf. _client_ip) et sont délestées en 503 quand la file
+# d'attente sature. Les POST d'ingestion et d'édition ne sont jamais freinés.
+RATE_LIMIT_PER_SECOND = 5.0
+RATE_LIMIT_BURST = 40
+# coût en jetons des pages lourdes ; les autres coûtent 1 (/live repoll 4
+# requêtes toutes les 3 s, bien sous le débit)
+RATE_LIMIT_COSTS = {
+    "weeks": 3, "months": 5, "years": 3, "swimlane": 3, "heatmap": 2, "heatmap_svg": 2, "rows_page": 2,
+}
+DASHBOARD_ENDPOINTS = {
+    "live", "weeks", "weeks_fragment", "months", "years", "swimlane", "heatmap", "heatmap_svg",
+    "rows_page", "projects_page",
+    "billable_svg", "billable_week_svg", "activity_svg", "activity_week_svg",
+    "activity_legend_svg", "billable_months_svg", "activity_months_svg",
+    "api_rows", "api_aggregate", "csv_export",
+}
+# Saturation : trop de rendus simultanés (worker à threads) ou, en worker
+# synchrone, une requête restée trop longtemps dans la file de nginx — mesurée
+# par l'en-tête X-Request-Start qu'il pose (cf. nginx/nginx.conf).
+RENDER_MAX_INFLIGHT = 4
+RENDER_MAX_QUEUE_SECONDS = 2.0
+SHED_RETRY_AFTER = 5
+_RATE_BUCKETS = {}  # {ip: (jetons, instant de la dernière mise à jour)}
+_RENDERS = {"inflight": 0}
+
+
+def _client_ip(req):
+    """IP du client telle que nginx l'a vue : X-Real-IP, sinon le dernier
+    maillon de X-Forwarded-For (celui qu'ajoute nginx — les précédents viennent
+    du client, libre d'en changer à chaque requête), sinon la socket."""
+    real = req.headers.get("X-Real-IP", "").strip()
+    if real:
+        return real
+    forwarded = req.headers.get("X-Forwarded-For", "")
+    return forwarded.split(",")[-1].strip() or req.remote_addr or "?"
+
+
+def take_tokens(key, cost=1, now=None):
+    """Débite `cost` jetons du seau de `key`. Rend 0 si accepté, sinon le délai
+    (s) avant que le seau n'en contienne assez."""
+    if now is None:
+        now = time.monotonic()
+    tokens, last = _RATE_BUCKETS.get(key, (RATE_LIMIT_BURST, now))
+    tokens = min(RATE_LIMIT_BURST, tokens + (now - last) * RATE_LIMIT_PER_SECOND)
+    if tokens >= cost:
+        _RATE_BUCKETS[key] = (tokens - cost, now)
+        return 0
+    _RATE_BUCKETS[key] = (tokens, now)
+    if len(_RATE_BUCKETS) > 4096:  # oublie les seaux pleins (clients partis)
+        for stale in [k for k, (t, _) in _RATE_BUCKETS.items() if t >= RATE_LIMIT_BURST]:
+            del _RATE_BUCKETS[stale]
+    return max(1, math.ceil((cost - tokens) / max(RATE_LIMIT_PER_SECOND, 1e-6)))
+
+
+def _queue_wait(req):
+    """Secondes passées dans la file de nginx (X-Request-Start: t=<epoch>, en
+    secondes comme le `$msec` de nginx, ou en millisecondes), 0 si l'en-tête est
+    absent ou illisible."""
+    value = req.headers.get("X-Request-Start", "").removeprefix("t=")
+    try:
+        started = float(value)
+    except ValueError:
+        return 0.0
+    if started > 1e11:  # millisecondes
+        started /= 1000
+    return max(0.0, time.time() - started)
+
+
+def _too_busy(retry_after, reason, status):
+    METRICS["rejected"][reason] = METRICS["rejected"].get(reason, 0) + 1
+    return Response(
+        "trop de requêtes, réessayer plus tard\n", status=status,
+        mimetype="text/plain", headers={"Retry-After": str(retry_after)},
+    )
+
+
+@app.before_request
+def _admit_request():
+    if request.method != "GET" or request.endpoint not in DASHBOARD_ENDPOINTS:
+        return None
+    if (_RENDERS["inflight"] >= RENDER_MAX_INFLIGHT
+            or _queue_wait(request) > RENDER_MAX_QUEUE_SECONDS):
+        return _too_busy(SHED_RETRY_AFTER, "overload", 503)
+    wait = take_tokens(_client_ip(request), RATE_LIMIT_COSTS.get(request.endpoint, 1))
+    if wait:
+        return _too_busy(wait, "rate_limit", 429)
+    _RENDERS["inflight"] += 1
+    g.render_slot = True
+    return None
+
+
+@app.teardown_request
+def _release_render_slot(_exc):
+    if g.pop("render_slot", False):
+        _RENDERS["inflight"] -= 1
+
+
+def render_metrics():
+    """Métriques au format texte d'exposition Prometheus (version 0.0.4)."""
+    lines = [
+        "# HELP receiver_events_received_total Requests received by the webhook.",
+        "# TYPE receiver_events_received_total counter",
+        f"receiver_events_received_total {METRICS['events_received']}",
+        "# HELP receiver_events_ingested_total Work events upserted into the CSV.",
+        "# TYPE receiver_events_ingested_total counter",
+        f"receiver_events_ingested_total {METRICS['events_ingested']}",
+        "# HELP receiver_duplicates_skipped_total Duplicate events skipped before any CSV I/O.",
+        "# TYPE receiver_duplicates_skipped_total counter",
+        f"receiver_duplicates_skipped_total {METRICS['duplicates_skipped']}",
+        "# HELP receiver_prerender_hits_total Responses served from the background pre-render.",
+        "# TYPE receiver_prerender_hits_total counter",
+        f"receiver_prerender_hits_total {METRICS['prerender_hits']}",
+        "# HELP receiver_requests_rejected_total Requests refused, by reason.",
+        "# TYPE receiver_requests_rejected_total counter",
+    ]
+    lines += [
+        f'receiver_requests_rejected_total{{reason="{reason}"}} {count}'
+        for reason, count in sorted(METRICS["rejected"].items())
+    ]
+    lines += [
+        "# HELP receiver_csv_rows Rows in the CSV at the last disk access.",
+        "# TYPE receiver_csv_rows gauge",
+        f"receiver_csv_rows {METRICS['csv_rows']}",
+        "# HELP receiver_last_write_seconds Duration of the last CSV rewrite.",
+        "# TYPE receiver_last_write_seconds gauge",
+        f"receiver_last_write_seconds {METRICS['last_write_seconds']:.6f}",
+    ]
+    for metric, table, label, help_text in (
+        ("receiver_stage_seconds", "stages", "stage", "Time spent per instrumented stage."),
+        ("receiver_request_seconds", "requests", "endpoint", "Request latency per endpoint."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for name, hist in sorted(METRICS[table].items()):
+            for bound, count in zip(METRIC_BUCKETS, hist.counts):
+                lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="+Inf"}} {hist.total}')
+            lines.append(f'{metric}_sum{{{label}="{name}"}} {hist.sum:.6f}')
+            lines.append(f'{metric}_count{{{label}="{name}"}} {hist.total}')
+    return "\n".join(lines) + "\n"
+
+
 def _from_epoch_ms(value):
     if value is None:
         return None
@@ -107,20 +598,42 @@ def payload_to_csv_row(payload):
     }
 
 
+@timed("csv_read")
 def _read_csv_rows(csv_path):
     if not os.path.exists(csv_path):
         return []
     with open(csv_path, newline="", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
-
-
-def _write_csv_rows(rows, csv_path):
+        rows = list(csv.DictReader(f))
+    METRICS["csv_rows"] = len(rows)
+    return rows
+
+
+def _write_csv_rows(rows, csv_path, days=None, edit=True):
+    """Réécrit le CSV. `days` : les seuls jours dont les lignes ont changé —
+    le RowStore en mémoire est alors mis à jour pour ces jours seulement, au
+    lieu d'être reconstruit à la prochaine lecture. `edit` : écriture hors
+    webhook (/rows, /api/import) — les trames déjà vues de ces jours sont
+    oubliées, une relivraison doit pouvoir réécrire la ligne éditée."""
+    start = time.perf_counter()
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
     rows = sorted(rows, key=lambda row: (row["date"], row["startTime"], row["project"], row["task"]))
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-        writer.writeheader()
-        writer.writerows(rows)
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    data = buffer.getvalue().encode("utf-8")
+    with _STORE_LOCK:
+        before = _file_signature(csv_path)
+        with open(csv_path, "wb") as f:
+            f.write(data)
+        _store_written(csv_path, rows, days, before, hashlib.sha1(data).hexdigest())
+    if edit:
+        forget_seen_events(csv_path, days)
+    if days:
+        unexport_days(csv_path, days)
+    METRICS["csv_rows"] = len(rows)
+    METRICS["last_write_seconds"] = time.perf_counter() - start
+    schedule_prerender()
 
 
 def merge_contiguous_sessions(rows):
@@ -145,9 +658,10 @@ def merge_contiguous_sessions(rows):
     return merged
 
 
+@timed("csv_upsert")
 def upsert_csv_row(row, csv_path=None):
     if csv_path is None:
-        csv_path = CSV_PATH
+        csv_path = current_tenant().csv_path
     rows = _read_csv_rows(csv_path)
     key = (row["date"], row["startTime"], row["project"], row["task"])
 
@@ -161,11 +675,11 @@ def upsert_csv_row(row, csv_path=None):
         if existing_key == key:
             if row["endTime"] >= existing["endTime"]:
                 rows[index] = row
-            _write_csv_rows(merge_contiguous_sessions(rows), csv_path)
+            _write_csv_rows(merge_contiguous_sessions(rows), csv_path, days={row["date"]}, edit=False)
             return
 
     rows.append(row)
-    _write_csv_rows(merge_contiguous_sessions(rows), csv_path)
+    _write_csv_rows(merge_contiguous_sessions(rows), csv_path, days={row["date"]}, edit=False)
 
 
 class RowEditError(Exception):
@@ -179,7 +693,7 @@ def update_csv_row(key, project, task, start, end, csv_path=None):
     Lève RowEditError sans rien écrire si la ligne n'existe pas ou si les
     horaires sont invalides."""
     if csv_path is None:
-        csv_path = CSV_PATH
+        csv_path = current_tenant().csv_path
 
     start_h = _hhmm_to_hours(start)
     end_h = _hhmm_to_hours(end)
@@ -205,12 +719,706 @@ def update_csv_row(key, project, task, start, end, csv_path=None):
                 "startTime": start,
                 "endTime": end,
             }
-            _write_csv_rows(merge_contiguous_sessions(rows), csv_path)
+            _write_csv_rows(merge_contiguous_sessions(rows), csv_path, days={existing["date"]})
             return rows[index]
 
     raise RowEditError("ligne introuvable (modifiée entre-temps ?)")
 
 
+IMPORT_MODES = ("missing", "replace")
+
+
+def _import_row(row):
+    """Ligne importée au schéma CSV, ou RowEditError si elle est invalide : date
+    YYYYMMDD dans AGGREGATE_YEARS (une année mal tapée étendrait calendrier et
+    export à des siècles vides), minutes entières d'au plus un jour, horaires
+    HH:MM ou vides (relevés ODS)."""
+    if not isinstance(row, dict):
+        raise RowEditError("ligne attendue sous forme d'objet")
+    day = str(row.get("date", ""))
+    if not re.fullmatch(r"\d{8}", day) or _day_date(day) is None:
+        raise RowEditError(f"date invalide : {day!r}")
+    low, high = AGGREGATE_YEARS
+    if not low <= _day_date(day).year <= high:
+        raise RowEditError(f"date hors de {low}–{high} : {day!r}")
+    try:
+        minutes = int(row.get("minutes"))
+    except (TypeError, ValueError):
+        raise RowEditError(f"minutes invalides : {row.get('minutes')!r}")
+    if not 0 <= minutes <= 1440:
+        raise RowEditError(f"minutes hors de 0–1440 : {minutes}")
+    times = [str(row.get(col) or "") for col in ("startTime", "endTime")]
+    if any(t and _hhmm_to_hours(t) is None for t in times):
+        raise RowEditError(f"horaires invalides : {times[0]!r} → {times[1]!r}")
+    return {
+        "date": day,
+        "project": str(row.get("project") or ""),
+        "task": str(row.get("task") or ""),
+        "minutes": minutes,
+        "startTime": times[0],
+        "endTime": times[1],
+    }
+
+
+@timed("csv_import")
+def import_csv_rows(rows, mode="missing", days=None, csv_path=None):
+    """Injecte un lot de lignes en une seule écriture du CSV. `mode` :
+      - missing : seules les lignes des jours que le CSV ne connaît pas
+        (ré-exécutable, comme backfill_ods) ;
+      - replace : les jours du lot, plus `days` (pour en vider), sont
+        remplacés en entier par ses lignes.
+    Rend (jours écrits, jours ignorés car déjà présents, nb de lignes
+    écrites), jours triés. Lève RowEditError sans rien écrire si une ligne ou
+    un jour est invalide."""
+    if csv_path is None:
+        csv_path = current_tenant().csv_path
+    if mode not in IMPORT_MODES:
+        raise RowEditError(f"mode inconnu : {mode!r} (missing|replace)")
+    rows = [_import_row(row) for row in rows]
+    days = [_import_row({"date": day, "minutes": 0})["date"] for day in days or ()]
+    with _STORE_LOCK:
+        # lecture et écriture sous le verrou : aucun webhook ne s'intercale
+        current = _read_csv_rows(csv_path)
+        known = {row["date"] for row in current}
+        batch_days = {row["date"] for row in rows}
+        if mode == "missing":
+            skipped = batch_days & known
+            written = batch_days - known
+        else:
+            skipped = set()
+            written = batch_days | set(days)
+        added = [row for row in rows if row["date"] in written]
+        if written:
+            kept = [row for row in current if row["date"] not in written]
+            _write_csv_rows(kept + added, csv_path, days=written)
+    return sorted(written), sorted(skipped), len(added)
+
+
+# ── Magasin de lignes en mémoire ──────────────────────────────────────────────
+# Chaque page relisait et ré-agrégeait tout le CSV. Le RowStore garde les lignes
+# d'un CSV et leurs index dérivés, tant que le fichier ne change pas sur disque
+# (inode, taille, mtime). Quand c'est le récepteur qui l'écrit, seuls les jours
+# touchés sont ré-indexés (cf. _write_csv_rows(days=)) ; une modification
+# extérieure (scp, backfill) provoque une reconstruction complète.
+_STORES = OrderedDict()  # {chemin du CSV: (signature du fichier, RowStore)}, LRU
+_STORE_LOCK = threading.RLock()
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _normalized_row(row):
+    """La ligne telle que csv.DictReader la relirait : toutes valeurs en str."""
+    return {col: "" if row.get(col) is None else str(row.get(col)) for col in CSV_COLUMNS}
+
+
+def _row_sort_key(row):
+    """Clé d'ordre et d'identité d'une ligne, celle du CSV : (date, startTime,
+    project, task) — deux lignes peuvent partager un début, pas cette clé."""
+    return (row.get("date") or "", row.get("startTime") or "",
+            row.get("project") or "", row.get("task") or "")
+
+
+def _day_digest(day_rows):
+    """Empreinte des lignes d'un jour : le checkpoint ne reprend un jour que
+    si elle n'a pas bougé."""
+    text = "\n".join("\x1f".join(map(str, map(row.get, CSV_COLUMNS))) for row in day_rows)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class RowStore:
+    """Les lignes d'un CSV, indexées par jour, leurs minutes par (projet, tâche)
+    et par jour (`cells`, cf. day_cells), le grand livre des projets
+    (ProjectLedger), les statistiques glissantes de /live (RollingStats) et les
+    agrégats par jour, par semaine et par mois :
+    `daily` = {YYYYMMDD: day_rollup()}, `weekly` = {YYYYMMDD du lundi: somme des
+    day_rollup de la semaine}, `monthly` = {YYYYMM: somme du mois}. `version`
+    augmente à chaque mise à jour.
+
+    `checkpoint` : l'état dérivé sauvé à côté du CSV (cf. _load_checkpoint).
+    Les jours dont les lignes n'ont pas changé depuis (même empreinte, cf.
+    _day_digest) en sont restaurés tels quels ; seuls les autres sont
+    ré-indexés et ré-agrégés."""
+
+    def __init__(self, rows, checkpoint=None):
+        self.rows = []
+        self.by_day = {}  # {jour: ses lignes, par _row_sort_key}
+        self.days = []    # jours présents, triés
+        self.cells = {}   # {jour: day_cells()}
+        self.lanes = {}   # {jour: [sessions, résumé horaire]}, cf. lane()
+        self.day_digests = {}  # {jour: _day_digest()}, pour le checkpoint
+        self.ledger = ProjectLedger()
+        self.search_index = SearchIndex()
+        self.rolling = RollingStats()
+        self.daily, self.weekly, self.monthly = {}, {}, {}
+        self.version = 0
+        self.digest = None  # sha1 du CSV, pour le checkpoint
+        self.billable = None  # projets facturables des agrégats, cf. row_store
+        if checkpoint is None:
+            self.replace_days(rows, None)
+        else:
+            self._restore(rows, checkpoint)
+
+    def _restore(self, rows, checkpoint):
+        """Reprend l'état de `checkpoint` pour les jours inchangés, rejoue les
+        autres (modifiés, ajoutés ou disparus depuis). Avec checkpoint["trusted"]
+        (même sha1 de tout le CSV), aucun jour n'est comparé."""
+        self.rows = rows
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row.get("date") or "", []).append(row)
+        saved = checkpoint["days"]
+        self.daily, self.weekly, self.monthly = checkpoint["rollups"]
+        changed = set(saved) - set(by_day)
+        for day in sorted(by_day):
+            day_rows = sorted(by_day[day], key=_row_sort_key)
+            self.days.append(day)
+            self.by_day[day] = day_rows
+            digest, cells, postings = saved.get(day, (None, None, None))
+            if digest is None or not (checkpoint["trusted"] or digest == _day_digest(day_rows)):
+                changed.add(day)
+                continue
+            self.day_digests[day] = digest
+            self.cells[day] = cells
+            self.ledger.set_day_cells(day, cells)
+            self.search_index.set_day_postings(day, postings)
+        for day, rollup in self.daily.items():
+            if _day_date(day):
+                self.rolling.set_day(_day_date(day), day_totals(rollup))
+        if changed:
+            self.replace_days(rows, changed)
+        else:
+            self.version += 1
+
+    @property
+    def first_day(self):
+        """Premier jour daté du CSV (date), None si vide."""
+        span = self.span
+        return span[0] if span else None
+
+    @property
+    def span(self):
+        """(premier, dernier) jours datés du CSV (dates), None si vide."""
+        first = next((_day_date(d) for d in self.days if _day_date(d)), None)
+        if first is None:
+            return None
+        return first, next(_day_date(d) for d in reversed(self.days) if _day_date(d))
+
+    def replace_days(self, rows, days):
+        """`rows` : le contenu complet du CSV ; `days` : les jours qui ont changé
+        (None : tous)."""
+        self.rows = rows
+        by_day = {}
+        for row in rows:
+            day = row.get("date") or ""
+            if days is None or day in days:
+                by_day.setdefault(day, []).append(row)
+        if days is None:
+            days = set(by_day) | set(self.by_day)
+        # par ordre chronologique : les séries du grand livre s'allongent alors
+        # par la fin, sans décaler ni recumuler les jours suivants
+        for day in sorted(days):
+            day_rows = sorted(by_day.get(day, []), key=_row_sort_key)
+            if day_rows:
+                if day not in self.by_day:
+                    insort(self.days, day)
+                self.by_day[day] = day_rows
+            elif self.by_day.pop(day, None) is not None:
+                del self.days[bisect_left(self.days, day)]
+            self._index_day(day, day_rows)
+        mondays, months = set(), set()
+        for day in days:
+            self._put(self.daily, day, day_rollup(by_day.get(day, [])))
+            if _day_date(day):
+                mondays.add(_week_key(_day_date(day)))
+                months.add(day[:6])
+                self.rolling.set_day(_day_date(day), day_totals(self.daily.get(day, EMPTY_ROLLUP)))
+        # une semaine ou un mois se recalcule depuis ses ≤ 31 jours, jamais
+        # depuis les lignes
+        for monday in mondays:
+            first = _day_date(monday)
+            self._put(self.weekly, monday, self._sum_days(first, first + timedelta(days=6)))
+        for month in months:
+            first = _day_date(f"{month}01")
+            last = month_start(first, -1) - timedelta(days=1)
+            self._put(self.monthly, month, self._sum_days(first, last))
+        self.version += 1
+
+    def _index_day(self, day, day_rows):
+        self.lanes.pop(day, None)
+        if day_rows:
+            self.cells[day] = day_cells(day_rows)
+            self.day_digests[day] = _day_digest(day_rows)
+        else:
+            self.cells.pop(day, None)
+            self.day_digests.pop(day, None)
+        self.ledger.set_day_cells(day, self.cells.get(day, {}))
+        self.search_index.set_day(day, day_rows)
+
+    def search(self, query="", since=None, until=None, prefix=None, before=None, after=None):
+        """Lignes contenant tous les termes de `query` (cf. SearchIndex), du jour
+        `since` au jour `until` inclus, du projet `prefix` — de la plus récente à
+        la plus ancienne, en générateur : on s'arrête dès qu'on a assez de
+        lignes, sans trier tout l'historique.
+
+        `before` / `after` sont des curseurs _row_sort_key exclus : seules
+        les lignes plus anciennes, ou plus récentes, sont rendues — ces
+        dernières de la plus ancienne à la plus récente, pour qu'une page
+        « plus récentes » parte du curseur."""
+        matches = self.search_index.matches(query)
+        days = self.days if matches is None else sorted(matches)
+        if before:
+            until = min(until, before[0]) if until else before[0]
+        if after:
+            since = max(since, after[0]) if since else after[0]
+        start = bisect_left(days, since) if since else 0
+        stop = bisect_right(days, until) if until else len(days)
+        window = days[start:stop]
+        for day in window if after else reversed(window):
+            rows = self.by_day.get(day, [])
+            indices = range(len(rows)) if matches is None else sorted(matches[day])
+            for i in indices if after else reversed(indices):
+                row = rows[i]
+                key = _row_sort_key(row)
+                if (before and key >= before) or (after and key <= after):
+                    continue
+                if prefix and _project_prefix(row.get("project")) != prefix:
+                    continue
+                yield row
+
+    def lane(self, day, summary=False):
+        """Sessions du jour `day` pour le swimlane (cf. day_sessions), ou leur
+        résumé horaire (swimlane_hour_buckets) — calculées à la première
+        demande puis gardées jusqu'à la prochaine modification du jour."""
+        lane = self.lanes.get(day)
+        if lane is None:
+            lane = self.lanes[day] = [day_sessions(self.by_day.get(day, [])), None]
+        if not summary:
+            return lane[0]
+        if lane[1] is None:
+            lane[1] = swimlane_hour_buckets(lane[0])
+        return lane[1]
+
+    @staticmethod
+    def _put(table, key, rollup):
+        if rollup[0] or rollup[2]:
+            table[key] = rollup
+        else:
+            table.pop(key, None)
+
+    def _sum_days(self, first, last):
+        keys = (calendar_day(first + timedelta(days=i)).key for i in range((last - first).days + 1))
+        return sum_rollups(self.daily[key] for key in keys if key in self.daily)
+
+    def week_rollup(self, monday, last_day=None):
+        """Agrégat de la semaine du `monday` (date), arrêtée à `last_day` inclus
+        s'il tombe dans la semaine — la semaine en cours s'arrête à aujourd'hui."""
+        if last_day is not None and last_day < monday + timedelta(days=6):
+            return self._sum_days(monday, last_day)
+        return self.weekly.get(_week_key(monday), EMPTY_ROLLUP)
+
+    def month_rollup(self, first):
+        """Agrégat du mois commençant le `first` (date)."""
+        return self.monthly.get(calendar_day(first).month_key, EMPTY_ROLLUP)
+
+    def aggregate(self, first, last, bucket="day", group="", metric="billable", quantize=False):
+        """Minutes du jour `first` au jour `last` inclus (dates), par période et
+        par groupe : {clé de période: {clé de groupe: minutes}}, périodes et
+        groupes vides omis. Le moteur commun des graphiques et de /api/aggregate.
+
+        `bucket` : day (clé YYYYMMDD), week (YYYYMMDD du lundi) ou month
+        (YYYYMM) ; `group` : "" (total, clé ""), prefix, project ou task
+        (« projet/tâche ») ; `metric` : billable (projets facturables) ou
+        activity (tous sauf nan) ; `quantize` : chaque (jour, projet, tâche)
+        porté au quart d'heure supérieur, comme billable_minutes().
+
+        Quand les agrégats déjà tenus suffisent (total, ou activité brute par
+        préfixe), une semaine ou un mois entier coûte une lecture ; sinon on
+        parcourt les `cells` des seuls jours présents dans l'intervalle.
+        L'intervalle est d'abord réduit aux jours du CSV (span) : au-delà, rien
+        à compter, ni de calendrier à étendre."""
+        series = {}
+        span = self.span
+        if span is None:
+            return series
+        first, last = max(first, span[0]), min(last, span[1])
+        if first > last:
+            return series
+        from_rollups = _rollup_groups(EMPTY_ROLLUP, group, metric, quantize) is not None
+        if from_rollups and bucket != "day":
+            table = self.weekly if bucket == "week" else self.monthly
+            for key, start, stop in _buckets(first, last, bucket):
+                if first <= start and stop <= last:
+                    rollup = table.get(key, EMPTY_ROLLUP)
+                else:
+                    rollup = self._sum_days(max(first, start), min(last, stop))
+                groups = _rollup_groups(rollup, group, metric, quantize)
+                if groups:
+                    series[key] = groups
+            return series
+        key_field = {"day": "key", "week": "monday_key", "month": "month_key"}[bucket]
+        first_key, last_key = calendar_day(first).key, calendar_day(last).key
+        for day in self.days[bisect_left(self.days, first_key):bisect_right(self.days, last_key)]:
+            if not _day_date(day):
+                continue
+            if from_rollups:
+                groups = _rollup_groups(self.daily.get(day, EMPTY_ROLLUP), group, metric, quantize)
+            else:
+                groups = _cell_groups(self.cells.get(day, {}), group, metric, quantize)
+            if not groups:
+                continue
+            totals = series.setdefault(getattr(calendar_day(_day_date(day)), key_field), {})
+            for name, minutes in groups.items():
+                totals[name] = totals.get(name, 0) + minutes
+        return series
+
+
+def search_tokens(text):
+    """Jetons de recherche : minuscules, sans accents, découpés sur tout ce qui
+    n'est ni lettre ni chiffre (« calipso_iesa #42 Réunion » → calipso, iesa,
+    42, reunion)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.findall(r"[^\W_]+", text)
+
+
+class SearchIndex:
+    """Index inversé des lignes par jeton de projet et de tâche. Les postings
+    sont rangés par jour ({jeton: {jour: indices dans by_day[jour]}}) : un jour
+    modifié se ré-indexe seul. Le vocabulaire trié permet à chaque terme de
+    valoir préfixe (« reu » trouve « reunion »)."""
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self._day_tokens = {}  # {jour: ses jetons} — pour le retirer
+
+    def set_day(self, day, rows):
+        by_token = {}
+        for index, row in enumerate(rows):
+            for token in set(search_tokens(f"{row.get('project')} {row.get('task')}")):
+                by_token.setdefault(token, []).append(index)
+        self.set_day_postings(day, by_token)
+
+    def set_day_postings(self, day, by_token):
+        """Remplace les postings du jour `day` : {jeton: indices dans ses
+        lignes}, cf. day_postings."""
+        for token in self._day_tokens.pop(day, ()):
+            postings = self.postings[token]
+            del postings[day]
+            if not postings:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+        for token, indices in by_token.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                insort(self.vocabulary, token)
+            self.postings[token][day] = tuple(indices)
+        if by_token:
+            self._day_tokens[day] = set(by_token)
+
+    def day_postings(self, day):
+        """{jeton: indices} du jour `day`."""
+        return {token: self.postings[token][day] for token in self._day_tokens.get(day, ())}
+
+    def matches(self, query):
+        """{jour: {indices}} des lignes dont les jetons commencent par chacun
+        des termes de `query` ; None si la requête n'a aucun terme."""
+        result = None
+        for term in set(search_tokens(query)):
+            hits = {}
+            i = bisect_left(self.vocabulary, term)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+                for day, indices in self.postings[self.vocabulary[i]].items():
+                    hits.setdefault(day, set()).update(indices)
+                i += 1
+            if result is not None:
+                hits = {
+                    day: indices & hits[day]
+                    for day, indices in result.items()
+                    if day in hits and indices & hits[day]
+                }
+            result = hits
+            if not result:
+                return {}
+        return result
+
+
+ROLLING_WEEKS = 4  # /live : moyennes glissantes sur 4 semaines
+
+
+class RollingStats:
+    """Moyennes glissantes et cumul du mois pour /live, tenus à jour depuis les
+    totaux par jour — (minutes facturables brutes, arrondies, minutes
+    d'activité), cf. day_totals. Deux sommes courantes sont gardées, la fenêtre
+    des `weeks` semaines finissant au jour `anchor` et le mois de `anchor`
+    jusqu'à lui : un jour modifié y ajoute son écart (O(1)), un changement de
+    jour fait glisser la fenêtre d'un jour par jour écoulé. Le poll de 3 s ne
+    relit donc jamais l'historique."""
+
+    def __init__(self, weeks=ROLLING_WEEKS):
+        self.span = weeks * 7
+        self.totals = {}  # {date: (brut, arrondi, activité)}
+        self.anchor = None
+        self.window = [0, 0, 0]
+        self.month = [0, 0, 0]
+        self._lock = threading.Lock()
+
+    def set_day(self, day, totals):
+        """Nouveaux totaux du jour `day` (date)."""
+        with self._lock:
+            old = self.totals.pop(day, (0, 0, 0))
+            if any(totals):
+                self.totals[day] = totals
+            if self.anchor is None or day > self.anchor:
+                return
+            delta = [new - prev for new, prev in zip(totals, old)]
+            if (self.anchor - day).days < self.span:
+                self._add(self.window, delta)
+            if day >= month_start(self.anchor):
+                self._add(self.month, delta)
+
+    def snapshot(self, today, quantize=False):
+        """Heures au jour `today` (date) : moyennes hebdomadaires facturable et
+        totale sur la fenêtre, facturable du mois à date, et projection de fin
+        de mois — le cumul plus le rythme moyen de la fenêtre sur les jours
+        restants après aujourd'hui."""
+        with self._lock:
+            self._advance(today)
+            window, month = list(self.window), list(self.month)
+        billable = 1 if quantize else 0
+        remaining = (month_start(today, -1) - today).days - 1
+        pace = window[billable] / self.span
+        weeks = self.span / 7
+        return {
+            "billable_avg_week": round(window[billable] / 60 / weeks, 2),
+            "activity_avg_week": round(window[2] / 60 / weeks, 2),
+            "billable_month": round(month[billable] / 60, 2),
+            "billable_projection": round((month[billable] + pace * remaining) / 60, 2),
+        }
+
+    def _advance(self, today):
+        anchor = self.anchor
+        if anchor is None or today < anchor or (today - anchor).days > self.span:
+            self.anchor = today
+            self.window = self._sum(today - timedelta(days=self.span - 1), today)
+            self.month = self._sum(month_start(today), today)
+            return
+        while anchor < today:
+            anchor += timedelta(days=1)
+            entering = self.totals.get(anchor, (0, 0, 0))
+            leaving = self.totals.get(anchor - timedelta(days=self.span), (0, 0, 0))
+            self._add(self.window, [a - b for a, b in zip(entering, leaving)])
+            if anchor.day == 1:
+                self.month = [0, 0, 0]
+            self._add(self.month, entering)
+        self.anchor = today
+
+    def _sum(self, first, last):
+        sums = [0, 0, 0]
+        for i in range((last - first).days + 1):
+            self._add(sums, self.totals.get(first + timedelta(days=i), (0, 0, 0)))
+        return sums
+
+    @staticmethod
+    def _add(sums, values):
+        for i, value in enumerate(values):
+            sums[i] += value
+
+
+def day_totals(rollup):
+    """Totaux d'un day_rollup() pour RollingStats : (facturable brut, facturable
+    arrondi, activité), en minutes."""
+    raw, quantized, activity = rollup
+    return raw, quantized, sum(activity.values())
+
+
+def _day_date(day):
+    """date d'une clé YYYYMMDD, None si la clé n'en est pas une."""
+    known = _CALENDAR_KEYS.get(day)
+    if known is not None:
+        return known
+    try:
+        return datetime.strptime(day, "%Y%m%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _week_key(day):
+    """Clé de la semaine du jour `day` (date) dans `weekly` : son lundi, YYYYMMDD."""
+    return calendar_day(day).monday_key
+
+
+def month_start(day, back=0):
+    """Premier jour du mois de `day`, reculé de `back` mois (négatif : avancé)."""
+    index = day.year * 12 + day.month - 1 - back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Checkpoint de l'état dérivé, persisté à côté du CSV (<csv>.rollups.json) :
+# agrégats par jour, semaine et mois, et pour chaque jour son empreinte, ses
+# day_cells (d'où le grand livre et ses sommes préfixes) et ses postings de
+# recherche. Au démarrage, les lignes sont relues mais seuls les jours dont
+# l'empreinte a changé depuis sont ré-indexés ; si le CSV a gardé le même sha1,
+# aucun. Invalide si BILLABLE_PROJECTS a changé (les agrégats en dépendent).
+# Après une écriture du récepteur, il est réécrit au plus toutes les
+# CHECKPOINT_DELAY secondes, par un thread (cf. schedule_checkpoint) et à
+# l'arrêt : un checkpoint en retard ne coûte au démarrage que les jours écrits
+# depuis.
+CHECKPOINT_VERSION = 3
+CHECKPOINT_DELAY = 30
+_CHECKPOINTS = {"pending": {}, "timer": None, "lock": threading.Lock()}
+
+
+def _checkpoint_path(csv_path):
+    return f"{csv_path}.rollups.json"
+
+
+def _file_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _load_checkpoint(csv_path, digest):
+    """Checkpoint du CSV tel que l'attend RowStore, None s'il est absent,
+    illisible, d'une autre version ou d'une autre liste facturable.
+    "trusted" : il a été écrit pour ce contenu exact du CSV (`digest`)."""
+    try:
+        with open(_checkpoint_path(csv_path), encoding="utf-8") as f:
+            saved = json.load(f)
+        if (saved.get("version") != CHECKPOINT_VERSION
+                or saved.get("billable") != sorted(current_tenant().billable)):
+            return None
+        as_rollups = lambda table: {k: tuple(v) for k, v in table.items()}  # noqa: E731
+        return {
+            "trusted": saved["csv_sha1"] == digest,
+            "rollups": (as_rollups(saved["days"]), as_rollups(saved["weeks"]),
+                        as_rollups(saved["months"])),
+            "days": {
+                day: (day_digest, {(p, t): m for p, t, m in cells}, postings)
+                for day, (day_digest, cells, postings) in saved["indexes"].items()
+            },
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_checkpoint(csv_path, store):
+    """Écrit le checkpoint de façon atomique (fichier temporaire + rename)."""
+    path = _checkpoint_path(csv_path)
+    tmp = f"{path}.tmp"
+    # json.dumps d'un bloc (encodeur C) plutôt que json.dump et ses écritures
+    # morcelées : le checkpoint est réécrit à chaque webhook
+    data = json.dumps({
+        "version": CHECKPOINT_VERSION,
+        "csv_sha1": store.digest,
+        "billable": sorted(store.billable),
+        "days": store.daily,
+        "weeks": store.weekly,
+        "months": store.monthly,
+        "indexes": {
+            day: [digest, [[p, t, m] for (p, t), m in store.cells[day].items()],
+                  store.search_index.day_postings(day)]
+            for day, digest in store.day_digests.items()
+        },
+    }, separators=(",", ":"))
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def schedule_checkpoint(csv_path, store):
+    """Programme l'écriture du checkpoint de `store` dans CHECKPOINT_DELAY
+    secondes ; les écritures d'ici là n'en programment pas d'autre."""
+    with _CHECKPOINTS["lock"]:
+        _CHECKPOINTS["pending"][str(csv_path)] = store
+        if _CHECKPOINTS["timer"] is None:
+            timer = threading.Timer(CHECKPOINT_DELAY, flush_checkpoints)
+            timer.daemon = True
+            _CHECKPOINTS["timer"] = timer
+            timer.start()
+
+
+@atexit.register
+def flush_checkpoints():
+    """Écrit les checkpoints programmés (thread de schedule_checkpoint, arrêt)."""
+    with _CHECKPOINTS["lock"]:
+        pending = dict(_CHECKPOINTS["pending"])
+        _CHECKPOINTS["pending"].clear()
+        _CHECKPOINTS["timer"] = None
+    for path, store in pending.items():
+        try:
+            with _STORE_LOCK:  # pas d'écriture du RowStore pendant la sérialisation
+                _save_checkpoint(path, store)
+        except OSError as exc:
+            print(f"checkpoint {path} en échec : {exc!r}", flush=True)
+
+
+@timed("store_build")
+def _build_store(csv_path):
+    digest = _file_digest(csv_path)
+    checkpoint = _load_checkpoint(csv_path, digest) if digest else None
+    store = RowStore(_read_csv_rows(csv_path), checkpoint=checkpoint)
+    store.digest = digest
+    store.billable = current_tenant().billable
+    if store.first_day:
+        # calendrier de toute la plage des données, d'un coup plutôt qu'au fil
+        # des pages
+        extend_calendar(store.first_day, datetime.now().date() + timedelta(days=7))
+    if digest and not (checkpoint and checkpoint["trusted"]):
+        _save_checkpoint(csv_path, store)
+    return store
+
+
+def row_store(csv_path=None):
+    """RowStore du CSV `csv_path` (défaut : celui du locataire de la requête),
+    reconstruit seulement si le fichier a changé depuis le dernier accès, ou la
+    liste des projets facturables (les agrégats en dépendent). Au-delà
+    de STORES_MAX CSV en mémoire, le moins récemment lu est oublié : un locataire
+    inactif ne coûte rien jusqu'à sa prochaine requête."""
+    path = str(csv_path or current_tenant().csv_path)
+    with _STORE_LOCK:
+        signature = _file_signature(path)
+        cached = _STORES.get(path)
+        if (cached is not None and cached[0] == signature
+                and cached[1].billable == current_tenant().billable):
+            _STORES.move_to_end(path)
+            return cached[1]
+        store = _build_store(path)
+        _STORES[path] = (signature, store)
+        _STORES.move_to_end(path)
+        while len(_STORES) > STORES_MAX:
+            _, (_, evicted) = _STORES.popitem(last=False)
+            _forget_prerendered(evicted)
+        return store
+
+
+def _store_written(csv_path, rows, days, before, digest):
+    """Répercute une écriture du récepteur sur le RowStore en cache : mise à jour
+    des seuls `days` si le cache reflétait bien le fichier d'avant (`before`),
+    sinon abandon du cache (reconstruit à la prochaine lecture)."""
+    path = str(csv_path)
+    cached = _STORES.pop(path, None)
+    if cached is None or days is None or cached[0] != before:
+        return
+    store = cached[1]
+    days = set(days)
+    # seules les lignes de `days` peuvent venir d'ailleurs que du CSV relu
+    # (entiers du webhook, import) ; les autres sont déjà des str
+    store.replace_days([_normalized_row(row) if row["date"] in days else row for row in rows], days)
+    store.digest = digest
+    schedule_checkpoint(path, store)
+    _STORES[path] = (_file_signature(path), store)
+
+
 def _record(req):
     raw = req.get_data()
     parsed = req.get_json(force=True, silent=True)
@@ -236,15 +1444,15 @@ def _record(req):
 
 
 def _write_event(event):
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    log_path = current_tenant().log_path
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
     line = json.dumps(event, ensure_ascii=False, sort_keys=True)
     print(line, flush=True)
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
+    with open(log_path, "a", encoding="utf-8") as f:
         f.write(line + "\n")
 
 
 def _update_current_task(payload):
-    global CURRENT_TASK
     if not isinstance(payload, dict) or payload.get("round") != "pomodoro":
         return
 
@@ -254,35 +1462,39 @@ def _update_current_task(payload):
         start_dt = _from_epoch_ms(session_start)
         if start_dt is None:
             return
-        CURRENT_TASK = {
+        current_tenant().current_task = {
             "date": start_dt.strftime("%Y%m%d"),
             "project": payload.get("project", ""),
             "task": payload.get("task", ""),
             "start_ms": session_start,
         }
     elif event_type in EXPORT_TYPES:
-        CURRENT_TASK = None
+        current_tenant().current_task = None
 
 
 def current_task_row():
-    if CURRENT_TASK is None:
+    task = current_tenant().current_task
+    if task is None:
         return None
-    start_dt = _from_epoch_ms(CURRENT_TASK["start_ms"])
+    start_dt = _from_epoch_ms(task["start_ms"])
     now = datetime.now()
     minutes = max(0, round((now - start_dt).total_seconds() / 60))
     return {
-        "date": CURRENT_TASK["date"],
-        "project": CURRENT_TASK["project"],
-        "task": CURRENT_TASK["task"],
+        "date": task["date"],
+        "project": task["project"],
+        "task": task["task"],
         "minutes": minutes,
         "startTime": start_dt.strftime("%H:%M"),
         "endTime": now.strftime("%H:%M"),
     }
 
 
-def _row_is_billable(row):
+def _row_is_billable(row, billable=None):
+    """`billable` : current_tenant().billable déjà lu, pour les boucles."""
+    if billable is None:
+        billable = current_tenant().billable
     project = (row.get("project") or "").split("_", 1)[0].strip().lower()
-    return project in BILLABLE_PROJECTS
+    return project in billable
 
 
 def billable_minutes(rows, day, quantize=False):
@@ -291,10 +1503,11 @@ def billable_minutes(rows, day, quantize=False):
     ceil each group up to the next quarter-hour (15 min) before summing. Without
     it, returns the raw sum (grouping is transparent then)."""
     by_task = {}
+    billable = current_tenant().billable
     for row in rows:
         if row.get("date") != day:
             continue
-        if not _row_is_billable(row):
+        if not _row_is_billable(row, billable):
             continue
         key = (row.get("project"), row.get("task"))
         by_task[key] = by_task.get(key, 0) + int(row.get("minutes") or 0)
@@ -306,14 +1519,70 @@ def billable_minutes(rows, day, quantize=False):
 def billable_hours(day=None):
     if day is None:
         day = datetime.now().strftime("%Y%m%d")
-    return billable_minutes(_read_csv_rows(CSV_PATH), day) / 60
+    return billable_minutes(_read_csv_rows(current_tenant().csv_path), day) / 60
+
+
+# ── Dimension calendrier ──────────────────────────────────────────────────────
+# Les faits de calendrier d'un jour (clé CSV, étiquettes françaises, semaine ISO,
+# lundi, mois, week-end) ne changent jamais : ils sont calculés une fois par
+# processus, sur la plage des données (cf. _build_store), puis étendus au besoin
+# quand une page demande un jour hors plage. Les boucles des graphes y font une
+# simple lecture de dict au lieu de strftime / isocalendar à chaque rendu.
+CalendarDay = namedtuple("CalendarDay", [
+    "date", "key", "label", "short_label", "weekend", "iso_week", "week_label",
+    "monday", "monday_key", "week_range", "month_key", "month_name", "month_year",
+])
+_CALENDAR = {}       # {date: CalendarDay}
+_CALENDAR_KEYS = {}  # {YYYYMMDD: date}
+
+
+def _calendar_entry(day):
+    monday = day - timedelta(days=day.weekday())
+    iso_week = day.isocalendar()[1]
+    return CalendarDay(
+        date=day,
+        key=day.strftime("%Y%m%d"),
+        label=f"{_FR_WEEKDAYS[day.weekday()]} {day.strftime('%d/%m')}",
+        short_label=f"{_FR_WEEKDAYS[day.weekday()][:3].lower()}. {day.strftime('%d/%m')}",
+        weekend=day.weekday() >= 5,
+        iso_week=iso_week,
+        week_label=f"S{iso_week:02d}",
+        monday=monday,
+        monday_key=monday.strftime("%Y%m%d"),
+        week_range=_fr_week_range(monday, monday + timedelta(days=6)),
+        month_key=day.strftime("%Y%m"),
+        month_name=_FR_MONTHS[day.month - 1].capitalize(),
+        month_year=day.strftime("%y"),
+    )
+
+
+def extend_calendar(first, last):
+    """Ajoute à la table les jours de `first` à `last` inclus qui y manquent."""
+    day = first
+    while day <= last:
+        if day not in _CALENDAR:
+            entry = _calendar_entry(day)
+            _CALENDAR[day] = entry
+            _CALENDAR_KEYS[entry.key] = day
+        day += timedelta(days=1)
+
+
+def calendar_day(day):
+    """CalendarDay du jour `day` (date)."""
+    entry = _CALENDAR.get(day)
+    if entry is None:
+        if isinstance(day, datetime):
+            return calendar_day(day.date())
+        extend_calendar(day, day)
+        entry = _CALENDAR[day]
+    return entry
 
 
 def current_week_bounds(today=None):
     """Monday and Sunday (date objects) of the week containing `today`."""
     if today is None:
         today = datetime.now().date()
-    monday = today - timedelta(days=today.weekday())
+    monday = calendar_day(today).monday
     sunday = monday + timedelta(days=6)
     return monday, sunday
 
@@ -334,7 +1603,7 @@ def day_label(day):
     """« Vendredi 25/07 » — étiquette de ligne des graphes de semaine. Sert aussi
     de clé de surlignage du jour courant (`highlight_label`) : les deux doivent
     se calculer ici, sinon le cadre jaune ne trouve plus sa ligne."""
-    return f"{_FR_WEEKDAYS[day.weekday()]} {day.strftime('%d/%m')}"
+    return calendar_day(day).label
 
 
 def future_day_labels(monday, today=None):
@@ -355,8 +1624,9 @@ def billable_hours_for_days(monday, last_day, rows, quantize=False):
     days = []
     day = last_day
     while day >= monday:
-        hours = billable_minutes(rows, day.strftime("%Y%m%d"), quantize=quantize) / 60
-        days.append((day_label(day), hours))
+        cal = calendar_day(day)
+        hours = billable_minutes(rows, cal.key, quantize=quantize) / 60
+        days.append((cal.label, hours))
         day -= timedelta(days=1)
     return days
 
@@ -367,9 +1637,10 @@ def billable_hours_for_week(today=None):
     if today is None:
         today = datetime.now().date()
     monday, _ = current_week_bounds(today)
-    return billable_hours_for_days(monday, today, _read_csv_rows(CSV_PATH))
+    return billable_hours_for_days(monday, today, _read_csv_rows(current_tenant().csv_path))
 
 
+@timed("recent_weeks")
 def recent_weeks(today=None, count=BILLABLE_WEEKS_SHOWN, page=0, quantize=False):
     """The `count` most recent weeks, most recent first, as
     (monday, sunday, billable_days, activity_days) tuples — billable hours and
@@ -381,25 +1652,33 @@ def recent_weeks(today=None, count=BILLABLE_WEEKS_SHOWN, page=0, quantize=False)
     most recent window (week containing `today`); pages > 0 are older."""
     if today is None:
         today = datetime.now().date()
-    rows = _read_csv_rows(CSV_PATH)
     monday, _ = current_week_bounds(today)
     monday -= timedelta(weeks=page * count)
-    last_day = monday + timedelta(days=6)
     weeks = []
     for _ in range(count):
-        sunday = monday + timedelta(days=6)
-        billable, activity, day = [], [], last_day
-        while day >= monday:
-            key, label = day.strftime("%Y%m%d"), day_label(day)
-            billable.append((label, billable_minutes(rows, key, quantize=quantize) / 60))
-            activity.append((label, activity_by_project(rows, key)))
-            day -= timedelta(days=1)
-        weeks.append((monday, sunday, billable, activity))
+        weeks.append((monday, monday + timedelta(days=6), *week_days(monday, quantize)))
         monday -= timedelta(days=7)
-        last_day = monday + timedelta(days=6)  # semaine précédente : dimanche
     return weeks
 
 
+def week_days(monday, quantize=False):
+    """(billable_days, activity_days) de la semaine du `monday`, dimanche en
+    tête : [(day_label, heures)] et [(day_label, {préfixe: minutes})] — une
+    section de /weeks et les graphiques de semaine de /live, lus par
+    RowStore.aggregate."""
+    store = row_store()
+    sunday = monday + timedelta(days=6)
+    hours = store.aggregate(monday, sunday, quantize=quantize)
+    activity = store.aggregate(monday, sunday, group="prefix", metric="activity")
+    billable_days, activity_days = [], []
+    for i in range(6, -1, -1):
+        cal = calendar_day(monday + timedelta(days=i))
+        billable_days.append((cal.label, hours.get(cal.key, {}).get("", 0) / 60))
+        activity_days.append((cal.label, activity.get(cal.key, {})))
+    return billable_days, activity_days
+
+
+@timed("recent_week_totals")
 def recent_week_totals(today=None, n=MONTH_WEEKS_SHOWN, page=0, quantize=False):
     """The `n` most recent weeks, most recent first, as
     (monday, sunday, label, billable_hours, {prefix: minutes}) tuples — one row
@@ -408,29 +1687,46 @@ def recent_week_totals(today=None, n=MONTH_WEEKS_SHOWN, page=0, quantize=False):
 
     `page` recule la fenêtre de `page * n` semaines, comme recent_weeks : page 0
     est la fenêtre courante, les suivantes sont plus anciennes (et complètes,
-    leur dimanche étant passé)."""
+    leur dimanche étant passé).
+
+    Lit les agrégats hebdomadaires du RowStore : un accès par semaine affichée,
+    quelle que soit la profondeur de l'historique."""
     if today is None:
         today = datetime.now().date()
-    rows = _read_csv_rows(CSV_PATH)
+    store = row_store()
+    which = 1 if quantize else 0
     monday, _ = current_week_bounds(today)
     monday -= timedelta(weeks=page * n)
     weeks = []
     for _ in range(n):
         sunday = monday + timedelta(days=6)
-        last_day = min(sunday, today)
-        minutes, activity, day = 0, {}, monday
-        while day <= last_day:
-            key = day.strftime("%Y%m%d")
-            minutes += billable_minutes(rows, key, quantize=quantize)
-            for prefix, mins in activity_by_project(rows, key).items():
-                activity[prefix] = activity.get(prefix, 0) + mins
-            day += timedelta(days=1)
-        label = f"S{monday.isocalendar()[1]:02d}"
-        weeks.append((monday, sunday, label, minutes / 60, activity))
+        rollup = store.week_rollup(monday, last_day=today)
+        label = calendar_day(monday).week_label
+        weeks.append((monday, sunday, label, rollup[which] / 60, dict(rollup[2])))
         monday -= timedelta(days=7)
     return weeks
 
 
+@timed("recent_month_totals")
+def recent_month_totals(today=None, n=YEARS_MONTHS_SHOWN, page=0, quantize=False):
+    """The `n` most recent months, most recent first, as
+    (first_day, label, billable_hours, {prefix: minutes}) tuples — /years.
+    Empty months are kept; `page` recule la fenêtre de `page * n` mois.
+
+    Lit les agrégats mensuels du RowStore : O(mois affichés)."""
+    if today is None:
+        today = datetime.now().date()
+    store = row_store()
+    which = 1 if quantize else 0
+    months = []
+    for back in range(page * n, (page + 1) * n):
+        first = month_start(today, back)
+        rollup = store.month_rollup(first)
+        label = f"{calendar_day(first).month_name} {first.year}"
+        months.append((first, label, rollup[which] / 60, dict(rollup[2])))
+    return months
+
+
 def _fr_window(weeks):
     """« février 2023 → mars 2024 » — la période couverte par une fenêtre de
     /months (weeks est trié du plus récent au plus ancien)."""
@@ -476,6 +1772,7 @@ def _format_ymd(day):
     return f"{day[6:8]}/{day[4:6]}/{day[0:4]}" if len(day) == 8 else day
 
 
+@timed("render_billable_svg")
 def render_billable_svg(hours, max_hours=BILLABLE_MAX_HOURS):
     width, height = 640, 110
     bar_x, bar_y, bar_w, bar_h = 20, 56, 600, 32
@@ -608,14 +1905,19 @@ def _split_day_label(label):
     return label, ""
 
 
+# Police des lignes des graphiques de semaine, posée une fois sur le <g> qui
+# les contient plutôt que sur chacun de leurs <text>.
+_ROW_FONT = 'font-family="system-ui, sans-serif" font-size="13"'
+
+
 def _row_label_svg(label, label_x, bar_x, baseline_y, fill="#c3c2b7"):
-    """Nom du jour aligné à gauche, date alignée à droite contre la barre."""
+    """Nom du jour aligné à gauche, date alignée à droite contre la barre (dans
+    un <g> portant _ROW_FONT)."""
     name, date = _split_day_label(label)
-    font = 'font-family="system-ui, sans-serif" font-size="13"'
-    svg = f'<text x="{label_x}" y="{baseline_y}" {font} fill="{fill}">{name}</text>'
+    svg = f'<text x="{label_x}" y="{baseline_y}" fill="{fill}">{name}</text>'
     if date:
         svg += (
-            f'<text x="{bar_x - 12}" y="{baseline_y}" text-anchor="end" {font} '
+            f'<text x="{bar_x - 12}" y="{baseline_y}" text-anchor="end" '
             f'fill="{fill}">{date}</text>'
         )
     return svg
@@ -637,17 +1939,13 @@ def month_row_groups(mondays):
     groups = []
     previous = None
     for i, monday in enumerate(mondays):
-        key = (monday.year, monday.month)
-        if groups and key == previous:
+        cal = calendar_day(monday)
+        if groups and cal.month_key == previous:
             first, _, name, year = groups[-1]
             groups[-1] = (first, i, name, year)
         else:
-            groups.append((
-                i, i,
-                _FR_MONTHS[monday.month - 1].capitalize(),
-                monday.strftime("%y"),
-            ))
-        previous = key
+            groups.append((i, i, cal.month_name, cal.month_year))
+        previous = cal.month_key
     return groups
 
 
@@ -693,12 +1991,45 @@ def _month_labels_svg(groups, top, row_h, row_gap, x):
         if len(name) > 4 and _text_width(text, MONTH_LABEL_SIZE) > span:
             text = f"{name[:3]}. {year}"
         labels.append(
-            f'<text transform="translate({x},{(y0 + y1) / 2:.1f}) rotate(-90)" '
-            f'text-anchor="middle" font-family="system-ui, sans-serif" '
-            f'font-size="{MONTH_LABEL_SIZE}" font-weight="{MONTH_LABEL_WEIGHT}" '
-            f'fill="{MONTH_LABEL_COLOR}">{text}</text>'
+            f'<text transform="translate({x},{_num((y0 + y1) / 2)}) rotate(-90)">{text}</text>'
         )
-    return "".join(labels)
+    return (
+        f'<g text-anchor="middle" font-family="system-ui, sans-serif" '
+        f'font-size="{MONTH_LABEL_SIZE}" font-weight="{MONTH_LABEL_WEIGHT}" '
+        f'fill="{MONTH_LABEL_COLOR}">{"".join(labels)}</g>'
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _num(value):
+    """Coordonnée SVG à SVG_PRECISION décimales, sans zéros superflus. Les
+    mêmes ordonnées, hauteurs et rayons reviennent à chaque ligne : mémoïsé."""
+    value = round(value, SVG_PRECISION)
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _rect_path(x, y, w, h, r=0):
+    """Un rectangle (coins arrondis de rayon `r`) en sous-chemin SVG : les
+    rectangles d'une même couleur se concatènent en un seul <path>, au lieu
+    d'un <rect> chacun (cf. _paths_svg). Les coins sont des quadratiques (`q`),
+    plus courtes à écrire qu'un arc et indiscernables à ces rayons."""
+    r = min(r, w / 2, h / 2)
+    if r <= 0:
+        return f"M{_num(x)} {_num(y)}h{_num(w)}v{_num(h)}h{_num(-w)}z"
+    n, m = _num(r), _num(-r)
+    return (
+        f"M{_num(x + r)} {_num(y)}h{_num(w - 2 * r)}q{n} 0 {n} {n}v{_num(h - 2 * r)}"
+        f"q0 {n} {m} {n}h{_num(2 * r - w)}q{m} 0 {m} {m}v{_num(2 * r - h)}q0 {m} {n} {m}z"
+    )
+
+
+def _paths_svg(paths, attr="fill", extra=""):
+    """Un <path> par couleur : `paths` = {couleur: [sous-chemins]}, dans l'ordre
+    d'insertion (celui du dessin)."""
+    return "".join(
+        f'<path d="{"".join(subpaths)}" {attr}="{color}"{extra}/>'
+        for color, subpaths in paths.items() if subpaths
+    )
 
 
 def _hl_frame(x, y, w, h, rx=4):
@@ -746,6 +2077,7 @@ def _track_rect(x, y, w, h, rx, fill, stroke=None):
     return f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{rx}" fill="{fill}"{edge}/>'
 
 
+@timed("render_week_svg")
 def render_week_svg(day_hours, max_hours=BILLABLE_MAX_HOURS, week_max_hours=BILLABLE_WEEK_MAX_HOURS, highlight_label=None, current_hours=0.0, title_label="SEMAINE", show_header=True, month_groups=None, bar_start=None, show_title=True, title_totals=True, title_sep=" : ", future_labels=()):
     """Render a "SEMAINE : total / Nh" header, then one bar per
     (day_label, hours) pair, most recent first. `show_header=False` drops the
@@ -769,6 +2101,16 @@ def render_week_svg(day_hours, max_hours=BILLABLE_MAX_HOURS, week_max_hours=BILL
     Rows are labelled, not dated: /months passes weeks rather than days, hence
     `title_label` for the SVG tooltip.
     """
+    return "".join(iter_week_svg(
+        day_hours, max_hours, week_max_hours, highlight_label, current_hours,
+        title_label, show_header, month_groups, bar_start, show_title,
+        title_totals, title_sep, future_labels,
+    ))
+
+
+def iter_week_svg(day_hours, max_hours=BILLABLE_MAX_HOURS, week_max_hours=BILLABLE_WEEK_MAX_HOURS, highlight_label=None, current_hours=0.0, title_label="SEMAINE", show_header=True, month_groups=None, bar_start=None, show_title=True, title_totals=True, title_sep=" : ", future_labels=()):
+    """render_week_svg() morceau par morceau — ouverture et en-tête, puis une
+    ligne à la fois — pour les pages envoyées en flux (cf. stream_page)."""
     width = 640
     row_h, row_gap = 22, 12
     header_h = 38 if show_header else 0
@@ -786,36 +2128,53 @@ def render_week_svg(day_hours, max_hours=BILLABLE_MAX_HOURS, week_max_hours=BILL
     # deux-points). Le tooltip `title` garde le style « LABEL : … » de toute l'app.
     visible_title = f"{title_label}{title_sep}{_format_hm(total_hours)} / {week_max_hours}h"
 
-    hatch_defs = ""
-    rows_svg = []
+    header_bar = ""
+    if show_header:
+        header_bar = _week_header_bar(
+            total_hours, week_max_hours, WEEK_HOURS_RIGHT_X,
+            bar_end_x=bar_x + bar_w, divisions=5, overflow_max=overflow_max,
+            y=title_h + 4, show_value=not (show_title and title_totals),
+        )
+    month_labels = ""
+    if month_groups:
+        month_labels = _month_labels_svg(
+            month_groups, top, row_h, row_gap, bar_x - MONTH_LABEL_GAP
+        )
+    yield f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <title>{title}</title>
+  <rect width="{width}" height="{height}" fill="#1a1a19"/>
+  {_chart_title_svg(visible_title if title_totals else title_label) if show_title else ''}
+  {header_bar}
+  {month_labels}
+  <g {_ROW_FONT}>"""
+    # barres, débords et repères de fin : un <path> par couleur pour tout le
+    # graphique, émis après la dernière ligne
+    fills, markers = {"#9d9d93": [], "#d9a441": []}, {}
     for i, (label, hours) in enumerate(day_hours):
         y = top + i * (row_h + row_gap)
         ratio = hours / max_hours if max_hours else 0
         inner_h = row_h - 2 * inset
         inner_w = bar_w - 2 * inset
         fill_w = inner_w * min(ratio, 1)
-        fill_rect = ""
         if fill_w > 0:
-            fill_rect = (
-                f'<rect x="{bar_x + inset}" y="{y + inset}" width="{fill_w:.1f}" '
-                f'height="{inner_h}" rx="{corner_radius}" fill="#9d9d93"/>'
+            fills["#9d9d93"].append(
+                _rect_path(bar_x + inset, y + inset, fill_w, inner_h, corner_radius)
             )
         hatch_rect = ""
         if current_hours > 0 and label == highlight_label:
             hatch_w = min(inner_w * (current_hours / max_hours), inner_w - fill_w)
             if hatch_w > 0:
-                hatch_defs = f'<defs>{_hatch_pattern(_BILLABLE_HATCH_ID, "#9d9d93")}</defs>'
+                # le motif est défini juste avant la seule ligne qui s'en sert
+                yield f'<defs>{_hatch_pattern(_BILLABLE_HATCH_ID, "#9d9d93")}</defs>'
                 hatch_rect = (
-                    f'<rect x="{bar_x + inset + fill_w:.1f}" y="{y + inset}" '
-                    f'width="{hatch_w:.1f}" height="{inner_h}" '
+                    f'<rect x="{_num(bar_x + inset + fill_w)}" y="{y + inset}" '
+                    f'width="{_num(hatch_w)}" height="{inner_h}" '
                     f'fill="url(#{_BILLABLE_HATCH_ID})"/>'
                 )
-        overflow_rect = ""
         if ratio > 1:
             overflow_w = overflow_max * min(ratio - 1, 1)
-            overflow_rect = (
-                f'<rect x="{bar_x + bar_w + inset}" y="{y + inset}" width="{overflow_w:.1f}" '
-                f'height="{inner_h}" rx="{corner_radius}" fill="#d9a441"/>'
+            fills["#d9a441"].append(
+                _rect_path(bar_x + bar_w + inset, y + inset, overflow_w, inner_h, corner_radius)
             )
         hours_text = _format_hm(hours)
         hours_w = _text_width(hours_text)
@@ -832,43 +2191,22 @@ def render_week_svg(day_hours, max_hours=BILLABLE_MAX_HOURS, week_max_hours=BILL
             FUTURE_COLORS["stroke"] if future else None,
         )
         marker_color = FUTURE_COLORS["marker"] if future else "#c3c2b7"
+        markers.setdefault(marker_color, []).append(
+            f"M{bar_x + bar_w} {y - 2}V{y + row_h + 2}"
+        )
         hours_fill = FUTURE_COLORS["hours"] if future else "#ffffff"
         hours_svg = "" if hours_fill is None else (
             f'<text x="{WEEK_HOURS_RIGHT_X}" y="{y + row_h - 6}" text-anchor="end" '
-            f'font-family="system-ui, sans-serif" font-size="13" '
             f'fill="{hours_fill}">{hours_text}</text>'
         )
-        rows_svg.append(f'''
+        yield f'''
   {_row_label_svg(label, label_x, bar_x, y + row_h - 6, fill=FUTURE_COLORS["label"] if future else "#c3c2b7")}
   {track}
-  {fill_rect}
   {hatch_rect}
-  <line x1="{bar_x + bar_w}" y1="{y - 2}" x2="{bar_x + bar_w}" y2="{y + row_h + 2}" stroke="{marker_color}" stroke-width="2"/>
-  {overflow_rect}
   {frames}
-  {hours_svg}''')
-
-    header_bar = ""
-    if show_header:
-        header_bar = _week_header_bar(
-            total_hours, week_max_hours, WEEK_HOURS_RIGHT_X,
-            bar_end_x=bar_x + bar_w, divisions=5, overflow_max=overflow_max,
-            y=title_h + 4, show_value=not (show_title and title_totals),
-        )
-    month_labels = ""
-    if month_groups:
-        month_labels = _month_labels_svg(
-            month_groups, top, row_h, row_gap, bar_x - MONTH_LABEL_GAP
-        )
-    return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
-  <title>{title}</title>
-  <rect width="{width}" height="{height}" fill="#1a1a19"/>
-  {_chart_title_svg(visible_title if title_totals else title_label) if show_title else ''}
-  {hatch_defs}
-  {header_bar}
-  {month_labels}
-  {"".join(rows_svg)}
-</svg>"""
+  {hours_svg}'''
+    paths = _paths_svg(fills) + _paths_svg(markers, "stroke", ' stroke-width="2"')
+    yield f"\n  </g>\n  {paths}\n</svg>"
 
 
 # ── Activité par projet (couleurs identiques à `timer day-bars`) ──────────────
@@ -887,22 +2225,6 @@ ACTIVITY_PALETTE = [
 ]
 
 
-def _project_config_colors():
-    """{lowercased pom_project name: color} from projects-config.yml, matching
-    core.plots._project_color_map (pro's [PRO, COLIBRI] → both get pro's red)."""
-    colors = {}
-    for data in (load_projects() or {}).values():
-        if not isinstance(data, dict) or not data.get("color"):
-            continue
-        pom = data.get("pom_project")
-        for name in ([pom] if isinstance(pom, str) else (pom or [])):
-            colors[name.lower()] = data["color"]
-    return colors
-
-
-_PROJECT_CONFIG_COLORS = _project_config_colors()
-
-
 def _project_prefix(project):
     """Top-level project = part before the first '_', as _row_is_billable does."""
     return (project or "").split("_", 1)[0].strip().lower()
@@ -911,8 +2233,9 @@ def _project_prefix(project):
 def project_color(prefix):
     """Same rule as core.plots._project_color_map: config color when defined,
     else a stable md5 hash into the tab20+tab20b palette."""
-    if prefix in _PROJECT_CONFIG_COLORS:
-        return _PROJECT_CONFIG_COLORS[prefix]
+    colors = current_tenant().registry().colors
+    if prefix in colors:
+        return colors[prefix]
     idx = int(hashlib.md5(prefix.encode()).hexdigest(), 16) % len(ACTIVITY_PALETTE)
     return ACTIVITY_PALETTE[idx]
 
@@ -920,31 +2243,21 @@ def project_color(prefix):
 def _ordered_projects(prefixes):
     """Stable order: billable projects first (alpha), then the rest (alpha)."""
     prefixes = set(prefixes)
-    billable = sorted(p for p in prefixes if p in BILLABLE_PROJECTS)
-    other = sorted(p for p in prefixes if p not in BILLABLE_PROJECTS)
+    billable_projects = current_tenant().billable
+    billable = sorted(p for p in prefixes if p in billable_projects)
+    other = sorted(p for p in prefixes if p not in billable_projects)
     return billable + other
 
 
 def _project_billing_config():
-    """{préfixe: (tjm, derniere_facture)} depuis projects-config.yml, même règle
-    de nommage que _project_config_colors(). Un projet sans `tjm` ou sans
-    `derniere_facture` est absent : pas de tarif, pas de montant.
+    """{préfixe: (tjm, derniere_facture)} depuis projects-config.yml. Un projet
+    sans `tjm` ou sans `derniere_facture` est absent : pas de tarif, pas de
+    montant.
 
-    Relu à chaque appel, et non mis en cache comme _PROJECT_CONFIG_COLORS : le
-    reloader Flask ne surveille que les .py, une valeur figée à l'import
-    survivrait donc à l'édition du YAML.
-    """
-    billing = {}
-    for data in (load_projects() or {}).values():
-        if not isinstance(data, dict):
-            continue
-        tjm, since = data.get("tjm"), data.get("derniere_facture")
-        if tjm is None or not since:
-            continue
-        pom = data.get("pom_project")
-        for name in ([pom] if isinstance(pom, str) else (pom or [])):
-            billing[name.lower()] = (float(tjm), str(since))
-    return billing
+    Lu dans le registre à chaque appel, jamais figé à l'import : le reloader
+    Flask ne surveille que les .py, et project_registry() recompile dès que le
+    YAML change."""
+    return current_tenant().registry().billing
 
 
 def _subproject(project):
@@ -952,6 +2265,109 @@ def _subproject(project):
     return (project or "").strip().lower().partition("_")[2]
 
 
+class _PrefixSeries:
+    """Minutes par jour d'un (projet, sous-projet), brutes et arrondies, avec
+    leurs cumuls. Les jours sont triés (YYYYMMDD : ordre lexical = ordre
+    chronologique) ; modifier un jour ne recalcule que les cumuls qui suivent —
+    O(1) pour aujourd'hui, le cas courant."""
+
+    __slots__ = ("days", "values", "cumuls")
+
+    def __init__(self):
+        self.days = []
+        self.values = []  # [(brut, arrondi)] par jour
+        self.cumuls = []  # [(brut, arrondi)] cumulés jusqu'au jour inclus
+
+    def set(self, day, raw, quantized):
+        if not self.days or day > self.days[-1]:
+            # nouveau dernier jour : un cumul de plus, rien à décaler
+            last_raw, last_quantized = self.cumuls[-1] if self.cumuls else (0, 0)
+            self.days.append(day)
+            self.values.append((raw, quantized))
+            self.cumuls.append((last_raw + raw, last_quantized + quantized))
+            return
+        i = bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            self.values[i] = (raw, quantized)
+        else:
+            self.days.insert(i, day)
+            self.values.insert(i, (raw, quantized))
+            self.cumuls.insert(i, (0, 0))
+        self._recumulate(i)
+
+    def remove(self, day):
+        i = bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            del self.days[i], self.values[i], self.cumuls[i]
+            self._recumulate(i)
+
+    def _recumulate(self, start):
+        raw, quantized = self.cumuls[start - 1] if start else (0, 0)
+        for i in range(start, len(self.days)):
+            raw += self.values[i][0]
+            quantized += self.values[i][1]
+            self.cumuls[i] = (raw, quantized)
+
+    def after(self, since, quantize=False):
+        """Minutes des jours postérieurs à `since`, exclu : total − cumul(since)."""
+        which = 1 if quantize else 0
+        i = bisect_right(self.days, since)
+        before = self.cumuls[i - 1][which] if i else 0
+        return (self.cumuls[-1][which] if self.cumuls else 0) - before
+
+
+class ProjectLedger:
+    """Grand livre des minutes par (projet, sous-projet) et par jour, en sommes
+    préfixes : « depuis la dernière facture » est la différence de deux cumuls,
+    quelle que soit la date de coupure et le nombre de projets.
+
+    L'arrondi suit billable_minutes() : chaque (jour, projet, tâche) est porté au
+    quart d'heure supérieur avant de sommer. Chaque (jour, projet, tâche)
+    appartient à un seul sous-projet, si bien que les sous-projets somment
+    exactement au total du projet, arrondi compris."""
+
+    def __init__(self, rows=()):
+        self._series = {}    # {(préfixe, sous-projet): _PrefixSeries}
+        self._day_keys = {}  # {jour: {(préfixe, sous-projet)}} — pour le retirer
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row.get("date") or "", []).append(row)
+        for day, day_rows in by_day.items():
+            self.set_day(day, day_rows)
+
+    def set_day(self, day, rows):
+        """Remplace les minutes du jour `day` par celles de `rows` (ses lignes)."""
+        self.set_day_cells(day, day_cells(rows))
+
+    def set_day_cells(self, day, cells):
+        """Idem depuis les minutes du jour par (projet, tâche), cf. day_cells."""
+        totals = {}
+        for (project, _), minutes in cells.items():
+            key = (_project_prefix(project), _subproject(project))
+            raw, quantized = totals.get(key, (0, 0))
+            totals[key] = (raw + minutes, quantized + -(-minutes // 15) * 15)
+        for key in self._day_keys.get(day, set()) - totals.keys():
+            self._series[key].remove(day)
+        for key, (raw, quantized) in totals.items():
+            self._series.setdefault(key, _PrefixSeries()).set(day, raw, quantized)
+        if totals:
+            self._day_keys[day] = set(totals)
+        else:
+            self._day_keys.pop(day, None)
+
+    def minutes_by_subproject(self, prefix, since, quantize=False):
+        """{sous-projet: minutes} de `prefix` postérieures au jour `since`, exclu —
+        seulement les sous-projets ayant au moins un jour après `since`."""
+        return {
+            sub: series.after(since, quantize)
+            for (p, sub), series in self._series.items()
+            if p == prefix and series.days and series.days[-1] > since
+        }
+
+    def minutes_since(self, prefix, since, quantize=False):
+        return sum(self.minutes_by_subproject(prefix, since, quantize).values())
+
+
 def project_minutes_by_subproject(rows, prefix, since, quantize=False):
     """{sous-projet: minutes} du projet `prefix`, postérieures au jour `since`,
     exclu. Avec `quantize`, arrondit chaque (jour, projet, tâche) au quart
@@ -960,23 +2376,8 @@ def project_minutes_by_subproject(rows, prefix, since, quantize=False):
     Chaque (jour, projet, tâche) appartient à un seul sous-projet : la somme des
     valeurs est donc exactement le total de project_minutes_since(), arrondi
     compris."""
-    by_task = {}
-    for row in rows:
-        if _project_prefix(row.get("project")) != prefix:
-            continue
-        # dates en YYYYMMDD : l'ordre lexical est l'ordre chronologique
-        day = row.get("date") or ""
-        if day <= since:
-            continue
-        key = (day, row.get("project"), row.get("task"))
-        by_task[key] = by_task.get(key, 0) + int(row.get("minutes") or 0)
-    totals = {}
-    for (_, project, _), minutes in by_task.items():
-        if quantize:
-            minutes = -(-minutes // 15) * 15
-        sub = _subproject(project)
-        totals[sub] = totals.get(sub, 0) + minutes
-    return totals
+    ledger = ProjectLedger(r for r in rows if _project_prefix(r.get("project")) == prefix)
+    return ledger.minutes_by_subproject(prefix, since, quantize=quantize)
 
 
 def project_minutes_since(rows, prefix, since, quantize=False):
@@ -986,24 +2387,31 @@ def project_minutes_since(rows, prefix, since, quantize=False):
     )
 
 
-def project_amounts(rows, quantize=False):
+@timed("project_amounts")
+def project_amounts(rows, quantize=False, ledger=None):
     """(préfixe, jours, montant_eur, derniere_facture) pour chaque projet tarifé,
-    dans l'ordre de _ordered_projects()."""
+    dans l'ordre de _ordered_projects(). `ledger` : le grand livre déjà tenu à
+    jour pour `rows` (RowStore.ledger) ; à défaut, construit en une passe."""
     billing = _project_billing_config()
+    if ledger is None:
+        ledger = ProjectLedger(rows)
     amounts = []
     for prefix in _ordered_projects(billing):
         tjm, since = billing[prefix]
-        minutes = project_minutes_since(rows, prefix, since, quantize=quantize)
+        minutes = ledger.minutes_since(prefix, since, quantize=quantize)
         days = minutes / 60 / HOURS_PER_DAY
         amounts.append((prefix, days, days * tjm, since))
     return amounts
 
 
-def project_subamounts(rows, prefix, tjm, since, quantize=False):
+def project_subamounts(rows, prefix, tjm, since, quantize=False, ledger=None):
     """(sous-projet, jours, montant_eur) par sous-projet de `prefix`, du plus
     consommé au moins consommé. Vide quand le projet n'a qu'un sous-projet : la
     ligne projet dit déjà tout, /projects n'affiche alors pas de détail."""
-    totals = project_minutes_by_subproject(rows, prefix, since, quantize=quantize)
+    if ledger is None:
+        totals = project_minutes_by_subproject(rows, prefix, since, quantize=quantize)
+    else:
+        totals = ledger.minutes_by_subproject(prefix, since, quantize=quantize)
     if len(totals) < 2:
         return []
     subs = []
@@ -1032,35 +2440,123 @@ def activity_by_project(rows, day):
     return totals
 
 
-def activity_week_days(rows, last_day):
-    """(day_label, {project: minutes}) per day from `last_day` down to its
-    week's Monday, most recent first."""
-    monday, _ = current_week_bounds(last_day)
-    days, day = [], last_day
-    while day >= monday:
-        totals = activity_by_project(rows, day.strftime("%Y%m%d"))
-        days.append((day_label(day), totals))
-        day -= timedelta(days=1)
-    return days
+EMPTY_ROLLUP = (0, 0, {})
+AGGREGATE_BUCKETS = ("day", "week", "month")
+AGGREGATE_GROUPS = ("", "prefix", "project", "task")
+AGGREGATE_METRICS = ("billable", "activity")
+AGGREGATE_YEARS = (2000, 2100)  # bornes de /api/aggregate (from, to)
+
+
+def day_cells(rows):
+    """Minutes d'un jour par (projet, tâche) — la maille de tous les agrégats :
+    l'arrondi au quart d'heure s'applique à chacune."""
+    cells = {}
+    for row in rows:
+        key = (row.get("project") or "", row.get("task") or "")
+        cells[key] = cells.get(key, 0) + int(row.get("minutes") or 0)
+    return cells
+
+
+def _cell_counts(project, metric, billable=None):
+    if metric == "billable":
+        return _row_is_billable({"project": project}, billable)
+    prefix = _project_prefix(project)
+    return bool(prefix) and prefix != "nan"
+
+
+def _cell_groups(cells, group, metric, quantize):
+    """{clé de groupe: minutes} d'un jour, depuis ses day_cells()."""
+    groups = {}
+    billable = current_tenant().billable if metric == "billable" else None
+    for (project, task), minutes in cells.items():
+        if not _cell_counts(project, metric, billable):
+            continue
+        if quantize:
+            minutes = -(-minutes // 15) * 15
+        if group == "prefix":
+            name = _project_prefix(project)
+        elif group == "project":
+            name = project
+        elif group == "task":
+            name = f"{project}/{task}"
+        else:
+            name = ""
+        groups[name] = groups.get(name, 0) + minutes
+    return {name: minutes for name, minutes in groups.items() if minutes}
+
+
+def _rollup_groups(rollup, group, metric, quantize):
+    """Ce que `rollup` (un day_rollup ou leur somme) sait répondre pour ces
+    paramètres de RowStore.aggregate, None s'il faut redescendre aux cells."""
+    raw, quantized, activity = rollup
+    if metric == "billable" and not group:
+        minutes = quantized if quantize else raw
+    elif metric == "activity" and not quantize and group == "prefix":
+        return {prefix: minutes for prefix, minutes in activity.items() if minutes}
+    elif metric == "activity" and not quantize and not group:
+        minutes = sum(activity.values())
+    else:
+        return None
+    return {"": minutes} if minutes else {}
+
+
+def _buckets(first, last, bucket):
+    """(clé, premier jour, dernier jour) des semaines ou des mois qui
+    recoupent first..last, dans l'ordre."""
+    if bucket == "week":
+        start = calendar_day(first).monday
+        while start <= last:
+            yield calendar_day(start).monday_key, start, start + timedelta(days=6)
+            start += timedelta(days=7)
+    else:
+        start = month_start(first)
+        while start <= last:
+            after = month_start(start, -1)
+            yield calendar_day(start).month_key, start, after - timedelta(days=1)
+            start = after
+
+
+def day_rollup(rows):
+    """Agrégat d'un jour à partir de ses lignes : (minutes facturables brutes,
+    minutes facturables arrondies, {préfixe: minutes}) — soit billable_minutes()
+    sans puis avec `quantize`, et activity_by_project(), en une passe sur ses
+    day_cells()."""
+    cells = day_cells(rows)
+    return (
+        _cell_groups(cells, "", "billable", False).get("", 0),
+        _cell_groups(cells, "", "billable", True).get("", 0),
+        _cell_groups(cells, "prefix", "activity", False),
+    )
+
+
+def sum_rollups(rollups):
+    """Somme de plusieurs day_rollup() (une semaine, un mois)."""
+    raw, quantized, activity = 0, 0, {}
+    for r_raw, r_quantized, r_activity in rollups:
+        raw += r_raw
+        quantized += r_quantized
+        for prefix, minutes in r_activity.items():
+            activity[prefix] = activity.get(prefix, 0) + minutes
+    return raw, quantized, activity
 
 
-def _activity_segments(totals, x0, inner_w, inner_y, inner_h, max_hours):
-    """Colored <rect> segments for one stacked bar, stable order, clamped to
-    the bar width (a day past `max_hours` is cut rather than overflowing)."""
-    segs = []
+def _activity_segments(totals, x0, inner_w, inner_y, inner_h, max_hours, paths=None):
+    """Colored segments for one stacked bar, stable order, clamped to the bar
+    width (a day past `max_hours` is cut rather than overflowing), added to
+    `paths` ({couleur: [sous-chemins]}, cf. _paths_svg) — several bars share
+    one <path> per project."""
+    paths = {} if paths is None else paths
     x, x_max = x0, x0 + inner_w
     for prefix in _ordered_projects(totals):
         seg_w = min(inner_w * (totals[prefix] / 60 / max_hours), x_max - x)
         if seg_w <= 0:
             continue
-        segs.append(
-            f'<rect x="{x:.1f}" y="{inner_y}" width="{seg_w:.1f}" '
-            f'height="{inner_h}" fill="{project_color(prefix)}"/>'
-        )
+        paths.setdefault(project_color(prefix), []).append(_rect_path(x, inner_y, seg_w, inner_h))
         x += seg_w
-    return "".join(segs), x - x0  # segments + largeur réellement remplie
+    return paths, x - x0  # segments + largeur réellement remplie
 
 
+@timed("render_activity_svg")
 def render_activity_svg(totals, max_hours=ACTIVITY_MAX_HOURS):
     """Single stacked horizontal bar of the day's activity by project, same
     box/geometry as render_billable_svg, scaled to `max_hours`."""
@@ -1078,15 +2574,16 @@ def render_activity_svg(totals, max_hours=ACTIVITY_MAX_HOURS):
     segs, fill_w = _activity_segments(totals, inner_x, inner_w, inner_y, inner_h, max_hours)
     return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
   <title>{title}</title>
-  <defs><clipPath id="actbar"><rect x="{inner_x}" y="{inner_y}" width="{fill_w:.1f}" height="{inner_h}" rx="{corner_radius}"/></clipPath></defs>
+  <defs><clipPath id="actbar"><rect x="{inner_x}" y="{inner_y}" width="{_num(fill_w)}" height="{inner_h}" rx="{corner_radius}"/></clipPath></defs>
   <rect width="{width}" height="{height}" fill="#1a1a19"/>
   <text x="{bar_x}" y="30" font-family="system-ui, sans-serif" font-size="18" fill="#ffffff">{title}</text>
   <rect x="{bar_x}" y="{bar_y}" width="{bar_w}" height="{bar_h}" rx="{corner_radius}" fill="#2b2b28"/>
-  <g clip-path="url(#actbar)">{segs}</g>
+  <g clip-path="url(#actbar)">{_paths_svg(segs)}</g>
   {ticks}
 </svg>"""
 
 
+@timed("render_activity_week_svg")
 def render_activity_week_svg(days, max_hours=ACTIVITY_MAX_HOURS, uid="", highlight_label=None, week_max_hours=ACTIVITY_WEEK_MAX_HOURS, current_hours=0.0, current_prefix=None, title_label="ACTIVITÉ SEMAINE", show_header=True, month_groups=None, bar_start=None, show_title=True, title_totals=True, title_sep=" : ", future_labels=()):
     """One stacked activity bar per day (most recent first). Row geometry
     matches render_week_svg so the two week charts line up side by side —
@@ -1105,6 +2602,15 @@ def render_activity_week_svg(days, max_hours=ACTIVITY_MAX_HOURS, uid="", highlig
 
     Rows are labelled, not dated: /months passes weeks rather than days, hence
     `title_label` for the SVG tooltip."""
+    return "".join(iter_activity_week_svg(
+        days, max_hours, uid, highlight_label, week_max_hours, current_hours,
+        current_prefix, title_label, show_header, month_groups, bar_start,
+        show_title, title_totals, title_sep, future_labels,
+    ))
+
+
+def iter_activity_week_svg(days, max_hours=ACTIVITY_MAX_HOURS, uid="", highlight_label=None, week_max_hours=ACTIVITY_WEEK_MAX_HOURS, current_hours=0.0, current_prefix=None, title_label="ACTIVITÉ SEMAINE", show_header=True, month_groups=None, bar_start=None, show_title=True, title_totals=True, title_sep=" : ", future_labels=()):
+    """render_activity_week_svg() morceau par morceau, cf. iter_week_svg."""
     width = 640
     row_h, row_gap = 22, 12
     header_h = 38 if show_header else 0
@@ -1119,22 +2625,44 @@ def render_activity_week_svg(days, max_hours=ACTIVITY_MAX_HOURS, uid="", highlig
     title = f"{title_label} : {_format_hm(week_total)} / {week_max_hours}h"
     # cf. render_week_svg : titre visible à séparateur libre, tooltip « LABEL : … »
     visible_title = f"{title_label}{title_sep}{_format_hm(week_total)} / {week_max_hours}h"
-    hatch_defs = ""
-    rows_svg = []
+    header_bar = ""
+    if show_header:
+        header_bar = _week_header_bar(
+            week_total, week_max_hours, WEEK_HOURS_RIGHT_X,
+            bar_end_x=bar_x + bar_w, divisions=5, y=title_h + 4,
+            show_value=not (show_title and title_totals),
+        )
+    month_labels = ""
+    if month_groups:
+        month_labels = _month_labels_svg(
+            month_groups, top, row_h, row_gap, bar_x - MONTH_LABEL_GAP
+        )
+    yield f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <title>{title}</title>
+  <rect width="{width}" height="{height}" fill="#1a1a19"/>
+  {_chart_title_svg(visible_title if title_totals else title_label) if show_title else ''}
+  {header_bar}
+  {month_labels}
+  <g {_ROW_FONT}>"""
+    # segments de toutes les lignes : un <path> par projet, sous un seul
+    # clipPath (l'union des barres arrondies), émis après la dernière ligne
+    segs, clips = {}, []
     for i, (label, totals) in enumerate(days):
         y = top + i * (row_h + row_gap)
         inner_x, inner_w = bar_x + inset, bar_w - 2 * inset
         inner_y, inner_h = y + inset, row_h - 2 * inset
-        segs, fill_w = _activity_segments(totals, inner_x, inner_w, inner_y, inner_h, max_hours)
+        _, fill_w = _activity_segments(totals, inner_x, inner_w, inner_y, inner_h, max_hours, segs)
+        if fill_w > 0:
+            clips.append(_rect_path(inner_x, inner_y, fill_w, inner_h, corner_radius))
         hatch_rect = ""
         if current_hours > 0 and current_prefix and label == highlight_label:
             hatch_w = min(inner_w * (current_hours / max_hours), inner_w - fill_w)
             if hatch_w > 0:
                 hid = f"acthatch{uid}"
-                hatch_defs = f'<defs>{_hatch_pattern(hid, project_color(current_prefix))}</defs>'
+                yield f'<defs>{_hatch_pattern(hid, project_color(current_prefix))}</defs>'
                 hatch_rect = (
-                    f'<rect x="{inner_x + fill_w:.1f}" y="{inner_y}" '
-                    f'width="{hatch_w:.1f}" height="{inner_h}" fill="url(#{hid})"/>'
+                    f'<rect x="{_num(inner_x + fill_w)}" y="{inner_y}" '
+                    f'width="{_num(hatch_w)}" height="{inner_h}" fill="url(#{hid})"/>'
                 )
         hours_text = _format_hm(sum(totals.values()) / 60)
         hours_w = _text_width(hours_text)
@@ -1153,40 +2681,22 @@ def render_activity_week_svg(days, max_hours=ACTIVITY_MAX_HOURS, uid="", highlig
         hours_fill = FUTURE_COLORS["hours"] if future else "#ffffff"
         hours_svg = "" if hours_fill is None else (
             f'<text x="{WEEK_HOURS_RIGHT_X}" y="{y + row_h - 6}" text-anchor="end" '
-            f'font-family="system-ui, sans-serif" font-size="13" '
             f'fill="{hours_fill}">{hours_text}</text>'
         )
-        rows_svg.append(f'''
+        yield f'''
   {_row_label_svg(label, label_x, bar_x, y + row_h - 6, fill=FUTURE_COLORS["label"] if future else "#c3c2b7")}
   {track}
-  <defs><clipPath id="actwk{uid}{i}"><rect x="{inner_x}" y="{inner_y}" width="{fill_w:.1f}" height="{inner_h}" rx="{corner_radius}"/></clipPath></defs>
-  <g clip-path="url(#actwk{uid}{i})">{segs}</g>
   {hatch_rect}
   {frames}
-  {hours_svg}''')
-    header_bar = ""
-    if show_header:
-        header_bar = _week_header_bar(
-            week_total, week_max_hours, WEEK_HOURS_RIGHT_X,
-            bar_end_x=bar_x + bar_w, divisions=5, y=title_h + 4,
-            show_value=not (show_title and title_totals),
-        )
-    month_labels = ""
-    if month_groups:
-        month_labels = _month_labels_svg(
-            month_groups, top, row_h, row_gap, bar_x - MONTH_LABEL_GAP
-        )
-    return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
-  <title>{title}</title>
-  <rect width="{width}" height="{height}" fill="#1a1a19"/>
-  {_chart_title_svg(visible_title if title_totals else title_label) if show_title else ''}
-  {hatch_defs}
-  {header_bar}
-  {month_labels}
-  {"".join(rows_svg)}
-</svg>"""
+  {hours_svg}'''
+    yield f'''
+  </g>
+  <defs><clipPath id="actwk{uid}"><path d="{"".join(clips)}"/></clipPath></defs>
+  <g clip-path="url(#actwk{uid})">{_paths_svg(segs)}</g>
+</svg>'''
 
 
+@timed("render_activity_legend_svg")
 def render_activity_legend_svg(prefixes):
     """Horizontal legend (swatch + project name) in the given order, wrapping
     past the two-chart width."""
@@ -1216,11 +2726,25 @@ def render_activity_legend_svg(prefixes):
 
 
 ROWS_SHOWN = 50  # /rows : nb de lignes affichées par défaut (surchargé par ?n=N)
-ROWS_MAX = 500
+ROWS_MAX = 500  # par page : les suivantes se parcourent par ?before= / ?after=
 
 SWIMLANE_DAYS = 10  # nb de jours par défaut (surchargé par ?d=N)
-SWIMLANE_MIN_DAYS, SWIMLANE_MAX_DAYS = 1, 60  # bornes du sélecteur −1/+1
+SWIMLANE_MIN_DAYS, SWIMLANE_MAX_DAYS = 1, 730  # bornes du sélecteur −1/+1
+SWIMLANE_PRESETS = (10, 30, 90, 365)  # raccourcis de la barre de navigation
 SWIMLANE_HOUR_MIN, SWIMLANE_HOUR_MAX = 6, 24
+# Hauteur du graphique bornée : au-delà de SWIMLANE_MAX_HEIGHT / 30 jours, les
+# lignes s'affinent (2 px au moins) ; sous SWIMLANE_DETAIL_MIN_ROW_H px, chaque
+# jour est résumé par heure et par projet (cf. swimlane_hour_buckets), sans
+# étiquettes de minutes.
+SWIMLANE_MAX_HEIGHT = 1500
+SWIMLANE_DETAIL_MIN_ROW_H = 14
+# /swimlane?blocks=1 : sessions fusionnées en blocs de travail (core.blocks)
+# tant que la pause qui les sépare ne dépasse pas BLOCK_GAP_MINUTES.
+BLOCK_GAP_MINUTES = int(_config.get("BLOCK_GAP_MINUTES", DEFAULT_GAP_MINUTES))
+
+HEATMAP_WEEKS = 52  # /heatmap : période par défaut, jusqu'à aujourd'hui
+HEATMAP_BINS = (24, 96)  # tranches par jour : heures ou quarts d'heure (?bins=96)
+WEEK_MINUTES = 7 * 24 * 60
 
 
 def _hhmm_to_hours(value):
@@ -1232,109 +2756,284 @@ def _hhmm_to_hours(value):
         return None
 
 
-def swimlane_days(rows, last_day, n=SWIMLANE_DAYS):
-    """`n` days ending at `last_day`, most recent first. Each entry is
-    (label, is_weekend, sessions) with sessions a list of
-    (start_h, end_h, minutes, prefix) in decimal hours of the day. Days with no
-    activity keep an empty session list (blank row, cf. critère 2)."""
-    by_date = {}
+def day_sessions(rows):
+    """Sessions d'un jour pour le swimlane : (start_h, end_h, minutes, prefix)
+    in decimal hours of the day, nan/empty projects and unparseable times
+    skipped."""
+    sessions = []
     for row in rows:
-        by_date.setdefault(row.get("date"), []).append(row)
+        prefix = _project_prefix(row.get("project"))
+        if not prefix or prefix == "nan":
+            continue
+        start_h = _hhmm_to_hours(row.get("startTime"))
+        end_h = _hhmm_to_hours(row.get("endTime"))
+        if start_h is None or end_h is None:
+            continue
+        minutes = int(row.get("minutes") or 0)
+        if end_h <= start_h:  # passage minuit / trame courte, cf. core.plots
+            end_h = start_h + minutes / 60
+        sessions.append((start_h, end_h, minutes, prefix))
+    return sessions
+
+
+def _swimlane_rows(n):
+    """Géométrie des lignes du swimlane pour `n` jours : (pas vertical, hauteur
+    de barre, détaillé ?). 30 px par jour tant que SWIMLANE_MAX_HEIGHT le
+    permet, puis moins (2 px au moins) ; détaillé au-dessus de
+    SWIMLANE_DETAIL_MIN_ROW_H px de barre."""
+    pitch = max(2, min(30, SWIMLANE_MAX_HEIGHT // max(n, 1)))
+    row_h = pitch - max(1, round(pitch / 5))
+    return pitch, row_h, row_h >= SWIMLANE_DETAIL_MIN_ROW_H
+
+
+def day_blocks(day, sessions, gap_minutes=BLOCK_GAP_MINUTES):
+    """Les sessions d'un jour (cf. day_sessions, triées par début) fusionnées en
+    blocs de travail (core.blocks.work_blocks), au même format : un bloc =
+    (start_h, end_h, minutes actives, projet principal)."""
+    midnight = datetime.combine(day, dtime())
+    blocks = work_blocks(
+        (
+            (midnight + timedelta(hours=start_h), midnight + timedelta(hours=end_h), minutes, prefix)
+            for start_h, end_h, minutes, prefix in sessions
+        ),
+        gap_minutes,
+    )
+    return [
+        ((b.start - midnight).total_seconds() / 3600, (b.end - midnight).total_seconds() / 3600,
+         b.minutes, main_project(b))
+        for b in blocks
+    ]
+
+
+def swimlane_days(store, last_day, n=SWIMLANE_DAYS, blocks=False):
+    """`n` days ending at `last_day`, most recent first, read from the
+    RowStore's per-day index (RowStore.lane) — one lookup per day shown,
+    whatever the history length. Each entry is (label, is_weekend, sessions)
+    with sessions a list of (start_h, end_h, minutes, prefix) in decimal hours
+    of the day — their hourly summary when `n` days are too many for the
+    detailed view (cf. _swimlane_rows), their work blocks with `blocks`
+    (day_blocks). Days with no activity keep an empty session list (blank row,
+    cf. critère 2)."""
+    summary = not blocks and not _swimlane_rows(n)[2]
     days = []
     for i in range(n):
-        day = last_day - timedelta(days=i)
-        sessions = []
-        for row in by_date.get(day.strftime("%Y%m%d"), []):
-            prefix = _project_prefix(row.get("project"))
-            if not prefix or prefix == "nan":
-                continue
-            start_h = _hhmm_to_hours(row.get("startTime"))
-            end_h = _hhmm_to_hours(row.get("endTime"))
-            if start_h is None or end_h is None:
-                continue
-            minutes = int(row.get("minutes") or 0)
-            if end_h <= start_h:  # passage minuit / trame courte, cf. core.plots
-                end_h = start_h + minutes / 60
-            sessions.append((start_h, end_h, minutes, prefix))
-        label = f"{_FR_WEEKDAYS[day.weekday()][:3].lower()}. {day.strftime('%d/%m')}"
-        days.append((label, day.weekday() >= 5, sessions))
+        cal = calendar_day(last_day - timedelta(days=i))
+        sessions = store.lane(cal.key, summary)
+        if blocks:
+            sessions = day_blocks(cal.date, sessions)
+        days.append((cal.short_label, cal.weekend, sessions))
     return days
 
 
+def swimlane_hour_buckets(sessions):
+    """Résumé d'un jour pour le swimlane à faible niveau de détail : les
+    minutes de chaque projet dans chaque heure, empilées au début de l'heure,
+    au format des sessions (start_h, end_h, minutes, prefix). Au plus un
+    segment par (heure, projet), quel que soit le nombre de sessions."""
+    buckets = {}
+    for start_h, end_h, _, prefix in sessions:
+        hour = int(start_h)
+        while hour < end_h:
+            overlap = min(end_h, hour + 1) - max(start_h, hour)
+            if overlap > 0:
+                cell = buckets.setdefault(hour, {})
+                cell[prefix] = cell.get(prefix, 0) + overlap * 60
+            hour += 1
+    summary = []
+    for hour in sorted(buckets):
+        x = hour
+        for prefix in _ordered_projects(buckets[hour]):
+            minutes = buckets[hour][prefix]
+            end = min(x + minutes / 60, hour + 1)
+            summary.append((x, end, round(minutes), prefix))
+            x = end
+    return summary
+
+
+@timed("render_swimlane_svg")
 def render_swimlane_svg(days):
     """Gantt-style swimlane: one row per day (most recent first), colored bars
     positioned by hour of day (6h→24h), same dark theme as the activity charts.
-    Reuses project_color so colors match /activity."""
+    Reuses project_color so colors match /activity.
+
+    La hauteur totale reste sous SWIMLANE_MAX_HEIGHT : les lignes s'affinent
+    avec le nombre de jours (_swimlane_rows) et, trop fines pour le détail,
+    perdent étiquettes de minutes et coins arrondis — swimlane_days leur passe
+    alors le résumé horaire — les étiquettes de jour s'espaçant pour rester
+    lisibles."""
     width = 960
     label_x, bar_x, bar_w = 20, 100, 840
     hmin, hmax = SWIMLANE_HOUR_MIN, SWIMLANE_HOUR_MAX
     span = hmax - hmin
-    row_h, row_gap, top = 24, 6, 60
-    height = top + len(days) * (row_h + row_gap) + 10
+    top = 60
+    pitch, row_h, detailed = _swimlane_rows(len(days))
+    inset, radius = (3, 2) if detailed else (0, 0)
+    label_size = 12 if detailed else 10
+    label_every = 1 if detailed else -(-(label_size + 2) // pitch)
+    height = top + len(days) * pitch + 10
 
     def hx(h):
         h = max(hmin, min(h, hmax))
         return bar_x + (h - hmin) / span * bar_w
 
-    tracks, bars = [], []
+    # Pistes : un <use> du même fond (un sous-chemin en résumé) ; sessions : un
+    # <path> par projet ; étiquettes : des <text> nus dans un <g> qui porte leur
+    # police — soit quelques nœuds par ligne plutôt que deux par session.
+    tracks, track_paths, labels, bars, minutes_labels = [], {}, [], {}, []
+    colors = {}  # project_color relit la config : une fois par projet
     for i, (label, is_we, sessions) in enumerate(days):
-        y = top + i * (row_h + row_gap)
+        y = top + i * pitch
         track_fill = "#201f1d" if is_we else "#2b2b28"
         label_fill = "#6f6e66" if is_we else "#c3c2b7"
-        tracks.append(
-            f'<rect x="{bar_x}" y="{y}" width="{bar_w}" height="{row_h}" rx="4" fill="{track_fill}"/>'
-        )
-        tracks.append(
-            f'<text x="{label_x}" y="{y + row_h - 7}" font-family="monospace" '
-            f'font-size="12" fill="{label_fill}">{label}</text>'
-        )
+        if detailed:
+            tracks.append(f'<use href="#swl-track" y="{y}" fill="{track_fill}"/>')
+        else:
+            track_paths.setdefault(track_fill, []).append(_rect_path(bar_x, y, bar_w, row_h))
+        if i % label_every == 0:
+            baseline = y + row_h - 7 if detailed else y + row_h / 2 + label_size / 3
+            labels.append(
+                f'<text x="{label_x}" y="{_num(baseline)}" fill="{label_fill}">{label}</text>'
+            )
         for start_h, end_h, minutes, prefix in sessions:
             x0, x1 = hx(start_h), hx(end_h)
             if x1 - x0 < 0.5:
                 continue
-            bars.append(
-                f'<rect x="{x0:.1f}" y="{y + 3}" width="{x1 - x0:.1f}" '
-                f'height="{row_h - 6}" rx="2" fill="{project_color(prefix)}"/>'
+            if prefix not in colors:
+                colors[prefix] = project_color(prefix)
+            bars.setdefault(colors[prefix], []).append(
+                _rect_path(x0, y + inset, x1 - x0, row_h - 2 * inset, radius)
             )
-            if x1 - x0 > 24:  # ~30 min : assez large pour un label lisible
-                bars.append(
-                    f'<text x="{(x0 + x1) / 2:.1f}" y="{y + row_h - 8}" '
-                    f'text-anchor="middle" font-family="system-ui, sans-serif" '
-                    f'font-size="9" fill="#ffffff" font-weight="bold">{minutes}m</text>'
+            if detailed and x1 - x0 > 24:  # ~30 min : assez large pour un label lisible
+                minutes_labels.append(
+                    f'<text x="{_num((x0 + x1) / 2)}" y="{y + row_h - 8}">{minutes}m</text>'
                 )
 
-    grid = []
+    grid_path, grid_labels = [], []
     for h in range(hmin, hmax + 1, 2):
-        gx = bar_x + (h - hmin) / span * bar_w
-        grid.append(
-            f'<line x1="{gx:.1f}" y1="{top - 6}" x2="{gx:.1f}" y2="{height - 8}" '
-            f'stroke="#383835" stroke-width="1" stroke-dasharray="2 3" opacity=".6"/>'
-        )
-        grid.append(
-            f'<text x="{gx:.1f}" y="{top - 12}" text-anchor="middle" '
-            f'font-family="system-ui, sans-serif" font-size="11" fill="#7a7a72">{h:02d}h</text>'
-        )
+        gx = _num(bar_x + (h - hmin) / span * bar_w)
+        grid_path.append(f"M{gx} {top - 6}V{height - 8}")
+        grid_labels.append(f'<text x="{gx}">{h:02d}h</text>')
 
     title = f"SWIMLANE · {len(days)} DERNIERS JOURS"
     return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
   <title>{title}</title>
+  <defs><rect id="swl-track" x="{bar_x}" width="{bar_w}" height="{row_h}" rx="4"/></defs>
   <rect width="{width}" height="{height}" fill="#1a1a19"/>
   <text x="{label_x}" y="30" font-family="system-ui, sans-serif" font-size="18" fill="#ffffff">{title}</text>
+  {"".join(tracks)}{_paths_svg(track_paths)}
+  <g font-family="monospace" font-size="{label_size}">{"".join(labels)}</g>
+  <path d="{"".join(grid_path)}" stroke="#383835" stroke-width="1" stroke-dasharray="2 3" opacity=".6"/>
+  <g text-anchor="middle" font-family="system-ui, sans-serif" font-size="11" fill="#7a7a72" transform="translate(0 {top - 12})">{"".join(grid_labels)}</g>
+  {_paths_svg(bars)}
+  <g text-anchor="middle" font-family="system-ui, sans-serif" font-size="9" fill="#ffffff" font-weight="bold">{"".join(minutes_labels)}</g>
+</svg>"""
+
+
+def heatmap_grid(rows, bins=24):
+    """Minutes d'activité par (jour de la semaine, tranche de la journée) : 7
+    listes de `bins` valeurs, lundi d'abord. Une session à cheval sur deux
+    tranches (ou sur minuit) est répartie à la minute près.
+
+    Une seule passe sur les lignes : chaque session pose +1 à sa minute de
+    début et −1 à sa minute de fin dans un tableau de différences sur la
+    semaine (10 080 minutes) ; la somme cumulée donne le nombre de sessions
+    actives à chaque minute, qu'il reste à sommer par tranche. Le coût ne
+    dépend que du nombre de sessions, pas du nombre de jours couverts."""
+    diff = [0] * (WEEK_MINUTES + 1)
+    for row in rows:
+        prefix = _project_prefix(row.get("project"))
+        day = _day_date(row.get("date") or "")
+        start_h = _hhmm_to_hours(row.get("startTime"))
+        end_h = _hhmm_to_hours(row.get("endTime"))
+        if not prefix or prefix == "nan" or day is None or start_h is None or end_h is None:
+            continue
+        if end_h <= start_h:  # passage minuit / trame courte, cf. swimlane_days
+            end_h = start_h + int(row.get("minutes") or 0) / 60
+        start = day.weekday() * 1440 + round(start_h * 60)
+        # une session de plus d'une semaine (minutes aberrantes) couvre toute
+        # la semaine une fois, pas davantage : un seul retour au lundi suffit
+        end = min(day.weekday() * 1440 + round(end_h * 60), start + WEEK_MINUTES)
+        if end <= start:
+            continue
+        if end > WEEK_MINUTES:  # dimanche soir → lundi matin
+            diff[start] += 1
+            diff[WEEK_MINUTES] -= 1
+            start, end = 0, end - WEEK_MINUTES
+        diff[start] += 1
+        diff[end] -= 1
+    active = list(accumulate(diff[:WEEK_MINUTES]))
+    width = 1440 // bins
+    return [
+        [sum(active[day * 1440 + i * width:day * 1440 + (i + 1) * width]) for i in range(bins)]
+        for day in range(7)
+    ]
+
+
+@timed("render_heatmap_svg")
+def render_heatmap_svg(grid, title, color="#3987e5"):
+    """Heatmap jour de la semaine × heure : une ligne par jour (lundi en
+    haut), une case par tranche, d'autant plus opaque qu'elle cumule de
+    minutes ; la case la plus chargée est pleine. Survol : le total."""
+    width = 960
+    label_x, grid_x, grid_w = 20, 100, 840
+    row_h, row_gap, top = 28, 4, 60
+    bins = len(grid[0])
+    cell_w = grid_w / bins
+    height = top + 7 * (row_h + row_gap) + 10
+    peak = max(max(day) for day in grid) or 1
+
+    tracks, cells = [], []
+    for d, minutes_by_bin in enumerate(grid):
+        y = top + d * (row_h + row_gap)
+        weekend = d >= 5
+        tracks.append(
+            f'<rect x="{grid_x}" y="{y}" width="{grid_w}" height="{row_h}" rx="4" '
+            f'fill="{"#201f1d" if weekend else "#2b2b28"}"/>'
+        )
+        tracks.append(
+            f'<text x="{label_x}" y="{y + row_h - 9}" font-family="monospace" font-size="12" '
+            f'fill="{"#6f6e66" if weekend else "#c3c2b7"}">{_FR_WEEKDAYS[d][:3].lower()}.</text>'
+        )
+        for i, minutes in enumerate(minutes_by_bin):
+            if not minutes:
+                continue
+            start = i * 1440 // bins
+            cells.append(
+                f'<rect x="{grid_x + i * cell_w:.1f}" y="{y}" width="{cell_w:.1f}" height="{row_h}" '
+                f'fill="{color}" fill-opacity="{0.12 + 0.88 * minutes / peak:.2f}">'
+                f'<title>{_FR_WEEKDAYS[d]} {start // 60:02d}:{start % 60:02d} : '
+                f'{_format_hm(minutes / 60)}</title></rect>'
+            )
+
+    grid_lines = []
+    for h in range(0, 25, 2):
+        gx = grid_x + h / 24 * grid_w
+        grid_lines.append(
+            f'<text x="{gx:.1f}" y="{top - 12}" text-anchor="middle" '
+            f'font-family="system-ui, sans-serif" font-size="11" fill="#7a7a72">{h:02d}h</text>'
+        )
+    return f"""<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <title>{html.escape(title)}</title>
+  <rect width="{width}" height="{height}" fill="#1a1a19"/>
+  <text x="{label_x}" y="30" font-family="system-ui, sans-serif" font-size="18" fill="#ffffff">{html.escape(title)}</text>
   {"".join(tracks)}
-  {"".join(grid)}
-  {"".join(bars)}
+  {"".join(cells)}
+  {"".join(grid_lines)}
 </svg>"""
 
 
 def _menu_bar(prefix, active):
-    """Shared top navigation across /live, /weeks, /months, /swimlane, /rows and
-    /projects. `active` is one of 'live' | 'weeks' | 'month' | 'swimlane' |
-    'rows' | 'projects' and gets the highlighted pill."""
+    """Shared top navigation across /live, /weeks, /months, /years, /swimlane,
+    /heatmap, /rows and /projects. `active` is one of 'live' | 'weeks' | 'month'
+    | 'years' | 'swimlane' | 'heatmap' | 'rows' | 'projects' and gets the
+    highlighted pill."""
     items = [
         ("live", "Live", f"{prefix}/live"),
         ("weeks", "Semaines", f"{prefix}/weeks"),
         ("month", "Mois", f"{prefix}/months"),
+        ("years", "Années", f"{prefix}/years"),
         ("swimlane", "Swimlane", f"{prefix}/swimlane"),
+        ("heatmap", "Heatmap", f"{prefix}/heatmap"),
         ("rows", "Lignes", f"{prefix}/rows"),
         ("projects", "Projets", f"{prefix}/projects"),
     ]
@@ -1360,14 +3059,60 @@ def _round_toggle_html(enabled):
     )
 
 
+# Pomofocus renvoie parfois la même trame pause/finish (reprise après
+# reconnexion…). Chaque doublon coûterait une relecture + réécriture complète du
+# CSV pour rien : les trames déjà écrites sont mémorisées (LRU borné) et les
+# doublons exacts s'arrêtent avant toute I/O CSV. Le journal JSONL, lui, garde
+# tout : c'est la capture brute.
+DEDUP_CACHE_SIZE = 512
+_SEEN_EVENTS = OrderedDict()  # {empreinte de trame: (chemin du CSV, jour)}
+
+
+def forget_seen_events(csv_path, days=None):
+    """Oublie les trames vues pour les jours `days` (None : tous) du CSV
+    `csv_path` : après une édition, leur relivraison n'est plus un doublon."""
+    path = str(csv_path)
+    for fingerprint, (seen_path, day) in list(_SEEN_EVENTS.items()):
+        if seen_path == path and (days is None or day in days):
+            _SEEN_EVENTS.pop(fingerprint, None)
+
+
+def event_fingerprint(payload, csv_path):
+    """Empreinte de la trame normalisée (session_start, type, seconds, projet,
+    tâche), propre au CSV cible."""
+    normalized = json.dumps([
+        payload.get("session_start"),
+        payload.get("type"),
+        payload.get("seconds"),
+        payload.get("project", ""),
+        payload.get("task", ""),
+        str(csv_path),
+    ], ensure_ascii=False)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
 def persist_event(event):
+    METRICS["events_received"] += 1
     _write_event(event)
     payload = event.get("json")
     _update_current_task(payload)
     row = payload_to_csv_row(payload)
     if row:
+        csv_path = current_tenant().csv_path
+        fingerprint = event_fingerprint(payload, csv_path)
+        if fingerprint in _SEEN_EVENTS:
+            _SEEN_EVENTS.move_to_end(fingerprint)
+            METRICS["duplicates_skipped"] += 1
+            print(f"CSV upsert ignoré (doublon) : {row}", flush=True)
+            return
         upsert_csv_row(row)
-        print(f"CSV upsert: {CSV_PATH} {row}", flush=True)
+        _SEEN_EVENTS[fingerprint] = (str(csv_path), row["date"])
+        while len(_SEEN_EVENTS) > DEDUP_CACHE_SIZE:
+            _SEEN_EVENTS.popitem(last=False)
+        METRICS["events_ingested"] += 1
+        print(f"CSV upsert: {csv_path} {row}", flush=True)
+    else:
+        schedule_prerender()  # seule la tâche en cours a changé (graphes de /live)
 
 
 @app.get("/health")
@@ -1428,6 +3173,8 @@ LIVE_HTML = """<!doctype html>
     font-size: .8rem; text-transform: uppercase; }}
   .totalbox strong {{ color: #fff; font-weight: 700;
     font-variant-numeric: tabular-nums; }}
+  .stats {{ display: flex; flex-wrap: wrap; gap: .6rem; margin-bottom: 1.5rem; }}
+  .stats .totalbox {{ margin-left: 0; }}
   .ver {{ color: #666; font-size: .7rem; margin-top: 2rem; }}
 </style>
 </head>
@@ -1438,6 +3185,13 @@ LIVE_HTML = """<!doctype html>
 <span class="totalbox">à facturer :
   <strong id="billable-total">{billable_total}</strong></span>
 
+<div class="stats">
+  <span class="totalbox">facturable / sem. (4 sem.) : <strong id="billable-avg-week">{billable_avg_week}</strong></span>
+  <span class="totalbox">total / sem. (4 sem.) : <strong id="activity-avg-week">{activity_avg_week}</strong></span>
+  <span class="totalbox">facturable ce mois : <strong id="billable-month">{billable_month}</strong></span>
+  <span class="totalbox">fin de mois (projection) : <strong id="billable-projection">{billable_projection}</strong></span>
+</div>
+
 <div class="charts-row">
   <img id="week" src="{week_url}" alt="heures facturables par jour de la semaine">
   <img id="week-activity" src="{activity_week_url}" alt="activité de la semaine par projet">
@@ -1465,6 +3219,11 @@ function rowHtml(r) {{
          `<td>${{r.minutes}}</td><td>${{r.startTime}}</td><td>${{r.endTime}}</td>`;
 }}
 
+function hm(hours) {{
+  const minutes = Math.round(hours * 60);
+  return Math.floor(minutes / 60) + ":" + String(minutes % 60).padStart(2, "0");
+}}
+
 function bust(url) {{ return url + (url.includes("?") ? "&" : "?") + "t=" + Date.now(); }}
 
 function setSrc(id, url) {{
@@ -1496,6 +3255,10 @@ async function poll() {{
 
   const total = document.getElementById("billable-total");
   if (total && data.billable_total) total.textContent = data.billable_total;
+  for (const [key, value] of Object.entries(data.stats || {{}})) {{
+    const el = document.getElementById(key.replaceAll("_", "-"));
+    if (el) el.textContent = hm(value);
+  }}
 
   const tbody = document.getElementById("rows");
   tbody.innerHTML = "";
@@ -1566,16 +3329,42 @@ WEEKS_HTML = """<!doctype html>
 {blocks}
 {nav}
 <footer class="ver">v{version}</footer>
+<script>
+// emplacements .lazy : chargés par /weeks/fragment à l'approche de l'écran ;
+// un 429 (limitation de débit) est retenté après Retry-After
+const lazyObserver = new IntersectionObserver((entries) => {{
+  for (const entry of entries) {{
+    if (entry.isIntersecting) {{
+      lazyObserver.unobserve(entry.target);
+      loadWeek(entry.target);
+    }}
+  }}
+}}, {{rootMargin: "800px 0px"}});
+
+async function loadWeek(section) {{
+  const res = await fetch(section.dataset.src, {{credentials: "same-origin"}});
+  if (res.status === 429) {{
+    const wait = Number(res.headers.get("Retry-After") || 1);
+    setTimeout(() => loadWeek(section), wait * 1000);
+    return;
+  }}
+  if (!res.ok) return;
+  section.outerHTML = await res.text();
+}}
+
+document.querySelectorAll("section.week.lazy").forEach((s) => lazyObserver.observe(s));
+</script>
 </body>
 </html>
 """
 
 
+# /months, et /years avec unit="mois"
 MONTH_HTML = """<!doctype html>
 <html lang="fr">
 <head>
 <meta charset="utf-8">
-<title>{count} semaines — {window}</title>
+<title>{count} {unit} — {window}</title>
 <style>
   body {{ font-family: system-ui, sans-serif; margin: 2rem; background: #111; color: #eee; }}
   a {{ color: #3987e5; text-decoration: none; }}
@@ -1648,11 +3437,44 @@ SWIMLANE_HTML = """<!doctype html>
 """
 
 
+HEATMAP_HTML = """<!doctype html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>Heatmap — {window}</title>
+<style>
+  body {{ font-family: system-ui, sans-serif; margin: 2rem; background: #111; color: #eee; }}
+  a {{ color: #3987e5; text-decoration: none; }}
+  .menubar {{ display: flex; gap: .6rem; margin-bottom: 1.5rem; }}
+  .menubar a {{ background: #2e2e2b; padding: .4rem .9rem; border-radius: 999px;
+    text-transform: uppercase; font-size: .8rem; color: #bbb; transition: background .15s ease; }}
+  .menubar a:hover {{ background: #3c3c37; }}
+  .menubar a.active {{ background: #3987e5; color: #fff; }}
+  form.search {{ display: flex; gap: .5rem; margin-bottom: 1.5rem; align-items: center; }}
+  input, select {{ background: #1b1b1b; border: 1px solid #333; border-radius: 4px; color: #eee;
+    padding: .3rem .4rem; font: inherit; }}
+  button {{ background: #2e2e2b; border: 0; border-radius: 999px; color: #bbb; cursor: pointer;
+    padding: .35rem .9rem; font-size: .75rem; text-transform: uppercase; transition: background .15s ease; }}
+  button:hover {{ background: #3987e5; color: #fff; }}
+  #chart svg {{ display: block; max-width: 100%; }}
+  .ver {{ color: #666; font-size: .7rem; margin-top: 2rem; }}
+</style>
+</head>
+<body>
+{menu}
+{form}
+<div id="chart">{chart}</div>
+<footer class="ver">v{version}</footer>
+</body>
+</html>
+"""
+
+
 ROWS_HTML = """<!doctype html>
 <html lang="fr">
 <head>
 <meta charset="utf-8">
-<title>Lignes — {count} dernières</title>
+<title>Lignes — {heading}</title>
 <style>
   body {{ font-family: system-ui, sans-serif; margin: 2rem; background: #111; color: #eee; }}
   h1 {{ font-size: 1.1rem; font-weight: normal; color: #999; }}
@@ -1678,18 +3500,27 @@ ROWS_HTML = """<!doctype html>
   button {{ background: #2e2e2b; border: 0; border-radius: 999px; color: #bbb; cursor: pointer;
     padding: .35rem .9rem; font-size: .75rem; text-transform: uppercase; transition: background .15s ease; }}
   button:hover {{ background: #3987e5; color: #fff; }}
+  form.search {{ display: flex; gap: .5rem; margin-bottom: 1.2rem; }}
+  form.search input {{ width: auto; flex: 1; }}
+  .pager {{ display: flex; gap: .6rem; margin: 1.2rem 0; }}
+  .pager a, .pager .disabled {{ background: #2e2e2b; padding: .4rem .9rem; border-radius: 999px;
+    font-size: .8rem; color: #bbb; }}
+  .pager a:hover {{ background: #3c3c37; }}
+  .pager .disabled {{ color: #555; }}
   .ver {{ color: #666; font-size: .7rem; margin-top: 2rem; }}
 </style>
 </head>
 <body>
 {menu}
-<h1>{count} dernières lignes du CSV</h1>
+<h1>{heading}</h1>
+{search_form}
 {flash}
 {forms}
 <table>
 <tr><th>date</th><th>projet</th><th>tâche</th><th>début</th><th>fin</th><th>durée</th><th></th></tr>
 {rows}
 </table>
+{pager}
 <footer class="ver">v{version}</footer>
 <script>
 // durée affichée = fin − début, recalculée à la saisie ; le serveur reste seul
@@ -1799,22 +3630,36 @@ def _rows_markup(rows):
 @app.get("/swimlane", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/swimlane")
 def swimlane(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
     n = _int_arg("d") or SWIMLANE_DAYS
     n = max(SWIMLANE_MIN_DAYS, min(n, SWIMLANE_MAX_DAYS))
-    days = swimlane_days(_read_csv_rows(CSV_PATH), datetime.now().date(), n=n)
+    blocks = request.args.get("blocks") == "1"
+    days = swimlane_days(row_store(), datetime.now().date(), n=n, blocks=blocks)
     prefixes = {p for _, _, sessions in days for *_, p in sessions}
+    mode = "&blocks=1" if blocks else ""
     fewer = (
-        f'<a href="{prefix}/swimlane?d={n - 1}">−1 jour</a>'
+        f'<a href="{prefix}/swimlane?d={n - 1}{mode}">−1 jour</a>'
         if n > SWIMLANE_MIN_DAYS else '<span class="disabled">−1 jour</span>'
     )
     more = (
-        f'<a href="{prefix}/swimlane?d={n + 1}">+1 jour</a>'
+        f'<a href="{prefix}/swimlane?d={n + 1}{mode}">+1 jour</a>'
         if n < SWIMLANE_MAX_DAYS else '<span class="disabled">+1 jour</span>'
     )
-    nav = f'<p class="daynav">{fewer}<span class="day-label">{n} jours</span>{more}</p>'
+    presets = "".join(
+        f'<span class="disabled">{preset} j</span>' if preset == n
+        else f'<a href="{prefix}/swimlane?d={preset}{mode}">{preset} j</a>'
+        for preset in SWIMLANE_PRESETS
+    )
+    toggle = (
+        f'<a href="{prefix}/swimlane?d={n}">sessions</a>' if blocks
+        else f'<a href="{prefix}/swimlane?d={n}&blocks=1">blocs</a>'
+    )
+    nav = (
+        f'<p class="daynav">{fewer}<span class="day-label">{n} jours</span>{more}'
+        f'{presets}{toggle}</p>'
+    )
     return SWIMLANE_HTML.format(
         days=n,
         menu=_menu_bar(prefix, "swimlane"),
@@ -1825,19 +3670,103 @@ def swimlane(secret_path):
     )
 
 
+def _heatmap_args():
+    """(first, last, bins, prefix) de /heatmap et /heatmap.svg : `from` / `to`
+    (jours inclus, par défaut les HEATMAP_WEEKS dernières semaines), `bins`
+    (24 ou 96), `project` (préfixe). None si les dates sont invalides ou hors
+    de AGGREGATE_YEARS, comme pour /api/aggregate."""
+    low, high = AGGREGATE_YEARS
+    in_range = lambda day: day is not None and low <= day.year <= high  # noqa: E731
+    last = datetime.now().date()
+    if request.args.get("to"):
+        last = _day_date(request.args["to"].replace("-", ""))
+        if not in_range(last):
+            return None
+    first = last - timedelta(weeks=HEATMAP_WEEKS) + timedelta(days=1)
+    if request.args.get("from"):
+        first = _day_date(request.args["from"].replace("-", ""))
+        if not in_range(first):
+            return None
+    if first > last:
+        return None
+    bins = _int_arg("bins")
+    bins = bins if bins in HEATMAP_BINS else HEATMAP_BINS[0]
+    return first, last, bins, _project_prefix(request.args.get("project")) or None
+
+
+def _render_heatmap(first, last, bins, prefix):
+    rows = row_store().search(since=calendar_day(first).key, until=calendar_day(last).key,
+                              prefix=prefix)
+    title = f"HEATMAP · {first:%d/%m/%Y} → {last:%d/%m/%Y}"
+    if prefix:
+        title += f" · {prefix.upper()}"
+    return render_heatmap_svg(
+        heatmap_grid(rows, bins), title, color=project_color(prefix) if prefix else "#3987e5",
+    )
+
+
+@app.get("/heatmap", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/heatmap")
+def heatmap(secret_path):
+    if not enter_tenant(secret_path):
+        return _reject()
+    prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
+    args = _heatmap_args()
+    if args is None:
+        return "from=YYYYMMDD et to=YYYYMMDD attendus, from <= to\n", 400
+    first, last, bins, project = args
+    value = lambda v: html.escape(v or "")  # noqa: E731
+    options = "".join(
+        f'<option value="{b}"{" selected" if b == bins else ""}>'
+        f'{"heures" if b == 24 else "quarts d’heure"}</option>'
+        for b in HEATMAP_BINS
+    )
+    form = (
+        '<form class="search" method="get">'
+        f'<input name="from" placeholder="du AAAAMMJJ" value="{calendar_day(first).key}">'
+        f'<input name="to" placeholder="au AAAAMMJJ" value="{calendar_day(last).key}">'
+        f'<input name="project" placeholder="projet" value="{value(project)}">'
+        f'<select name="bins">{options}</select>'
+        '<button type="submit">Afficher</button></form>'
+    )
+    return HEATMAP_HTML.format(
+        window=f"{first:%d/%m/%Y} → {last:%d/%m/%Y}",
+        menu=_menu_bar(prefix, "heatmap"),
+        form=form,
+        chart=_render_heatmap(first, last, bins, project),
+        version=APP_VERSION,
+    )
+
+
+@app.get("/heatmap.svg", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/heatmap.svg")
+def heatmap_svg(secret_path):
+    if not enter_tenant(secret_path):
+        return _reject()
+    args = _heatmap_args()
+    if args is None:
+        return "from=YYYYMMDD et to=YYYYMMDD attendus, from <= to\n", 400
+    return Response(_render_heatmap(*args), mimetype="image/svg+xml",
+                    headers={"Cache-Control": "no-store"})
+
+
 @app.get("/live", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/live")
 def live(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
     weeks_back = _int_arg("w")
     monday, sunday = current_week_bounds(week_anchor(weeks_back))
     show_today = weeks_back == 0
     wq = f"?w={weeks_back}"
+    # une semaine close a une URL stable (&monday=, prioritaire sur w), servie
+    # par nginx depuis l'export statique (export_site)
+    sq = f"{wq}&monday={calendar_day(monday).key}" if weeks_back else wq
     # rendu ici pour éviter le clignotement avant le premier poll() ; ensuite
     # c'est poll() qui le rafraîchit toutes les 3 s
-    amounts = project_amounts(_read_csv_rows(CSV_PATH), quantize=_quantize_enabled())
+    store = row_store()
+    amounts = project_amounts(store.rows, quantize=_quantize_enabled(), ledger=store.ledger)
 
     if show_today:
         current_box = '<div id="current-box" class="empty">aucune tâche en cours</div>'
@@ -1855,11 +3784,13 @@ def live(secret_path):
         f'<span class="week-label">{_fr_week_range(monday, sunday)}</span>{newer}</p>'
     )
 
+    stats = store.rolling.snapshot(datetime.now().date(), quantize=_quantize_enabled())
     return LIVE_HTML.format(
+        **{key: _format_hm(hours) for key, hours in stats.items()},
         api_url=f"{prefix}/api/rows{wq}",
-        week_url=f"{prefix}/billable-week.svg{wq}",
-        activity_week_url=f"{prefix}/activity-week.svg{wq}",
-        legend_url=f"{prefix}/activity-legend.svg{wq}",
+        week_url=f"{prefix}/billable-week.svg{sq}",
+        activity_week_url=f"{prefix}/activity-week.svg{sq}",
+        legend_url=f"{prefix}/activity-legend.svg{sq}",
         menu=_menu_bar(prefix, "live"),
         nav=nav,
         round_toggle=_round_toggle_html(_quantize_enabled()),
@@ -1882,68 +3813,156 @@ def _quantize_enabled():
     return request.cookies.get("round") == "1"
 
 
+# /weeks : les WEEKS_EAGER semaines les plus récentes sont rendues dans la page ;
+# les suivantes ne sont que des emplacements, remplis par /weeks/fragment quand
+# ils approchent de l'écran (IntersectionObserver). ?count=N|all élargit la
+# fenêtre sans alourdir le premier affichage.
+WEEKS_EAGER = 4
+WEEKS_MAX = 520
+WEEK_SECTION_MIN_H = 330  # hauteur réservée à un emplacement, évite les sauts
+
+
+def _week_section(monday, billable_days, activity_days):
+    """<section> d'une semaine de /weeks : étiquette et ses deux graphes."""
+    # pas de titre dans les SVG : la section porte déjà « Semaine du 23 au 29 juin »
+    future = future_day_labels(monday)
+    charts = render_week_svg(
+        billable_days, bar_start=DAY_BAR_START_X, show_title=False,
+        future_labels=future,
+    ) + render_activity_week_svg(
+        activity_days, uid=calendar_day(monday).key,
+        bar_start=DAY_BAR_START_X, show_title=False,
+        future_labels=future,
+    )
+    return (
+        f'<section class="week"><p class="week-label">'
+        f'{calendar_day(monday).week_range}</p>'
+        f'<div class="week-charts">{charts}</div></section>'
+    )
+
+
+def _week_placeholder(prefix, monday):
+    src = f"{prefix}/weeks/fragment?monday={calendar_day(monday).key}"
+    return (
+        f'<section class="week lazy" data-src="{src}" '
+        f'style="min-height:{WEEK_SECTION_MIN_H}px"><p class="week-label">'
+        f'<a href="{src}">{calendar_day(monday).week_range}</a></p></section>'
+    )
+
+
 @app.get("/weeks", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/weeks")
 def weeks(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
+    if request.args.get("count") == "all":
+        count = max(BILLABLE_WEEKS_SHOWN, history_weeks())
+    else:
+        count = min(_int_arg("count") or BILLABLE_WEEKS_SHOWN, WEEKS_MAX)
     page = _int_arg("p")
     quantize = _quantize_enabled()
-    blocks, prefixes = [], set()
-    for monday, sunday, billable_days, activity_days in recent_weeks(page=page, quantize=quantize):
-        for _, totals in activity_days:
-            prefixes.update(totals)
-        # pas de titre ici : chaque section porte déjà « Semaine du 23 au 29 juin »
-        future = future_day_labels(monday)
-        charts = render_week_svg(
-            billable_days, bar_start=DAY_BAR_START_X, show_title=False,
-            future_labels=future,
-        ) + render_activity_week_svg(
-            activity_days, uid=monday.strftime("%Y%m%d"),
-            bar_start=DAY_BAR_START_X, show_title=False,
-            future_labels=future,
-        )
-        blocks.append(
-            f'<section class="week"><p class="week-label">'
-            f'{_fr_week_range(monday, sunday)}</p>'
-            f'<div class="week-charts">{charts}</div></section>'
-        )
+    store = row_store()
+    newest, _ = current_week_bounds()
+    newest -= timedelta(weeks=page * count)
+    mondays = [newest - timedelta(weeks=i) for i in range(count)]
+    prefixes = set()
+    for monday in mondays:
+        # la légende couvre toute la fenêtre : agrégats hebdomadaires, sans rendu
+        prefixes.update(store.week_rollup(monday)[2])
     legend = render_activity_legend_svg(_ordered_projects(prefixes))
     # précédentes = semaines plus anciennes (p+1, gauche) ; suivantes = plus
-    # récentes (p-1, droite, grisé en page 0)
-    older = f'<a href="{prefix}/weeks?p={page + 1}">{_CHEVRON_LEFT}{BILLABLE_WEEKS_SHOWN} précédentes</a>'
+    # récentes (p-1, droite, grisé en page 0). Une taille de page non standard
+    # est propagée.
+    size = "" if count == BILLABLE_WEEKS_SHOWN else f"count={count}&"
+    older = f'<a href="{prefix}/weeks?{size}p={page + 1}">{_CHEVRON_LEFT}{count} précédentes</a>'
     newer = (
-        f'<a href="{prefix}/weeks?p={page - 1}">{BILLABLE_WEEKS_SHOWN} suivantes{_CHEVRON_RIGHT}</a>'
+        f'<a href="{prefix}/weeks?{size}p={page - 1}">{count} suivantes{_CHEVRON_RIGHT}</a>'
         if page > 0
-        else f'<span class="disabled">{BILLABLE_WEEKS_SHOWN} suivantes{_CHEVRON_RIGHT}</span>'
+        else f'<span class="disabled">{count} suivantes{_CHEVRON_RIGHT}</span>'
     )
     # titre fondu dans la barre de nav, encadré par les boutons (cf. /live)
-    title = f"{BILLABLE_WEEKS_SHOWN} semaines (page {page}) : facturable + activité"
+    title = f"{count} semaines (page {page}) : facturable + activité"
     nav = (
         f'<p class="weeknav">{older}'
         f'<span class="nav-title">{title}</span>{newer}</p>'
     )
-    return WEEKS_HTML.format(
+    head, tail = template_parts(
+        WEEKS_HTML,
         menu=_menu_bar(prefix, "weeks"),
         nav=nav,
         round_toggle=_round_toggle_html(quantize),
         legend=legend,
-        blocks="\n".join(blocks),
         version=APP_VERSION,
     )
 
+    def chunks():
+        yield head
+        for i, monday in enumerate(mondays):
+            if i:
+                yield "\n"
+            if i < WEEKS_EAGER:
+                yield _week_section(monday, *week_days(monday, quantize))
+            else:
+                yield _week_placeholder(prefix, monday)
+        yield tail
+
+    return stream_page(chunks())
+
+
+@app.get("/weeks/fragment", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/weeks/fragment")
+def weeks_fragment(secret_path):
+    """Une section de /weeks, pour le chargement paresseux de la page."""
+    if not enter_tenant(secret_path):
+        return _reject()
+    day = _day_date(request.args.get("monday", ""))
+    if day is None:
+        return "monday=YYYYMMDD attendu\n", 400
+    monday, _ = current_week_bounds(day)
+    section = _week_section(monday, *week_days(monday, _quantize_enabled()))
+    return Response(section, mimetype="text/html")
+
+
+def history_weeks(today=None):
+    """Nombre de semaines de la semaine de `today` à celle de la première ligne
+    du CSV, incluses (0 si le CSV est vide)."""
+    if today is None:
+        today = datetime.now().date()
+    first = row_store().first_day
+    if first is None:
+        return 0
+    monday, _ = current_week_bounds(today)
+    return max(0, (monday - current_week_bounds(first)[0]).days // 7) + 1
+
+
+def history_months(today=None):
+    """Nombre de mois du mois de `today` à celui de la première ligne du CSV,
+    inclus (0 si le CSV est vide)."""
+    if today is None:
+        today = datetime.now().date()
+    first = row_store().first_day
+    if first is None:
+        return 0
+    return max(0, (today.year - first.year) * 12 + today.month - first.month) + 1
+
 
 @app.get("/months", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/months")
 def months(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
-    n = _int_arg("n") or MONTH_WEEKS_SHOWN
-    n = max(MONTH_MIN_WEEKS, min(n, MONTH_MAX_WEEKS))
-    # la fenêtre ne démarre jamais plus de MONTH_MAX_WEEKS semaines en arrière
-    page = min(_int_arg("p"), MONTH_MAX_WEEKS // n)
+    history = history_weeks()
+    if request.args.get("n") == "all":
+        n = max(MONTH_MIN_WEEKS, history)  # tout l'historique sur une page
+    else:
+        n = _int_arg("n") or MONTH_WEEKS_SHOWN
+        n = max(MONTH_MIN_WEEKS, min(n, MONTH_MAX_WEEKS))
+    # on recule jusqu'à la semaine de la première ligne du CSV, et au moins
+    # MONTH_MAX_WEEKS semaines même sans données
+    last_page = max(MONTH_MAX_WEEKS // n, (history - 1) // n)
+    page = min(_int_arg("p"), last_page)
     quantize = _quantize_enabled()
 
     weeks = recent_week_totals(n=n, page=page, quantize=quantize)
@@ -1956,14 +3975,15 @@ def months(secret_path):
     # (20h/40h). Pas de barre de total ici (show_header=False) : la page compare
     # les semaines entre elles, le cumul sur N semaines n'apporte rien.
     month_groups = month_row_groups([monday for monday, _, _, _, _ in weeks])
-    charts = render_week_svg(
+    billable_chart = iter_week_svg(
         billable_rows,
         max_hours=BILLABLE_WEEK_MAX_HOURS,
         week_max_hours=BILLABLE_WEEK_MAX_HOURS * n,
         title_label=f"FACTURABLE — {n} SEMAINES",
         show_header=False,
         month_groups=month_groups,
-    ) + render_activity_week_svg(
+    )
+    activity_chart = iter_activity_week_svg(
         activity_rows,
         max_hours=ACTIVITY_WEEK_MAX_HOURS,
         week_max_hours=ACTIVITY_WEEK_MAX_HOURS * n,
@@ -1987,7 +4007,7 @@ def months(secret_path):
     # suivantes = plus récentes (p-1, extérieur droit, grisé en page 0)
     older = (
         f'<a href="{prefix}/months?n={n}&p={page + 1}">{_CHEVRON_LEFT}précédentes</a>'
-        if page < MONTH_MAX_WEEKS // n
+        if page < last_page
         else f'<span class="disabled">{_CHEVRON_LEFT}précédentes</span>'
     )
     newer = (
@@ -2002,23 +4022,134 @@ def months(secret_path):
         f'<p class="weeknav">{older}{fewer}'
         f'<span class="nav-title">{title}</span>{more}{newer}</p>'
     )
-    return MONTH_HTML.format(
+    head, tail = template_parts(
+        MONTH_HTML,
         count=n,
+        unit="semaines",
         window=_fr_window(weeks),
         menu=_menu_bar(prefix, "month"),
         nav=nav,
         round_toggle=_round_toggle_html(quantize),
+        legend=render_activity_legend_svg(_ordered_projects(prefixes)),
+        version=APP_VERSION,
+    )
+
+    def chunks():
+        yield head
+        # une ligne de graphe à la fois : la mémoire reste plate même à n=all
+        yield from billable_chart
+        yield from activity_chart
+        yield tail
+
+    return stream_page(chunks())
+
+
+ACTIVITY_MONTH_MAX_HOURS = 2 * MONTHLY_TARGET_HOURS
+
+
+def _months_window():
+    """(m, page, dernière page) de /years et de ses SVG, d'après ?m= et ?p=."""
+    history = history_months()
+    if request.args.get("m") == "all":
+        m = max(YEARS_MIN_MONTHS, history)
+    else:
+        m = _int_arg("m") or YEARS_MONTHS_SHOWN
+        m = max(YEARS_MIN_MONTHS, min(m, YEARS_MAX_MONTHS))
+    last_page = max(0, (history - 1) // m)
+    return m, min(_int_arg("p"), last_page), last_page
+
+
+def _render_months_billable(months):
+    return render_week_svg(
+        [(label, hours) for _, label, hours, _ in months],
+        max_hours=MONTHLY_TARGET_HOURS,
+        week_max_hours=MONTHLY_TARGET_HOURS * len(months),
+        title_label=f"FACTURABLE — {len(months)} MOIS",
+        show_header=False,
+    )
+
+
+def _render_months_activity(months):
+    return render_activity_week_svg(
+        [(label, activity) for _, label, _, activity in months],
+        max_hours=ACTIVITY_MONTH_MAX_HOURS,
+        week_max_hours=ACTIVITY_MONTH_MAX_HOURS * len(months),
+        uid="years",
+        title_label=f"ACTIVITÉ — {len(months)} MOIS",
+        show_header=False,
+    )
+
+
+@app.get("/years", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/years")
+def years(secret_path):
+    if not enter_tenant(secret_path):
+        return _reject()
+    prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
+    m, page, last_page = _months_window()
+    quantize = _quantize_enabled()
+    months = recent_month_totals(n=m, page=page, quantize=quantize)
+    prefixes = set()
+    for _, _, _, activity in months:
+        prefixes.update(activity)
+    charts = _render_months_billable(months) + _render_months_activity(months)
+
+    older = (
+        f'<a href="{prefix}/years?m={m}&p={page + 1}">{_CHEVRON_LEFT}précédents</a>'
+        if page < last_page
+        else f'<span class="disabled">{_CHEVRON_LEFT}précédents</span>'
+    )
+    newer = (
+        f'<a href="{prefix}/years?m={m}&p={page - 1}">suivants{_CHEVRON_RIGHT}</a>'
+        if page > 0 else f'<span class="disabled">suivants{_CHEVRON_RIGHT}</span>'
+    )
+    oldest, newest = months[-1][0], months[0][0]
+    window = (f"{_FR_MONTHS[oldest.month - 1]} {oldest.year}"
+              f" → {_FR_MONTHS[newest.month - 1]} {newest.year}")
+    title = f"{m} mois, {window} : facturable (objectif {MONTHLY_TARGET_HOURS}h) + activité"
+    nav = (
+        f'<p class="weeknav">{older}'
+        f'<span class="nav-title">{title}</span>{newer}</p>'
+    )
+    return MONTH_HTML.format(
+        count=m,
+        unit="mois",
+        window=window,
+        menu=_menu_bar(prefix, "years"),
+        nav=nav,
+        round_toggle=_round_toggle_html(quantize),
         charts=charts,
         legend=render_activity_legend_svg(_ordered_projects(prefixes)),
         version=APP_VERSION,
     )
 
 
+@app.get("/billable-months.svg", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/billable-months.svg")
+def billable_months_svg(secret_path):
+    if not enter_tenant(secret_path):
+        return _reject()
+    m, page, _ = _months_window()
+    months = recent_month_totals(n=m, page=page, quantize=_quantize_enabled())
+    svg = _render_months_billable(months)
+    return Response(svg, mimetype="image/svg+xml", headers={"Cache-Control": "no-store"})
+
+
+@app.get("/activity-months.svg", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/activity-months.svg")
+def activity_months_svg(secret_path):
+    if not enter_tenant(secret_path):
+        return _reject()
+    m, page, _ = _months_window()
+    svg = _render_months_activity(recent_month_totals(n=m, page=page))
+    return Response(svg, mimetype="image/svg+xml", headers={"Cache-Control": "no-store"})
+
+
 @app.get("/billable.svg", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/billable.svg")
 def billable_svg(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     svg = render_billable_svg(billable_hours())
     return Response(svg, mimetype="image/svg+xml", headers={"Cache-Control": "no-store"})
 
@@ -2026,13 +4157,11 @@ def billable_svg(secret_path):
 @app.get("/billable-week.svg", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/billable-week.svg")
 def billable_week_svg(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
-    w = _int_arg("w")
+    if not enter_tenant(secret_path):
+        return _reject()
+    w = _weeks_back_arg()
     monday, sunday = current_week_bounds(week_anchor(w))
-    day_hours = billable_hours_for_days(
-        monday, sunday, _read_csv_rows(CSV_PATH), quantize=_quantize_enabled()
-    )
+    day_hours, _ = week_days(monday, _quantize_enabled())
     highlight = day_label(datetime.now().date()) if w == 0 else None
     current_hours = 0.0
     if w == 0:
@@ -2050,22 +4179,22 @@ def billable_week_svg(secret_path):
 @app.get("/activity.svg", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/activity.svg")
 def activity_svg(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
-    today = datetime.now().strftime("%Y%m%d")
-    totals = activity_by_project(_read_csv_rows(CSV_PATH), today)
-    svg = render_activity_svg(totals)
+    if not enter_tenant(secret_path):
+        return _reject()
+    today = datetime.now().date()
+    series = row_store().aggregate(today, today, group="prefix", metric="activity")
+    svg = render_activity_svg(series.get(calendar_day(today).key, {}))
     return Response(svg, mimetype="image/svg+xml", headers={"Cache-Control": "no-store"})
 
 
 @app.get("/activity-week.svg", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/activity-week.svg")
 def activity_week_svg(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
-    w = _int_arg("w")
+    if not enter_tenant(secret_path):
+        return _reject()
+    w = _weeks_back_arg()
     monday, sunday = current_week_bounds(week_anchor(w))
-    days = activity_week_days(_read_csv_rows(CSV_PATH), sunday)
+    _, days = week_days(monday)
     highlight = day_label(datetime.now().date()) if w == 0 else None
     current_hours, current_prefix = 0.0, None
     if w == 0:
@@ -2085,22 +4214,105 @@ def activity_week_svg(secret_path):
 @app.get("/activity-legend.svg", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/activity-legend.svg")
 def activity_legend_svg(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
-    rows = _read_csv_rows(CSV_PATH)
-    anchor = week_anchor(_int_arg("w"))
+    if not enter_tenant(secret_path):
+        return _reject()
+    anchor = week_anchor(_weeks_back_arg())
     monday, _ = current_week_bounds(anchor)
-    week_start, week_end = monday.strftime("%Y%m%d"), anchor.strftime("%Y%m%d")
-    prefixes = set()
-    for r in rows:
-        if week_start <= r["date"] <= week_end:
-            prefix = _project_prefix(r.get("project"))
-            if prefix and prefix != "nan":
-                prefixes.add(prefix)
+    series = row_store().aggregate(monday, anchor, bucket="week", group="prefix", metric="activity")
+    prefixes = {prefix for groups in series.values() for prefix in groups}
     svg = render_activity_legend_svg(_ordered_projects(prefixes))
     return Response(svg, mimetype="image/svg+xml", headers={"Cache-Control": "no-store"})
 
 
+def _weeks_back_arg():
+    """Semaine demandée, en semaines avant la semaine en cours : `?monday=`
+    (YYYYMMDD, URL stable d'une semaine close, cf. export_site) ou `?w=`."""
+    monday = _day_date(request.args.get("monday", ""))
+    if monday is None:
+        return _int_arg("w")
+    return max(0, (current_week_bounds()[0] - calendar_day(monday).monday).days // 7)
+
+
+def _row_cursor(name):
+    """Curseur `?before=` / `?after=` : « YYYYMMDD,HH:MM,projet,tâche » →
+    _row_sort_key, None si absent ou mal formé. Projet et tâche peuvent manquer
+    (« YYYYMMDD,HH:MM ») : le curseur précède alors toutes les lignes de ce
+    début."""
+    day, start, project, task = (request.args.get(name, "").split(",", 3) + ["", "", ""])[:4]
+    day = day.replace("-", "").strip()
+    if not (day.isdigit() and len(day) == 8):
+        return None
+    return day, start.strip(), project, task
+
+
+def _row_key(row):
+    return ",".join(_row_sort_key(row))
+
+
+def _rows_page(store, search, n):
+    """Une page de /rows (les plus récentes d'abord) et les curseurs des pages
+    voisines (None s'il n'y en a pas). Le curseur ?before= / ?after= est la
+    clé de la ligne (cf. _row_sort_key) : chaque page coûte O(n), quelle que
+    soit sa profondeur dans l'historique."""
+    after = _row_cursor("after")
+    if after:
+        rows = list(islice(store.search(**search, after=after), n))[::-1]
+    else:
+        rows = list(islice(store.search(**search, before=_row_cursor("before")), n))
+    if not rows:
+        return rows, None, None
+    newest, oldest = _row_sort_key(rows[0]), _row_sort_key(rows[-1])
+    newer = next(store.search(**search, after=newest), None) and _row_key(rows[0])
+    older = next(store.search(**search, before=oldest), None) and _row_key(rows[-1])
+    return rows, newer, older
+
+
+def _rows_pager(search, n, newer, older):
+    args = {
+        "q": search["query"], "project": search["prefix"],
+        "from": search["since"], "to": search["until"],
+        "n": n if n != ROWS_SHOWN else None,
+    }
+    args = {name: value for name, value in args.items() if value}
+
+    def link(cursor, label, **cursor_arg):
+        if not cursor:
+            return f'<span class="disabled">{label}</span>'
+        return f'<a href="?{html.escape(urlencode({**args, **cursor_arg}))}">{label}</a>'
+
+    return (
+        '<nav class="pager">'
+        + link(newer, "← plus récentes", after=newer)
+        + link(older, "plus anciennes →", before=older)
+        + "</nav>"
+    )
+
+
+def _search_args():
+    """Filtres de recherche de /rows et /api/rows, depuis la query string :
+    `q` (termes), `from` et `to` (jours inclus, YYYYMMDD ou YYYY-MM-DD),
+    `project` (préfixe de projet)."""
+    day = lambda name: request.args.get(name, "").replace("-", "").strip() or None  # noqa: E731
+    return {
+        "query": request.args.get("q", "").strip(),
+        "since": day("from"),
+        "until": day("to"),
+        "prefix": _project_prefix(request.args.get("project")) or None,
+    }
+
+
+def _search_form_html(search):
+    value = lambda v: html.escape(v or "")  # noqa: E731
+    return (
+        '<form class="search" method="get">'
+        f'<input name="q" placeholder="projet, tâche…" value="{value(search["query"])}">'
+        f'<input name="project" placeholder="projet" value="{value(search["prefix"])}">'
+        f'<input name="from" placeholder="du AAAAMMJJ" value="{value(search["since"])}">'
+        f'<input name="to" placeholder="au AAAAMMJJ" value="{value(search["until"])}">'
+        '<button type="submit">Chercher</button></form>'
+    )
+
+
 def _rows_flash():
     """Bandeau ok/erreur, passé par la query string au retour du POST (l'app
     n'a pas de SECRET_KEY, donc pas de flash Flask)."""
@@ -2115,12 +4327,12 @@ def _rows_flash():
 @app.get("/projects", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/projects")
 def projects_page(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
     quantize = _quantize_enabled()
-    rows = _read_csv_rows(CSV_PATH)
-    amounts = project_amounts(rows, quantize=quantize)
+    store = row_store()
+    amounts = project_amounts(store.rows, quantize=quantize, ledger=store.ledger)
     billing = _project_billing_config()
     trs = ""
     for project, days, amount, since in amounts:
@@ -2134,7 +4346,7 @@ def projects_page(secret_path):
         )
         tjm, _ = billing[project]
         for sub, sub_days, sub_amount in project_subamounts(
-            rows, project, tjm, since, quantize=quantize
+            store.rows, project, tjm, since, quantize=quantize, ledger=store.ledger
         ):
             # sous-projet vide = tâches saisies sur le projet nu, sans « _ »
             label = html.escape(sub) if sub else "—"
@@ -2166,18 +4378,25 @@ def projects_page(secret_path):
 @app.get("/rows", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/rows")
 def rows_page(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
     n = _int_arg("n") or ROWS_SHOWN
     n = max(1, min(n, ROWS_MAX))
-    rows = _read_csv_rows(CSV_PATH)
-    rows.sort(key=lambda row: (row["date"], row["startTime"]), reverse=True)
-    rows = rows[:n]
+    search = _search_args()
+    rows, newer, older = _rows_page(row_store(), search, n)
     forms, trs = _rows_markup(rows)
+    if any(search.values()):
+        heading = f"{len(rows)} lignes trouvées"
+    elif newer:
+        heading = f"{len(rows)} lignes du CSV"
+    else:
+        heading = f"{len(rows)} dernières lignes du CSV"
     return ROWS_HTML.format(
-        count=len(rows),
+        heading=heading,
         menu=_menu_bar(prefix, "rows"),
+        search_form=_search_form_html(search),
+        pager=_rows_pager(search, n, newer, older),
         flash=_rows_flash(),
         forms=forms,
         rows=trs,
@@ -2188,8 +4407,8 @@ def rows_page(secret_path):
 @app.post("/rows", defaults={"secret_path": ""})
 @app.post("/<path:secret_path>/rows")
 def rows_edit(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     prefix = f"/{secret_path.strip('/')}" if secret_path.strip("/") else ""
     form = request.form
     key = (
@@ -2211,35 +4430,413 @@ def rows_edit(secret_path):
     return redirect(f"{prefix}/rows?ok=1")
 
 
+@app.post("/api/import", defaults={"secret_path": ""})
+@app.post("/<path:secret_path>/api/import")
+def api_import(secret_path):
+    """Import en lot (backfill_ods --push) : {"mode": "missing" | "replace",
+    "rows": [lignes CSV], "days": [YYYYMMDD à vider, mode replace]} — cf.
+    import_csv_rows. Une seule écriture, sans aller-retour du CSV complet."""
+    if not enter_tenant(secret_path):
+        return _reject()
+    payload = request.get_json(silent=True)
+    if (not isinstance(payload, dict) or not isinstance(payload.get("rows"), list)
+            or not isinstance(payload.get("days", []), list)):
+        return 'JSON attendu : {"mode": "missing|replace", "rows": [...], "days": [...]}\n', 400
+    mode = payload.get("mode", "missing")
+    try:
+        written, skipped, count = import_csv_rows(payload["rows"], mode, payload.get("days"))
+    except RowEditError as exc:
+        return f"{exc}\n", 400
+    return jsonify({"mode": mode, "rows": count, "days": written, "skipped": skipped})
+
+
 @app.get("/api/rows", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/api/rows")
 def api_rows(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
     weeks_back = _int_arg("w")
     today = datetime.now().strftime("%Y%m%d")
-    all_rows = _read_csv_rows(CSV_PATH)
-    rows = [r for r in all_rows if r["date"] == today]
-    rows.sort(key=lambda r: r["startTime"], reverse=True)
+    store = row_store()
+    search = _search_args()
+    before = _row_cursor("before")
+    if any(search.values()) or before:
+        # recherche : ?q=, ?from=, ?to=, ?project=, ?before= comme /rows,
+        # ?n= lignes au plus
+        n = max(1, min(_int_arg("n") or ROWS_SHOWN, ROWS_MAX))
+        rows = list(islice(store.search(**search, before=before), n))
+    else:
+        rows = list(store.search(since=today, until=today))
     current = current_task_row() if weeks_back == 0 else None
     # le total est global (« depuis la dernière facture ») : il ne dépend ni du
     # jour affiché ni de la semaine demandée, seulement du cookie d'arrondi
-    amounts = project_amounts(all_rows, quantize=_quantize_enabled())
+    amounts = project_amounts(store.rows, quantize=_quantize_enabled(), ledger=store.ledger)
     return jsonify({
         "rows": rows,
         "current": current,
         "billable_total": _format_eur(billable_total(amounts)),
+        # heures : moyennes glissantes, mois à date, projection (RollingStats)
+        "stats": store.rolling.snapshot(datetime.now().date(), quantize=_quantize_enabled()),
+    })
+
+
+@app.get("/api/aggregate", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/api/aggregate")
+def api_aggregate(secret_path):
+    """Minutes par période et par groupe, en JSON compact — cf.
+    RowStore.aggregate. `from` / `to` : jours inclus (YYYYMMDD ou YYYY-MM-DD),
+    par défaut le mois en cours jusqu'à aujourd'hui."""
+    if not enter_tenant(secret_path):
+        return _reject()
+    today = datetime.now().date()
+    first = _day_date(request.args.get("from", "").replace("-", "")) if request.args.get("from") else month_start(today)
+    last = _day_date(request.args.get("to", "").replace("-", "")) if request.args.get("to") else today
+    bucket = request.args.get("bucket", "day")
+    group = request.args.get("group", "")
+    metric = request.args.get("metric", "billable")
+    if first is None or last is None or first > last:
+        return "from=YYYYMMDD et to=YYYYMMDD attendus, from <= to\n", 400
+    low, high = AGGREGATE_YEARS
+    if first.year < low or last.year > high:
+        return f"from et to entre {low} et {high}\n", 400
+    if bucket not in AGGREGATE_BUCKETS or group not in AGGREGATE_GROUPS or metric not in AGGREGATE_METRICS:
+        return "bucket=day|week|month, group=prefix|project|task, metric=billable|activity\n", 400
+    quantize = request.args.get("quantize") == "1"
+    series = row_store().aggregate(first, last, bucket, group, metric, quantize)
+    return jsonify({
+        "from": calendar_day(first).key,
+        "to": calendar_day(last).key,
+        "bucket": bucket,
+        "group": group,
+        "metric": metric,
+        "quantize": quantize,
+        "minutes": series,
     })
 
 
+@app.get("/metrics", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/metrics")
+def metrics(secret_path):
+    # métriques du processus entier : réservées à l'exploitant (locataire par défaut)
+    if not enter_tenant(secret_path) or current_tenant() is not DEFAULT_TENANT:
+        return _reject()
+    return Response(
+        render_metrics(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+# ── Pré-rendu des pages chaudes ───────────────────────────────────────────────
+# Juste après un pomodoro, le poll suivant de /live paierait agrégats et rendus
+# pendant qu'on attend. Chaque écriture du CSV (webhook, édition, import) ou
+# changement de tâche en cours réveille donc un thread qui rend d'avance les
+# graphes de la semaine, /api/rows et la page 0 de /weeks et /months, pour les
+# deux réglages d'arrondi. Une réponse servie reste valable tant que son jeton
+# (RowStore, sa version, le ProjectRegistry du locataire — recompilé à chaque
+# édition de ses fichiers —, le jour, la tâche en cours à la minute) n'a pas
+# changé ; les réponses non mises en flux des mêmes URL alimentent aussi ce
+# cache. Le thread rend sous _STORE_LOCK : aucune écriture ne modifie le
+# RowStore, ses agrégats ou le grand livre pendant un rendu.
+PRERENDER_URLS = (
+    "/billable-week.svg?w=0", "/activity-week.svg?w=0", "/activity-legend.svg?w=0",
+    "/api/rows?w=0", "/weeks", "/months",
+)
+PRERENDER_ENDPOINTS = {
+    "billable_week_svg", "activity_week_svg", "activity_legend_svg", "api_rows", "weeks", "months",
+}
+_PRERENDERED = {}  # {(secret, endpoint, query, arrondi): (jeton, corps, mimetype, en-têtes)}
+_PRERENDER = {"thread": None, "wake": threading.Event(), "tenants": set()}
+
+
+def _prerender_key():
+    """Clé de cache de la requête en cours, None hors des URL pré-rendues (une
+    recherche, une autre semaine ou page ne sont jamais mises en cache)."""
+    query = request.query_string.decode("latin-1")
+    if request.endpoint not in PRERENDER_ENDPOINTS or query not in ("", "w=0"):
+        return None
+    return current_tenant().secret, request.endpoint, query, _quantize_enabled()
+
+
+def _prerender_token():
+    store = row_store()
+    current = current_task_row()
+    return (store, store.version, current_tenant().registry(), datetime.now().date(),
+            current and tuple(current.values()))
+
+
+def _remember(key, token, response):
+    headers = [(k, v) for k, v in response.headers if k.lower() == "cache-control"]
+    _PRERENDERED[key] = (token, response.get_data(), response.mimetype, headers)
+
+
+def _forget_prerendered(store):
+    """Oublie les réponses rendues depuis `store` (évincé de _STORES)."""
+    for key in [key for key, cached in _PRERENDERED.items() if cached[0][0] is store]:
+        _PRERENDERED.pop(key, None)
+
+
+@app.before_request
+def _serve_prerendered():
+    # après _admit_request : une réponse en cache reste soumise au débit
+    if (request.method != "GET" or request.view_args is None
+            or not enter_tenant(request.view_args.get("secret_path", ""))):
+        return None
+    key = _prerender_key()
+    if key is None:
+        return None
+    token = _prerender_token()
+    cached = _PRERENDERED.get(key)
+    if cached is None or cached[0] != token:
+        # jeton pris avant le rendu : une écriture pendant celui-ci rend
+        # l'entrée périmée, jamais fausse
+        g.prerender = (key, token)
+        return None
+    METRICS["prerender_hits"] += 1
+    _, body, mimetype, headers = cached
+    return Response(body, mimetype=mimetype, headers=headers)
+
+
+@app.after_request
+def _keep_prerendered(response):
+    # enregistré après _compress_response, donc exécuté avant lui : corps brut
+    pending = g.pop("prerender", None)
+    if pending and response.status_code == 200 and not response.is_streamed:
+        _remember(*pending, response)
+    return response
+
+
+@timed("prerender")
+def prerender(tenant=None):
+    """Rend les PRERENDER_URLS du locataire `tenant` (défaut : celui par défaut),
+    pour les deux réglages d'arrondi, par les vues elles-mêmes, et les garde
+    pour _serve_prerendered."""
+    tenant = tenant or DEFAULT_TENANT
+    prefix = f"/{tenant.secret}" if tenant.secret else ""
+    for url in PRERENDER_URLS:
+        for q in ("0", "1"):
+            with _STORE_LOCK, app.test_request_context(prefix + url, headers={"Cookie": f"round={q}"}):
+                g.tenant = tenant
+                token = _prerender_token()
+                response = app.make_response(app.dispatch_request())
+                response.make_sequence()  # pages en flux (/weeks, /months)
+                _remember(_prerender_key(), token, response)
+
+
+def _prerender_loop():
+    wake, pending = _PRERENDER["wake"], _PRERENDER["tenants"]
+    while True:
+        wake.wait()
+        wake.clear()  # les écritures arrivées pendant un rendu n'en relancent qu'un
+        while pending:
+            tenant = pending.pop()
+            try:
+                prerender(tenant)
+            except Exception as exc:  # le thread ne doit pas mourir
+                print(f"pré-rendu en échec : {exc!r}", flush=True)
+
+
+def schedule_prerender():
+    """Réveille le thread de pré-rendu (démarré à la première écriture) pour le
+    locataire de la requête en cours."""
+    if not PRERENDER:
+        return
+    _PRERENDER["tenants"].add(current_tenant())
+    thread = _PRERENDER["thread"]
+    if thread is None or not thread.is_alive():
+        thread = threading.Thread(target=_prerender_loop, name="prerender", daemon=True)
+        _PRERENDER["thread"] = thread
+        thread.start()
+    _PRERENDER["wake"].set()
+
+# ── Export statique des semaines closes (export-site) ─────────────────────────
+# Une semaine terminée ne change plus, sauf édition : ses graphes et sa section
+# de /weeks sont rendus une fois sous EXPORT_SITE_DIR/<secret>/, que nginx sert
+# directement avec un long cache (cf. nginx/nginx.conf : try_files, puis repli
+# sur le récepteur). Le manifeste garde une empreinte des lignes de chaque
+# semaine : un nouvel export ne réécrit que les semaines qui ont changé.
+def _export_files(key):
+    """(chemin relatif, URL, cookie d'arrondi) des fichiers de la semaine `key`
+    — les vues qui dépendent de l'arrondi existent en deux versions."""
+    for q in ("0", "1"):
+        yield f"weeks/fragment/{key}.q{q}.html", f"/weeks/fragment?monday={key}", q
+        yield f"billable-week/{key}.q{q}.svg", f"/billable-week.svg?monday={key}", q
+    yield f"activity-week/{key}.svg", f"/activity-week.svg?monday={key}", "0"
+    yield f"activity-legend/{key}.svg", f"/activity-legend.svg?monday={key}", "0"
+
+
+def _week_fingerprint(store, monday, salt):
+    digest = hashlib.sha1(salt)
+    for i in range(7):
+        for row in store.by_day.get(calendar_day(monday + timedelta(days=i)).key, ()):
+            digest.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def unexport_days(csv_path, days):
+    """Retire de l'export statique (EXPORT_SITE_DIR) les fichiers des semaines
+    closes qui contiennent `days` : nginx retombe alors sur le récepteur, à
+    jour, jusqu'au prochain export_site qui les réécrit."""
+    tenant = next((t for t in all_tenants() if str(t.csv_path) == str(csv_path)), None)
+    root = os.path.join(EXPORT_SITE_DIR, tenant.secret) if tenant else None
+    if root is None or not os.path.isdir(root):
+        return
+    current, _ = current_week_bounds()
+    mondays = {calendar_day(day).monday_key for day in map(_day_date, days) if day and day < current}
+    for key in mondays:
+        for path, _, _ in _export_files(key):
+            try:
+                os.remove(os.path.join(root, path))
+            except FileNotFoundError:
+                pass
+
+
+@timed("export_site")
+def export_site(out_dir=None, full=False, tenant=None):
+    """Rend les semaines closes (jusqu'à la semaine dernière) du locataire
+    `tenant` (défaut : celui par défaut), de la première ligne de son CSV à
+    aujourd'hui, dans `out_dir` (défaut EXPORT_SITE_DIR)/<secret>, par les vues
+    elles-mêmes : mêmes octets que les routes. `full` : tout réécrire,
+    manifeste ignoré. Rend (semaines écrites, semaines inchangées)."""
+    tenant = tenant or DEFAULT_TENANT
+    root = os.path.join(out_dir or EXPORT_SITE_DIR, tenant.secret)
+    prefix = f"/{tenant.secret}" if tenant.secret else ""
+    with app.test_request_context(prefix + "/"):
+        g.tenant = tenant  # agrégats du RowStore selon les projets facturables du locataire
+        store = row_store(tenant.csv_path)
+    if store.first_day is None:
+        return 0, 0
+    manifest_path = os.path.join(root, "manifest.json")
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    # une nouvelle version, un projet facturable ou une couleur en plus
+    # changent le rendu de toutes les semaines
+    salt = json.dumps(
+        [APP_VERSION, sorted(tenant.billable), sorted(tenant.registry().colors.items())]
+    ).encode("utf-8")
+    current, _ = current_week_bounds()
+    monday = calendar_day(store.first_day).monday
+    written = unchanged = 0
+    while monday < current:
+        key = calendar_day(monday).key
+        fingerprint = _week_fingerprint(store, monday, salt)
+        # fichiers retirés depuis (unexport_days) : à réécrire, même si la
+        # semaine est revenue à son contenu exporté
+        exported = all(os.path.exists(os.path.join(root, path)) for path, _, _ in _export_files(key))
+        if not full and manifest.get(key) == fingerprint and exported:
+            unchanged += 1
+        else:
+            for path, url, q in _export_files(key):
+                with app.test_request_context(prefix + url, headers={"Cookie": f"round={q}"}):
+                    response = app.make_response(app.dispatch_request())
+                _write_atomic(os.path.join(root, path), response.get_data())
+            manifest[key] = fingerprint
+            written += 1
+        monday += timedelta(weeks=1)
+    if written:
+        _write_atomic(manifest_path, json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    return written, unchanged
+
+
+# ── Profilage à la demande (/debug/profile) ──────────────────────────────────
+# Échantillonneur de piles : un thread lit sys._current_frames() toutes les
+# PROFILE_INTERVAL s pendant la durée demandée, puis s'arrête. Rien n'est
+# installé hors de ces fenêtres (ni hook, ni thread) : coût nul au repos.
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_SECONDS = 120
+_PROFILE = {"thread": None, "until": 0.0, "stacks": None}
+
+
+def sample_stacks(seconds, interval=PROFILE_INTERVAL, all_threads=False):
+    """{pile repliée: nb d'échantillons} — format « collapsed » de flamegraph.pl
+    et speedscope (`fichier:fonction;fichier:fonction …`, racine d'abord).
+
+    Sauf `all_threads`, ne garde que les piles qui traversent ce module : le
+    worker au repos (attente de connexion gunicorn) noierait le reste."""
+    me = threading.get_ident()
+    here = os.path.basename(__file__)
+    counts = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if not all_threads and not any(f.startswith(here + ":") for f in stack):
+                continue
+            key = ";".join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(interval)
+    return counts
+
+
+def _run_profile(seconds, all_threads):
+    _PROFILE["stacks"] = sample_stacks(seconds, all_threads=all_threads)
+
+
+@app.get("/debug/profile", defaults={"secret_path": ""})
+@app.get("/<path:secret_path>/debug/profile")
+def debug_profile(secret_path):
+    """`?seconds=N` lance un échantillonnage de N s en tâche de fond et rend la
+    main aussitôt : le worker unique doit rester libre pour servir les pages
+    qu'on parcourt pendant ce temps. Sans `seconds`, rend le dernier profil.
+    Réservé au locataire par défaut : les piles couvrent tous les locataires."""
+    if not enter_tenant(secret_path) or current_tenant() is not DEFAULT_TENANT:
+        return _reject()
+    thread = _PROFILE["thread"]
+    running = thread is not None and thread.is_alive()
+    if "seconds" in request.args:
+        if running:
+            return "profil déjà en cours\n", 409
+        try:
+            seconds = float(request.args["seconds"])
+        except ValueError:
+            return "seconds : nombre attendu\n", 400
+        seconds = max(0.0, min(seconds, PROFILE_MAX_SECONDS))
+        _PROFILE["stacks"] = None
+        _PROFILE["until"] = time.monotonic() + seconds
+        _PROFILE["thread"] = threading.Thread(
+            target=_run_profile, args=(seconds, request.args.get("all") == "1"),
+            name="profile", daemon=True,
+        )
+        _PROFILE["thread"].start()
+        return f"échantillonnage pendant {seconds:g} s — résultat : GET {request.path}\n", 202
+    if running:
+        remaining = max(0.0, _PROFILE["until"] - time.monotonic())
+        return f"profil en cours, encore {remaining:.0f} s\n", 202
+    if _PROFILE["stacks"] is None:
+        return "aucun profil — lancer ?seconds=N\n", 404
+    body = "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(_PROFILE["stacks"].items(), key=lambda kv: -kv[1])
+    )
+    return Response(body, mimetype="text/plain", headers={"Cache-Control": "no-store"})
+
+
 @app.get("/api/csv", defaults={"secret_path": ""})
 @app.get("/<path:secret_path>/api/csv")
 def csv_export(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
-    if not os.path.exists(CSV_PATH):
+    if not enter_tenant(secret_path):
+        return _reject()
+    csv_path = current_tenant().csv_path
+    if not os.path.exists(csv_path):
         return "not found\n", 404
-    with open(CSV_PATH, encoding="utf-8") as f:
+    with open(csv_path, encoding="utf-8") as f:
         body = f.read()
     return Response(
         body,
@@ -2254,8 +4851,8 @@ def csv_export(secret_path):
 @app.route("/", defaults={"secret_path": ""}, methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 @app.route("/<path:secret_path>", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 def hook(secret_path):
-    if SECRET and secret_path.strip("/") != SECRET:
-        return "not found\n", 404
+    if not enter_tenant(secret_path):
+        return _reject()
 
     event = _record(request)
     persist_event(event)
@@ -2263,6 +4860,12 @@ def hook(secret_path):
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["export-site"]:
+        # dans le conteneur : docker compose exec webhook python webhook_receiver.py export-site
+        for tenant in all_tenants():
+            written, unchanged = export_site(full="--full" in sys.argv, tenant=tenant)
+            print(f"{EXPORT_SITE_DIR}/{tenant.secret}: {written} weeks written, {unchanged} unchanged")
+        sys.exit(0)
     print(f"Logging Pomofocus webhooks to {LOG_PATH}")
     print(f"Writing Pomofocus-like CSV to {CSV_PATH}")
     endpoint = f"/{SECRET}" if SECRET else "/"